@@ -1,34 +1,246 @@
 # Flask 主应用
-from flask import Flask, jsonify, request
+from flask import Blueprint, Flask, Response, jsonify, make_response, request
 from flask_cors import CORS
+from functools import wraps
+from typing import Optional
+import hashlib
 import os
+import threading
 from database import Database
-from database.models import Movie, Review
-from crawler import DoubanCrawler, RottenTomatoesCrawler, IMDBCrawler
-from utils.helpers import clean_text, extract_year
+from database.scoring import ScoreEngine
+from database.suggest import SuggestIndex
+from database.trending import TrendingEngine
+from crawler import DoubanCrawler, RottenTomatoesCrawler, IMDBCrawler, CrawlEngine, ResponseCache
+from jobs import CrawlWorkerPool
+from utils.cache import ResultCache, make_cache_key
+from utils.ndjson import iter_ndjson
+from utils.serialize import dumps
 
 
-app = Flask(__name__)
-CORS(app)
+api = Blueprint('api', __name__)
 
-# 初始化数据库
+# 初始化数据库（多进程部署时在预加载阶段创建，fork 后各工作进程自动重建连接）
 db_path = os.getenv('DATABASE', 'movies.db')
 db = Database(db_path)
 
-# 初始化爬虫
-douban_crawler = DoubanCrawler(delay=2.0)
-rotten_tomatoes_crawler = RottenTomatoesCrawler(delay=2.0)
-imdb_crawler = IMDBCrawler(delay=2.0)
+# 热点读接口的查询结果缓存，数据写入后按写入代数自动失效
+query_cache = ResultCache(
+    max_entries=int(os.getenv('QUERY_CACHE_SIZE', 1024)),
+    ttl=float(os.getenv('QUERY_CACHE_TTL', 60)),
+)
 
-# 爬虫映射
-crawlers = {
-    'douban': douban_crawler,
-    'rotten_tomatoes': rotten_tomatoes_crawler,
-    'imdb': imdb_crawler,
+# 搜索建议前缀索引，首次使用（或缓存预热）时从数据库构建，之后按变更日志增量同步
+suggest_index = SuggestIndex()
+
+# 读接口的 HTTP 缓存时间（秒），过期后客户端和 CDN 通过 If-None-Match 重新验证
+http_cache_max_age = int(os.getenv('HTTP_CACHE_MAX_AGE', 30))
+
+# 爬虫类映射，爬虫实例在首次使用时才创建
+CRAWLER_CLASSES = {
+    'douban': DoubanCrawler,
+    'rotten_tomatoes': RottenTomatoesCrawler,
+    'imdb': IMDBCrawler,
 }
 
+_crawl_engine: Optional[CrawlEngine] = None
+_crawl_workers: Optional[CrawlWorkerPool] = None
+_crawl_lock = threading.Lock()
+
+
+def get_crawl_engine() -> CrawlEngine:
+    """获取爬取引擎，首次调用时创建爬虫和响应缓存"""
+    global _crawl_engine
+    with _crawl_lock:
+        if _crawl_engine is None:
+            # 爬虫响应缓存（CRAWLER_CACHE_DIR 为空时关闭）
+            cache_dir = os.getenv('CRAWLER_CACHE_DIR', '.crawler_cache')
+            cache = ResponseCache(cache_dir, float(os.getenv('CRAWLER_CACHE_MB', 512))) if cache_dir else None
+            _crawl_engine = CrawlEngine({
+                source: crawler_class(delay=2.0, cache=cache)
+                for source, crawler_class in CRAWLER_CLASSES.items()
+            })
+        return _crawl_engine
+
+
+def start_crawl_workers() -> Optional[CrawlWorkerPool]:
+    """
+    在当前进程启动后台爬取任务线程池
+
+    线程不能跨 fork 存活，多进程部署时应在工作进程中（post_fork 钩子）调用，
+    不能在预加载应用的主进程中调用。CRAWL_WORKERS 为 0 时不启动。
+
+    Returns:
+        线程池，未启动时返回 None
+    """
+    global _crawl_workers
+    workers = int(os.getenv('CRAWL_WORKERS', 2))
+    if workers <= 0:
+        return None
+    engine = get_crawl_engine()
+    with _crawl_lock:
+        if _crawl_workers is None:
+            _crawl_workers = CrawlWorkerPool(db, engine, workers=workers, scorer=ScoreEngine(),
+                                             trending=TrendingEngine())
+            _crawl_workers.start()
+        return _crawl_workers
+
+
+def warm_caches():
+    """预先加载首页默认的热度排行、统计信息和数据源并构建搜索建议索引，避免冷启动后的首批请求集中查库"""
+    try:
+        load_trending(10, None)
+        load_search({'sort_by': 'popularity', 'limit': 20})
+        cached_query('sources', None, db.get_sources)
+        cached_query('stats', None, db.get_stats)
+        suggest_index.sync(db)
+    except Exception as e:
+        print(f"缓存预热错误: {e}")
+
+
+def create_app(start_workers: bool = True, warm_cache: Optional[bool] = None) -> Flask:
+    """
+    创建 Flask 应用
+
+    Args:
+        start_workers: 是否在当前进程启动后台爬取线程；预加载的多进程部署传 False，
+                       由工作进程的 post_fork 钩子调用 start_crawl_workers
+        warm_cache: 是否预热查询缓存，默认读取 WARM_CACHE 环境变量（默认开启）；
+                    预加载时预热结果随 fork 共享给所有工作进程
+
+    Returns:
+        Flask 应用
+    """
+    app = Flask(__name__)
+    CORS(app)
+    app.register_blueprint(api)
+
+    if warm_cache is None:
+        warm_cache = os.getenv('WARM_CACHE', '1').lower() in ('1', 'true', 'yes')
+    if warm_cache:
+        warm_caches()
+    if start_workers:
+        start_crawl_workers()
+    return app
+
+
+def cached_query(endpoint, params, loader):
+    """
+    通过查询缓存读取结果
+
+    Args:
+        endpoint: 接口名
+        params: 规范化后的查询参数
+        loader: 缓存未命中时执行的查询
+    """
+    return query_cache.get_or_load(make_cache_key(endpoint, params), db.get_generation(), loader)
+
+
+def page_to_body(page):
+    """
+    把 (电影字典列表, 下一页游标) 序列化为列表接口的响应体
+
+    查询缓存保存序列化后的字节串，命中时不需要再次序列化，占用的内存也比字典小得多。
+    """
+    movies, next_cursor = page
+    return dumps({'success': True, 'total': len(movies), 'data': movies, 'next_cursor': next_cursor})
+
+
+def parse_search_args(args):
+    """
+    解析搜索接口的查询参数
+
+    Args:
+        args: 查询参数（MultiDict）
+
+    Returns:
+        Database.search_movies_page 的参数
+    """
+    query = args.get('query', '').strip()
+    source = args.get('source', '').strip()
+    limit = args.get('limit', 20, type=int)
+    cursor = args.get('cursor', '').strip()
+
+    return {
+        'query': query if query else None,
+        'source': source if source else None,
+        'min_score': args.get('min_score', type=float),
+        'sort_by': args.get('sort_by', 'popularity').strip(),
+        'limit': max(min(limit, 100), 1),
+        'cursor': cursor if cursor else None,
+    }
+
+
+def parse_trending_args(args):
+    """解析热度排行接口的查询参数，返回 (数量, 游标)"""
+    limit = args.get('limit', 10, type=int)
+    cursor = args.get('cursor', '').strip() or None
+    return max(min(limit, 50), 1), cursor
+
+
+def parse_suggest_args(args):
+    """解析搜索建议接口的查询参数，返回 (输入内容, 数量)"""
+    query = args.get('q', '').strip()
+    limit = args.get('limit', 10, type=int)
+    return query, max(min(limit, suggest_index.max_results), 1)
 
-@app.route('/')
+
+def load_suggest(query, limit):
+    """同步搜索建议索引后按前缀查找，返回 JSON 响应体"""
+    suggest_index.sync(db)
+    return dumps({'success': True, 'data': suggest_index.search(query, limit)})
+
+
+def load_search(params):
+    """通过查询缓存执行搜索，返回 JSON 响应体"""
+    params = {'query': None, 'source': None, 'min_score': None, 'cursor': None, **params}
+    return cached_query('search', params, lambda: page_to_body(db.search_movies_page(**params, as_dict=True)))
+
+
+def load_trending(limit, cursor):
+    """通过查询缓存获取热度排行，返回 JSON 响应体"""
+    return cached_query('trending', {'limit': limit, 'cursor': cursor},
+                        lambda: page_to_body(db.get_trending_movies_page(limit, cursor, as_dict=True)))
+
+
+def make_etag(path, args):
+    """
+    由数据库写入代数和请求路径、参数生成 ETag，数据没有变化时 ETag 不变
+
+    Args:
+        path: 请求路径
+        args: 查询参数（MultiDict）
+    """
+    params = '&'.join(f'{k}={v}' for k, v in sorted(args.items(multi=True)))
+    digest = hashlib.sha1(f'{path}?{params}'.encode('utf-8')).hexdigest()[:16]
+    return f'{db.get_generation()}-{digest}'
+
+
+def conditional_get(view):
+    """
+    为读接口添加 ETag 和条件请求支持
+
+    请求带有匹配的 If-None-Match 时直接返回 304，不执行任何查询。
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = make_etag(request.path, request.args)
+        cache_control = f'public, max-age={http_cache_max_age}'
+
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        return response
+
+    return wrapper
+
+
+@api.route('/')
 def index():
     """首页"""
     return jsonify({
@@ -36,46 +248,33 @@ def index():
         'version': '1.0.0',
         'endpoints': {
             'search': '/api/search',
+            'suggest': '/api/suggest',
             'movie': '/api/movie/<id>',
             'trending': '/api/trending',
             'sources': '/api/sources',
             'stats': '/api/stats',
+            'cache_stats': '/api/cache/stats',
+            'export': '/api/export',
+            'crawl': '/api/crawl',
+            'crawl_job': '/api/crawl/<job_id>',
         }
     })
 
 
-@app.route('/api/search', methods=['GET'])
+@api.route('/api/search', methods=['GET'])
+@conditional_get
 def search_movies():
     """搜索电影"""
     try:
-        # 获取查询参数
-        query = request.args.get('query', '').strip()
-        source = request.args.get('source', '').strip()
-        min_score = request.args.get('min_score', type=float)
-        sort_by = request.args.get('sort_by', 'popularity').strip()
-        limit = request.args.get('limit', 20, type=int)
-
-        # 参数验证
-        if limit > 100:
-            limit = 100
-
-        # 搜索数据库
-        movies = db.search_movies(
-            query=query if query else None,
-            source=source if source else None,
-            min_score=min_score,
-            sort_by=sort_by,
-            limit=limit
-        )
-
-        # 转换为响应格式
-        result = [movie.to_dict() for movie in movies]
+        params = parse_search_args(request.args)
+
+        return Response(load_search(params), mimetype='application/json')
 
+    except ValueError as e:
         return jsonify({
-            'success': True,
-            'total': len(result),
-            'data': result
-        })
+            'success': False,
+            'error': str(e)
+        }), 400
 
     except Exception as e:
         print(f"搜索错误: {e}")
@@ -85,7 +284,25 @@ def search_movies():
         }), 500
 
 
-@app.route('/api/movie/<int:movie_id>', methods=['GET'])
+@api.route('/api/suggest', methods=['GET'])
+@conditional_get
+def suggest_movies():
+    """搜索建议：按标题前缀（或中文标题的拼音、拼音首字母）返回最热门的电影"""
+    try:
+        query, limit = parse_suggest_args(request.args)
+
+        return Response(load_suggest(query, limit), mimetype='application/json')
+
+    except Exception as e:
+        print(f"搜索建议错误: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/movie/<int:movie_id>', methods=['GET'])
+@conditional_get
 def get_movie_detail(movie_id):
     """获取电影详情"""
     try:
@@ -110,23 +327,20 @@ def get_movie_detail(movie_id):
         }), 500
 
 
-@app.route('/api/trending', methods=['GET'])
+@api.route('/api/trending', methods=['GET'])
+@conditional_get
 def get_trending():
     """获取热度排行"""
     try:
-        limit = request.args.get('limit', 10, type=int)
+        limit, cursor = parse_trending_args(request.args)
 
-        if limit > 50:
-            limit = 50
-
-        movies = db.get_trending_movies(limit=limit)
-        result = [movie.to_dict() for movie in movies]
+        return Response(load_trending(limit, cursor), mimetype='application/json')
 
+    except ValueError as e:
         return jsonify({
-            'success': True,
-            'total': len(result),
-            'data': result
-        })
+            'success': False,
+            'error': str(e)
+        }), 400
 
     except Exception as e:
         print(f"获取热度排行错误: {e}")
@@ -136,11 +350,12 @@ def get_trending():
         }), 500
 
 
-@app.route('/api/sources', methods=['GET'])
+@api.route('/api/sources', methods=['GET'])
+@conditional_get
 def get_sources():
     """获取可用数据源"""
     try:
-        sources = db.get_sources()
+        sources = cached_query('sources', None, db.get_sources)
 
         return jsonify({
             'success': True,
@@ -155,11 +370,12 @@ def get_sources():
         }), 500
 
 
-@app.route('/api/stats', methods=['GET'])
+@api.route('/api/stats', methods=['GET'])
+@conditional_get
 def get_stats():
     """获取统计信息"""
     try:
-        stats = db.get_stats()
+        stats = cached_query('stats', None, db.get_stats)
 
         return jsonify({
             'success': True,
@@ -174,9 +390,33 @@ def get_stats():
         }), 500
 
 
-@app.route('/api/crawl', methods=['POST'])
+@api.route('/api/export', methods=['GET'])
+def export_catalog():
+    """以 NDJSON 流式导出全部电影及影评"""
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    filename = 'movies.ndjson.gz' if compress else 'movies.ndjson'
+
+    return Response(
+        iter_ndjson(db.iter_export(), compress=compress),
+        mimetype='application/gzip' if compress else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+@api.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """获取查询缓存命中率等指标"""
+    return jsonify({
+        'success': True,
+        'generation': db.get_generation(),
+        'cache': query_cache.stats(),
+        'suggest': suggest_index.stats()
+    })
+
+
+@api.route('/api/crawl', methods=['POST'])
 def crawl_movies():
-    """爬取电影数据（内部使用）"""
+    """提交爬取任务（内部使用），立即返回任务ID"""
     try:
         data = request.get_json()
         if not data:
@@ -189,61 +429,63 @@ def crawl_movies():
         query = data.get('query', '')
         limit = data.get('limit', 20)
 
-        # 获取对应的爬虫
-        crawler = crawlers.get(source)
-        if not crawler:
+        # source 为 all 时并发爬取所有数据源
+        if source not in CRAWLER_CLASSES and source != 'all':
             return jsonify({
                 'success': False,
                 'error': f'Unknown source: {source}'
             }), 400
 
-        # 爬取数据
-        movies_data = crawler.search(query, limit=limit)
-
-        # 保存到数据库
-        saved_count = 0
-        for movie_data in movies_data:
-            try:
-                # 保存电影
-                movie = Movie(
-                    title=clean_text(movie_data.get('title', '')),
-                    year=extract_year(movie_data.get('description', '')),
-                    description=clean_text(movie_data.get('description', '')),
-                    poster_url=movie_data.get('poster_url', ''),
-                )
-                movie_id = db.insert_movie(movie)
-
-                # 保存影评
-                review = Review(
-                    movie_id=movie_id,
-                    source=crawler.get_source_name(),
-                    score=movie_data.get('score'),
-                    votes=movie_data.get('votes'),
-                    url=movie_data.get('url', ''),
-                    popularity=movie_data.get('popularity', 0),
-                )
-                db.insert_review(review)
-                saved_count += 1
-
-            except Exception as e:
-                print(f"保存电影失败: {e}")
-                continue
+        crawl_workers = start_crawl_workers()
+        if crawl_workers is None:
+            return jsonify({
+                'success': False,
+                'error': 'Crawl workers are disabled'
+            }), 503
+
+        job_id = crawl_workers.submit(source, query, limit)
 
         return jsonify({
             'success': True,
-            'saved': saved_count,
-            'total': len(movies_data)
+            'job_id': job_id,
+            'status': 'pending',
+            'status_url': f'/api/crawl/{job_id}'
+        }), 202
+
+    except Exception as e:
+        print(f"提交爬取任务错误: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api.route('/api/crawl/<int:job_id>', methods=['GET'])
+def get_crawl_job(job_id):
+    """获取爬取任务状态和进度"""
+    try:
+        job = db.get_crawl_job(job_id)
+
+        if not job:
+            return jsonify({
+                'success': False,
+                'error': 'Job not found'
+            }), 404
+
+        return jsonify({
+            'success': True,
+            'data': job.to_dict()
         })
 
     except Exception as e:
-        print(f"爬取错误: {e}")
+        print(f"获取爬取任务错误: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found(error):
     """404错误处理"""
     return jsonify({
@@ -252,7 +494,7 @@ def not_found(error):
     }), 404
 
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(error):
     """500错误处理"""
     return jsonify({
@@ -263,10 +505,12 @@ def internal_error(error):
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
-    debug = os.getenv('FLASK_ENV', 'development') == 'development'
-    
-    print(f"启动 Flask 服务器，端口: {port}")
+    debug = os.getenv('FLASK_ENV', 'production') == 'development'
+
+    print(f"启动 Flask 开发服务器，端口: {port}")
     print(f"数据库路径: {db_path}")
     print(f"调试模式: {debug}")
-    
-    app.run(host='0.0.0.0', port=port, debug=debug)
+
+    # 调试模式的自动重载会再启动一个子进程，只在实际提供服务的进程中启动爬取线程
+    serving = not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+    create_app(start_workers=serving, warm_cache=serving).run(host='0.0.0.0', port=port, debug=debug)
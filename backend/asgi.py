@@ -0,0 +1,161 @@
+# ASGI 应用：异步读接口（uvicorn asgi:app）
+import asyncio
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_etags
+from app import (db, query_cache, suggest_index, http_cache_max_age, cached_query, load_search, load_suggest,
+                 load_trending, make_etag, parse_search_args, parse_suggest_args, parse_trending_args, warm_caches)
+from utils.serialize import dumps
+from utils.singleflight import SingleFlight
+
+
+# SQLite 查询在有界线程池中执行，事件循环只负责网络 I/O；线程数决定同时进行的查询数
+executor = ThreadPoolExecutor(max_workers=int(os.getenv('ASYNC_DB_THREADS', 8)),
+                              thread_name_prefix='asgi-db')
+
+# 合并同时到达的相同请求，一批相同的 /api/trending 只查询一次
+flights = SingleFlight()
+
+
+def search(args):
+    """搜索电影"""
+    return 200, load_search(parse_search_args(args))
+
+
+def suggest(args):
+    """搜索建议"""
+    return 200, load_suggest(*parse_suggest_args(args))
+
+
+def movie_detail(args, movie_id):
+    """获取电影详情"""
+    movie_with_reviews = db.get_movie_by_id(int(movie_id))
+    if not movie_with_reviews:
+        return 404, {'success': False, 'error': 'Movie not found'}
+    return 200, {'success': True, 'data': movie_with_reviews.to_dict()}
+
+
+def trending(args):
+    """获取热度排行"""
+    return 200, load_trending(*parse_trending_args(args))
+
+
+def sources(args):
+    """获取可用数据源"""
+    return 200, {'success': True, 'sources': cached_query('sources', None, db.get_sources)}
+
+
+def stats(args):
+    """获取统计信息"""
+    return 200, {'success': True, 'stats': cached_query('stats', None, db.get_stats)}
+
+
+def cache_stats(args):
+    """获取查询缓存和请求合并指标"""
+    return 200, {'success': True, 'generation': db.get_generation(),
+                 'cache': query_cache.stats(), 'suggest': suggest_index.stats(), 'coalesce': flights.stats()}
+
+
+# (路径, 处理函数, 是否支持条件请求)
+ROUTES = [
+    (re.compile(r'/api/search'), search, True),
+    (re.compile(r'/api/suggest'), suggest, True),
+    (re.compile(r'/api/movie/(\d+)'), movie_detail, True),
+    (re.compile(r'/api/trending'), trending, True),
+    (re.compile(r'/api/sources'), sources, True),
+    (re.compile(r'/api/stats'), stats, True),
+    (re.compile(r'/api/cache/stats'), cache_stats, False),
+]
+
+
+def to_json(payload) -> bytes:
+    """序列化响应，列表接口的处理函数直接返回查询缓存中已序列化的字节串"""
+    return payload if isinstance(payload, bytes) else dumps(payload)
+
+
+def render(handler, conditional, path, args, groups):
+    """
+    在线程池中执行处理函数
+
+    Returns:
+        (状态码, 响应体, ETag)，ETag 只在支持条件请求的成功响应中返回
+    """
+    try:
+        etag = make_etag(path, args) if conditional else None
+        status, payload = handler(args, *groups)
+    except ValueError as e:
+        return 400, to_json({'success': False, 'error': str(e)}), None
+    except Exception as e:
+        print(f"{path} 错误: {e}")
+        return 500, to_json({'success': False, 'error': str(e)}), None
+    return status, to_json(payload), etag if status == 200 else None
+
+
+async def send_response(send, status, body=b'', etag=None, head=False):
+    """发送 JSON 响应"""
+    headers = [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode('ascii')),
+        (b'access-control-allow-origin', b'*'),
+    ]
+    if etag:
+        headers.append((b'etag', f'"{etag}"'.encode('ascii')))
+        headers.append((b'cache-control', f'public, max-age={http_cache_max_age}'.encode('ascii')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': b'' if head else body})
+
+
+async def lifespan(receive, send):
+    """启动时预热查询缓存，关闭时停止线程池"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if os.getenv('WARM_CACHE', '1').lower() in ('1', 'true', 'yes'):
+                await asyncio.get_running_loop().run_in_executor(executor, warm_caches)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI 入口，只提供只读接口；爬取任务和导出仍由 WSGI 应用（wsgi.py）提供"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    path = scope['path']
+    for pattern, handler, conditional in ROUTES:
+        match = pattern.fullmatch(path)
+        if match:
+            break
+    else:
+        await send_response(send, 404, to_json({'success': False, 'error': 'Not found'}))
+        return
+
+    if scope['method'] not in ('GET', 'HEAD'):
+        await send_response(send, 405, to_json({'success': False, 'error': 'Method not allowed'}))
+        return
+    head = scope['method'] == 'HEAD'
+
+    loop = asyncio.get_running_loop()
+    args = MultiDict(parse_qsl(scope['query_string'].decode('utf-8', 'replace'), keep_blank_values=True))
+
+    # 条件请求：ETag 匹配时直接返回 304，不执行查询
+    if_none_match = dict(scope['headers']).get(b'if-none-match')
+    if conditional and if_none_match:
+        etag = await loop.run_in_executor(executor, make_etag, path, args)
+        if parse_etags(if_none_match.decode('latin-1')).contains(etag):
+            await send_response(send, 304, etag=etag, head=True)
+            return
+
+    key = (path, tuple(sorted(args.items(multi=True))))
+    status, body, etag = await flights.do(
+        key, lambda: loop.run_in_executor(executor, render, handler, conditional, path, args, match.groups()))
+    await send_response(send, status, body, etag, head)
@@ -3,5 +3,9 @@ from .base_crawler import BaseCrawler
 from .douban_crawler import DoubanCrawler
 from .rotten_tomatoes_crawler import RottenTomatoesCrawler
 from .imdb_crawler import IMDBCrawler
+from .engine import CrawlEngine
+from .http_cache import ResponseCache
+from .pipeline import Pipeline, Stage, CrawlPipeline
 
-__all__ = ['BaseCrawler', 'DoubanCrawler', 'RottenTomatoesCrawler', 'IMDBCrawler']
+__all__ = ['BaseCrawler', 'DoubanCrawler', 'RottenTomatoesCrawler', 'IMDBCrawler', 'CrawlEngine', 'ResponseCache',
+           'Pipeline', 'Stage', 'CrawlPipeline']
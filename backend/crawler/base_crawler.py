@@ -1,56 +1,173 @@
 # 爬虫基类
 import requests
-from typing import List, Dict, Optional, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import List, Dict, Optional, Any, Callable, Iterator, Tuple
 from abc import ABC, abstractmethod
-import time
-import random
+from urllib.parse import urlparse
+from utils.helpers import clean_text, extract_year
+from .rate_limiter import HostRateLimiter, default_rate_limiter
+from .http_cache import ResponseCache
+from .parsing import Target, make_soup
+
+# 只有安装了 brotli 解码器时才声明支持 br，否则服务器返回的 br 内容无法解码
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+# 需要退避重试的状态码
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
 
 
 class BaseCrawler(ABC):
     """爬虫基类"""
 
-    def __init__(self, delay: float = 2.0):
+    # 响应缓存有效期（秒），子类按数据源的更新频率覆盖
+    search_cache_ttl = 3600
+    detail_cache_ttl = 24 * 3600
+
+    # 详情页需要提取的元素，定向解析模式下只构建这些元素的子树
+    detail_targets: List[Target] = []
+
+    def __init__(self, delay: float = 2.0, rate_limiter: Optional[HostRateLimiter] = None,
+                 session: Optional[requests.Session] = None, pool_size: int = 10,
+                 max_retries: int = 3, backoff_factor: float = 0.5, timeout: float = 10,
+                 cache: Optional[ResponseCache] = None, parser: str = 'auto',
+                 targeted_parsing: bool = True):
         """
         初始化爬虫
         
         Args:
-            delay: 请求延迟（秒），默认2秒
+            delay: 同一主机两次请求之间的平均间隔（秒），默认2秒
+            rate_limiter: 按主机限速的令牌桶，默认使用进程内共享的限速器
+            session: 自定义 HTTP 会话（例如测试时指向本地桩服务），默认创建带连接池的会话
+            pool_size: 每个主机保持的长连接数
+            max_retries: 遇到 429/5xx 或连接错误时的最大重试次数
+            backoff_factor: 指数退避系数，第 n 次重试前等待 backoff_factor * 2^(n-1) 秒
+            timeout: 单次请求超时（秒）
+            cache: 响应磁盘缓存，默认不缓存
+            parser: HTML 解析后端 (auto/lxml/html.parser)，auto 优先使用 lxml
+            targeted_parsing: 是否只解析页面中需要提取的元素
         """
         self.delay = delay
+        self.rate_limiter = rate_limiter or default_rate_limiter
+        self.timeout = timeout
+        self.cache = cache
+        self.parser = parser
+        self.targeted_parsing = targeted_parsing
+        self._owns_session = session is None
+        self.session = session or self._create_session(pool_size, max_retries, backoff_factor)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
         }
 
-    def _request(self, url: str, params: Optional[Dict] = None) -> Optional[requests.Response]:
+    @staticmethod
+    def _create_session(pool_size: int, max_retries: int, backoff_factor: float) -> requests.Session:
+        """创建带连接池和重试策略的 HTTP 会话，同一主机的请求复用 TCP/TLS 连接"""
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self):
+        """关闭爬虫自己创建的 HTTP 会话"""
+        if self._owns_session:
+            self.session.close()
+
+    def _request(self, url: str, params: Optional[Dict] = None,
+                 ttl: Optional[float] = None) -> Optional[requests.Response]:
         """
         发送HTTP请求
         
         Args:
             url: 请求URL
             params: 请求参数
+            ttl: 缓存有效期（秒），为空或未配置缓存时不使用缓存
             
         Returns:
             Response对象或None
         """
+        cache_key = None
+        cached = None
+        headers = self.headers
+        if self.cache is not None and ttl:
+            cache_key = self.cache.make_key(url, params)
+            cached = self.cache.get(cache_key)
+            if cached:
+                # 未过期直接返回，过期则发起条件请求重新验证
+                if cached.is_fresh(ttl):
+                    return cached.to_response()
+                headers = {**self.headers, **cached.validators()}
+
         try:
-            # 添加随机延迟，避免被封
-            time.sleep(self.delay + random.uniform(0, 1))
-            
-            response = requests.get(url, params=params, headers=self.headers, timeout=10)
+            # 按主机限速，避免被封；不同主机的请求可以并发进行
+            if self.delay > 0:
+                self.rate_limiter.acquire(urlparse(url).netloc, rate=1 / self.delay)
+
+            response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and cached:
+                self.cache.touch(cache_key)
+                return cached.to_response()
+
             response.raise_for_status()
+            if cache_key:
+                self.cache.put(cache_key, response)
             return response
         except requests.RequestException as e:
             print(f"请求失败: {url}, 错误: {e}")
             return None
 
-    @abstractmethod
+    def _make_soup(self, markup: str, targets: Optional[List[Target]] = None):
+        """
+        使用配置的解析后端构造 BeautifulSoup
+
+        Args:
+            markup: HTML 文本
+            targets: 提取目标，定向解析开启时只构建这些元素
+        """
+        return make_soup(markup, self.parser, targets if self.targeted_parsing else None)
+
+    def _parse_cached(self, response: requests.Response, parse: Callable[[], Any]) -> Any:
+        """
+        解析响应，页面来自缓存且已解析过时直接返回缓存的解析结果
+
+        Args:
+            response: _request 返回的响应
+            parse: 解析函数
+        """
+        cache_key = getattr(response, 'cache_key', None)
+        if cache_key and getattr(response, 'from_cache', False):
+            parsed = self.cache.get_parsed(cache_key)
+            if parsed is not None:
+                return parsed
+
+        result = parse()
+        if cache_key and result is not None:
+            self.cache.put_parsed(cache_key, result)
+        return result
+
     def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
         """
-        搜索电影
+        搜索电影（逐页请求并解析，某一页结果不足一页时停止）
         
         Args:
             query: 搜索关键词
@@ -59,6 +176,45 @@ class BaseCrawler(ABC):
         Returns:
             电影数据列表
         """
+        movies = []
+        for url, params, page_limit in self.search_requests(query, limit):
+            response = self.fetch_search_page(url, params)
+            page = self.parse_search_response(response, page_limit) if response else []
+            movies.extend(page)
+            if len(page) < page_limit:
+                break
+        return movies[:limit]
+
+    @abstractmethod
+    def search_requests(self, query: str, limit: int) -> Iterator[Tuple[str, Dict[str, Any], int]]:
+        """
+        生成搜索请求，支持翻页的数据源每页一个请求
+
+        Args:
+            query: 搜索关键词
+            limit: 结果数量限制
+
+        Yields:
+            (URL, 请求参数, 该页最多返回的结果数)
+        """
+        pass
+
+    def fetch_search_page(self, url: str, params: Dict[str, Any]) -> Optional[requests.Response]:
+        """请求一页搜索结果（使用搜索结果的缓存有效期）"""
+        return self._request(url, params, ttl=self.search_cache_ttl)
+
+    @abstractmethod
+    def parse_search_response(self, response: requests.Response, limit: int) -> List[Dict[str, Any]]:
+        """
+        解析一页搜索结果
+
+        Args:
+            response: fetch_search_page 返回的响应
+            limit: 该页最多返回的结果数
+
+        Returns:
+            电影数据列表，解析失败时为空列表
+        """
         pass
 
     @abstractmethod
@@ -87,15 +243,17 @@ class BaseCrawler(ABC):
             raw_data: 原始数据
             
         Returns:
-            标准化后的数据
+            标准化后的数据（可直接传给 Database.upsert_movies_with_reviews）
         """
+        description = clean_text(raw_data.get('description'))
         return {
-            'title': raw_data.get('title', ''),
-            'year': raw_data.get('year'),
-            'description': raw_data.get('description'),
-            'poster_url': raw_data.get('poster_url'),
+            'title': clean_text(raw_data.get('title')),
+            'year': raw_data.get('year') or extract_year(description),
+            'description': description,
+            'poster_url': raw_data.get('poster_url') or '',
             'score': raw_data.get('score'),
             'votes': raw_data.get('votes'),
-            'url': raw_data.get('url'),
-            'popularity': raw_data.get('popularity', 0),
+            'url': raw_data.get('url') or '',
+            'popularity': raw_data.get('popularity') or 0,
+            'external_ids': raw_data.get('external_ids') or {},
         }
@@ -1,5 +1,6 @@
 # 豆瓣爬虫
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterator, Tuple
+import requests
 from bs4 import BeautifulSoup
 import re
 from .base_crawler import BaseCrawler
@@ -8,28 +9,48 @@ from .base_crawler import BaseCrawler
 class DoubanCrawler(BaseCrawler):
     """豆瓣电影爬虫"""
 
-    def __init__(self, delay: float = 2.0):
-        super().__init__(delay)
+    # 热门榜单变化较快，详情页评分每天更新
+    search_cache_ttl = 30 * 60
+    detail_cache_ttl = 12 * 3600
+
+    # 搜索接口每页最多请求的结果数，更多结果按 page_start 翻页
+    search_page_size = 100
+
+    # 详情页需要提取的元素
+    detail_targets = [
+        ('span', 'property', 'v:itemreviewed'),
+        ('span', 'class', 'year'),
+        ('strong', 'class', 'rating_num'),
+        ('span', 'property', 'v:votes'),
+        ('span', 'property', 'v:summary'),
+        ('img', 'rel', 'v:image'),
+        ('div', 'id', 'info'),
+    ]
+
+    def __init__(self, delay: float = 2.0, **kwargs):
+        super().__init__(delay, **kwargs)
         self.base_url = 'https://movie.douban.com'
         self.search_url = f'{self.base_url}/j/search_subjects'
 
-    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
-        """搜索豆瓣电影"""
-        params = {
-            'type': 'movie',
-            'tag': '热门',
-            'sort': 'recommendation',
-            'page_limit': limit,
-            'page_start': 0,
-        }
+    def search_requests(self, query: str, limit: int) -> Iterator[Tuple[str, Dict[str, Any], int]]:
+        """豆瓣搜索按 page_start 翻页"""
+        for start in range(0, limit, self.search_page_size):
+            page_limit = min(self.search_page_size, limit - start)
+            params = {
+                'type': 'movie',
+                'tag': '热门',
+                'sort': 'recommendation',
+                'page_limit': page_limit,
+                'page_start': start,
+            }
 
-        if query:
-            params['search_text'] = query
+            if query:
+                params['search_text'] = query
 
-        response = self._request(self.search_url, params)
-        if not response:
-            return []
+            yield self.search_url, params, page_limit
 
+    def parse_search_response(self, response: requests.Response, limit: int) -> List[Dict[str, Any]]:
+        """解析豆瓣搜索结果"""
         try:
             data = response.json()
             movies = []
@@ -48,14 +69,14 @@ class DoubanCrawler(BaseCrawler):
     def get_detail(self, movie_id: str) -> Optional[Dict[str, Any]]:
         """获取豆瓣电影详情"""
         url = f'{self.base_url}/subject/{movie_id}/'
-        response = self._request(url)
+        response = self._request(url, ttl=self.detail_cache_ttl)
 
         if not response:
             return None
 
         try:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            return self._parse_movie_detail(soup, movie_id)
+            return self._parse_cached(response, lambda: self._parse_movie_detail(
+                self._make_soup(response.text, self.detail_targets), movie_id))
         except Exception as e:
             print(f"解析豆瓣详情失败: {e}")
             return None
@@ -141,6 +162,14 @@ class DoubanCrawler(BaseCrawler):
             if poster_elem:
                 poster = poster_elem.get('src', '')
 
+            # IMDb 编号，用于和 IMDb 数据源的同一部电影关联
+            external_ids = {}
+            info_elem = soup.find('div', id='info')
+            if info_elem:
+                imdb_match = re.search(r'IMDb:\s*(tt\d+)', info_elem.get_text())
+                if imdb_match:
+                    external_ids['imdb'] = imdb_match.group(1)
+
             return {
                 'title': title,
                 'year': year,
@@ -150,6 +179,7 @@ class DoubanCrawler(BaseCrawler):
                 'votes': votes,
                 'url': f'{self.base_url}/subject/{movie_id}/',
                 'popularity': votes or 0,
+                'external_ids': external_ids,
             }
         except Exception as e:
             print(f"解析电影详情失败: {e}")
@@ -0,0 +1,100 @@
+# 并发爬取引擎
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Any, Tuple, Iterator
+from .base_crawler import BaseCrawler
+
+
+class CrawlEngine:
+    """
+    多数据源并发爬取引擎
+
+    每个数据源在独立线程中运行，限速由各爬虫按主机的令牌桶控制，
+    多源爬取的总耗时约等于最慢的单个数据源，而不是各数据源耗时之和。
+    """
+
+    def __init__(self, crawlers: Dict[str, BaseCrawler], max_workers: Optional[int] = None):
+        """
+        初始化爬取引擎
+
+        Args:
+            crawlers: 数据源名称到爬虫实例的映射
+            max_workers: 最大线程数，默认每个数据源一个线程
+        """
+        self.crawlers = crawlers
+        self.max_workers = max_workers or max(len(crawlers), 1)
+
+    def search_all(self, query: str, limit: int = 20,
+                   sources: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        在多个数据源上并发搜索
+
+        Args:
+            query: 搜索关键词
+            limit: 每个数据源的结果数量限制
+            sources: 要搜索的数据源，默认全部
+
+        Returns:
+            数据源名称到标准化电影数据列表的映射
+        """
+        return dict(self.iter_search(query, limit, sources))
+
+    def iter_search(self, query: str, limit: int = 20,
+                    sources: Optional[List[str]] = None) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        在多个数据源上并发搜索，按完成顺序逐个返回结果
+
+        Args:
+            query: 搜索关键词
+            limit: 每个数据源的结果数量限制
+            sources: 要搜索的数据源，默认全部
+
+        Yields:
+            (数据源名称, 标准化电影数据列表)
+        """
+        sources = sources or list(self.crawlers)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._search_one, source, query, limit): source
+                for source in sources if source in self.crawlers
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def get_details(self, targets: List[Tuple[str, str]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        并发获取多个电影详情
+
+        Args:
+            targets: (数据源名称, 电影ID) 列表
+
+        Returns:
+            与输入顺序一致的详情数据列表，失败的项为 None
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._detail_one, source, movie_id) for source, movie_id in targets]
+            return [future.result() for future in futures]
+
+    def _search_one(self, source: str, query: str, limit: int) -> List[Dict[str, Any]]:
+        """搜索单个数据源"""
+        crawler = self.crawlers[source]
+        start = time.perf_counter()
+        try:
+            results = [crawler.normalize_movie_data(item) for item in crawler.search(query, limit=limit)]
+        except Exception as e:
+            print(f"爬取 {source} 失败: {e}")
+            return []
+        print(f"{source}: {len(results)} 条数据，耗时 {time.perf_counter() - start:.1f}s")
+        return results
+
+    def _detail_one(self, source: str, movie_id: str) -> Optional[Dict[str, Any]]:
+        """获取单个电影详情"""
+        crawler = self.crawlers.get(source)
+        if not crawler:
+            return None
+        try:
+            detail = crawler.get_detail(movie_id)
+        except Exception as e:
+            print(f"获取 {source} 详情失败: {movie_id}, 错误: {e}")
+            return None
+        return crawler.normalize_movie_data(detail) if detail else None
@@ -0,0 +1,180 @@
+# 爬虫 HTTP 响应磁盘缓存
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Any
+from urllib.parse import urlencode
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+# 随缓存一起保存的响应头
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class CachedResponse:
+    """缓存中的一条响应"""
+
+    def __init__(self, key: str, url: str, status: int, headers: Dict[str, str], body: bytes,
+                 encoding: Optional[str], fetched_at: float):
+        self.key = key
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.encoding = encoding
+        self.fetched_at = fetched_at
+
+    def is_fresh(self, ttl: float) -> bool:
+        """是否仍在有效期内"""
+        return time.time() - self.fetched_at < ttl
+
+    def validators(self) -> Dict[str, str]:
+        """条件请求头（If-None-Match / If-Modified-Since）"""
+        headers = {}
+        if self.headers.get('ETag'):
+            headers['If-None-Match'] = self.headers['ETag']
+        if self.headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = self.headers['Last-Modified']
+        return headers
+
+    def to_response(self) -> requests.Response:
+        """还原为 requests.Response"""
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = self.body
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.url = self.url
+        response.encoding = self.encoding
+        response.cache_key = self.key
+        response.from_cache = True
+        return response
+
+
+class ResponseCache:
+    """
+    爬虫响应的磁盘缓存
+
+    按 URL 和参数缓存响应体，过期后用 ETag/Last-Modified 发起条件请求，
+    未变化的页面只需一次 304。总大小超过上限时按最近最少使用淘汰。
+    同一页面解析后的结果也会缓存，页面未变化时无需再次解析。
+    """
+
+    def __init__(self, cache_dir: str = '.crawler_cache', max_size_mb: float = 512):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_size_mb: 缓存总大小上限（MB）
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(cache_dir, 'http_cache.db'), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                encoding TEXT,
+                parsed TEXT,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)')
+        self._conn.commit()
+        self._total_size = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict] = None) -> str:
+        """根据 URL 和参数生成缓存键"""
+        if params:
+            url = f'{url}?{urlencode(sorted((str(k), str(v)) for k, v in params.items()))}'
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """读取缓存并更新访问时间"""
+        with self._lock:
+            row = self._conn.execute('''
+                SELECT url, status, headers, body, encoding, fetched_at FROM responses WHERE key = ?
+            ''', (key,)).fetchone()
+            if not row:
+                return None
+            self._conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+
+        url, status, headers, body, encoding, fetched_at = row
+        return CachedResponse(key, url, status, json.loads(headers), body, encoding, fetched_at)
+
+    def put(self, key: str, response: requests.Response):
+        """写入响应，超过容量上限时淘汰最久未访问的条目"""
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        body = response.content
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._conn.execute('''
+                INSERT OR REPLACE INTO responses
+                (key, url, status, headers, body, encoding, parsed, size, fetched_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?, ?)
+            ''', (key, response.url, response.status_code, json.dumps(headers), body,
+                  response.encoding, len(body), now, now))
+            self._total_size += len(body) - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+        response.cache_key = key
+        response.from_cache = False
+
+    def touch(self, key: str):
+        """服务器返回 304 时刷新获取时间"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE key = ?',
+                               (now, now, key))
+            self._conn.commit()
+
+    def get_parsed(self, key: str) -> Optional[Any]:
+        """读取页面解析结果"""
+        with self._lock:
+            row = self._conn.execute('SELECT parsed FROM responses WHERE key = ?', (key,)).fetchone()
+        if not row or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def put_parsed(self, key: str, parsed: Any):
+        """保存页面解析结果，页面内容更新时会被清空"""
+        with self._lock:
+            self._conn.execute('UPDATE responses SET parsed = ? WHERE key = ?',
+                               (json.dumps(parsed, ensure_ascii=False), key))
+            self._conn.commit()
+
+    def _evict(self):
+        """按最近最少使用淘汰，直到总大小不超过上限"""
+        while self._total_size > self.max_size:
+            rows = self._conn.execute('''
+                SELECT key, size FROM responses ORDER BY accessed_at LIMIT 100
+            ''').fetchall()
+            if not rows:
+                self._total_size = 0
+                return
+            for key, size in rows:
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._total_size -= size
+                if self._total_size <= self.max_size:
+                    return
+
+    def close(self):
+        """关闭缓存数据库"""
+        with self._lock:
+            self._conn.close()
@@ -1,5 +1,6 @@
 # IMDb爬虫
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterator, Tuple
+import requests
 from bs4 import BeautifulSoup
 import re
 from .base_crawler import BaseCrawler
@@ -8,25 +9,41 @@ from .base_crawler import BaseCrawler
 class IMDBCrawler(BaseCrawler):
     """IMDb电影爬虫"""
 
-    def __init__(self, delay: float = 2.0):
-        super().__init__(delay)
+    # 搜索结果相对稳定，详情页评分每天更新
+    search_cache_ttl = 6 * 3600
+    detail_cache_ttl = 24 * 3600
+
+    # 搜索结果页和详情页需要提取的元素
+    search_targets = [
+        ('div', 'class', 'findSection'),
+    ]
+    detail_targets = [
+        ('h1', 'data-testid', 'hero-title-block__title'),
+        ('span', 'class', 'sc-b0691f29-8b76-451a-9d8e-6c7f0e29f8f'),
+        ('span', 'data-testid', 'hero-rating-bar__aggregate-rating__score'),
+        ('div', 'data-testid', 'hero-rating-bar__aggregate-rating__count'),
+        ('span', 'data-testid', 'plot-xl'),
+        ('img', 'data-testid', 'hero-media__poster'),
+    ]
+
+    def __init__(self, delay: float = 2.0, **kwargs):
+        super().__init__(delay, **kwargs)
         self.base_url = 'https://www.imdb.com'
         self.search_url = f'{self.base_url}/find'
 
-    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
-        """搜索IMDb电影"""
+    def search_requests(self, query: str, limit: int) -> Iterator[Tuple[str, Dict[str, Any], int]]:
+        """IMDb 搜索只有一页结果"""
         params = {
             'q': query,
             's': 'all',
             'ref_': 'nv_sr_sm',
         }
+        yield self.search_url, params, limit
 
-        response = self._request(self.search_url, params)
-        if not response:
-            return []
-
+    def parse_search_response(self, response: requests.Response, limit: int) -> List[Dict[str, Any]]:
+        """解析IMDb搜索结果"""
         try:
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = self._make_soup(response.text, self.search_targets)
             movies = []
 
             # 查找电影列表
@@ -46,14 +63,14 @@ class IMDBCrawler(BaseCrawler):
     def get_detail(self, movie_id: str) -> Optional[Dict[str, Any]]:
         """获取IMDb电影详情"""
         url = f'{self.base_url}/title/{movie_id}/'
-        response = self._request(url)
+        response = self._request(url, ttl=self.detail_cache_ttl)
 
         if not response:
             return None
 
         try:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            return self._parse_movie_detail(soup, movie_id)
+            return self._parse_cached(response, lambda: self._parse_movie_detail(
+                self._make_soup(response.text, self.detail_targets), movie_id))
         except Exception as e:
             print(f"解析IMDb详情失败: {e}")
             return None
@@ -0,0 +1,75 @@
+# HTML 解析后端
+from typing import List, Optional, Tuple
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# 可选的解析后端：auto 在安装了 lxml 时使用 lxml，否则使用标准库 html.parser
+PARSER_BACKENDS = ('auto', 'lxml', 'html.parser')
+
+# 定向提取目标：(标签名, 属性名, 属性值)，属性名为空时只匹配标签名，
+# 属性值按空白分词匹配（适用于 class 等多值属性）
+Target = Tuple[str, Optional[str], Optional[str]]
+
+
+def resolve_parser(parser: str = 'auto') -> str:
+    """
+    解析后端名称
+
+    Args:
+        parser: auto/lxml/html.parser
+
+    Returns:
+        BeautifulSoup 使用的解析器名称
+    """
+    if parser not in PARSER_BACKENDS:
+        raise ValueError(f'未知的解析后端: {parser}')
+    if parser == 'html.parser' or not HAS_LXML:
+        return 'html.parser'
+    return 'lxml'
+
+
+def build_strainer(targets: List[Target]) -> SoupStrainer:
+    """
+    根据提取目标构造 SoupStrainer，解析时只保留目标元素及其子节点
+
+    Args:
+        targets: 提取目标列表
+    """
+    def match(name, attrs):
+        if not isinstance(name, str):
+            return False
+        for tag, attr, value in targets:
+            if name != tag:
+                continue
+            if attr is None:
+                return True
+            attr_value = attrs.get(attr) if attrs else None
+            if isinstance(attr_value, list):
+                attr_value = ' '.join(attr_value)
+            if attr_value and value in attr_value.split():
+                return True
+        return False
+
+    return SoupStrainer(match)
+
+
+def make_soup(markup: str, parser: str = 'auto',
+              targets: Optional[List[Target]] = None) -> BeautifulSoup:
+    """
+    构造 BeautifulSoup 对象
+
+    Args:
+        markup: HTML 文本
+        parser: 解析后端
+        targets: 提取目标，给出时只构建这些元素的子树，不构建整页 DOM
+
+    Returns:
+        BeautifulSoup 对象
+    """
+    parse_only = build_strainer(targets) if targets else None
+    return BeautifulSoup(markup, resolve_parser(parser), parse_only=parse_only)
@@ -0,0 +1,373 @@
+# 流式爬取流水线：抓取 → 解析 → 标准化 → 去重 → 批量写入
+import queue
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from .base_crawler import BaseCrawler
+
+
+# 队列结束标记
+_DONE = object()
+
+
+class Stage:
+    """
+    流水线阶段
+
+    处理函数接收一个数据项（batch_size > 0 时接收一批），返回零个或多个输出（可迭代对象或 None）。
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Optional[Iterable[Any]]],
+                 workers: int = 1, batch_size: int = 0):
+        """
+        Args:
+            name: 阶段名称（用于吞吐量统计）
+            fn: 处理函数
+            workers: 工作线程数
+            batch_size: 大于 0 时每攒够这么多数据项调用一次处理函数，输入结束时处理剩余部分
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = max(workers, 1)
+        self.batch_size = batch_size
+
+
+class StageStats:
+    """阶段吞吐量统计"""
+
+    def __init__(self):
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典，per_second 为阶段从收到第一个数据项到结束期间的平均吞吐量"""
+        elapsed = (self.finished_at - self.started_at) if self.started_at and self.finished_at else 0.0
+        return {
+            'in': self.items_in,
+            'out': self.items_out,
+            'errors': self.errors,
+            'busy_seconds': round(self.busy, 3),
+            'elapsed_seconds': round(elapsed, 3),
+            'per_second': round(self.items_in / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+class Pipeline:
+    """
+    多阶段流水线
+
+    各阶段在独立的线程中运行，阶段之间用有界队列连接：下游处理不过来时上游阻塞（背压），
+    任意时刻在途的数据项数量不超过各队列容量之和，内存占用与数据总量无关。
+    网络请求、HTML 解析和数据库写入因此可以相互重叠。
+    最后一个阶段的第一个工作线程就是调用 run 的线程（输入改由单独的线程读取），
+    数据库写入复用调用线程已有的连接，每次运行不会在新线程中新建连接。
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 64):
+        """
+        Args:
+            stages: 按顺序排列的阶段
+            queue_size: 每个阶段输入队列的容量
+        """
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats = {stage.name: StageStats() for stage in stages}
+
+    def run(self, items: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        运行流水线直到所有数据项处理完毕
+
+        Args:
+            items: 输入数据项（可以是生成器，按需读取）
+
+        Returns:
+            各阶段的吞吐量统计
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+        threads = []
+        last = len(self.stages) - 1
+
+        for index, stage in enumerate(self.stages):
+            for worker in range(stage.workers):
+                if index == last and worker == 0:
+                    continue
+                thread = threading.Thread(
+                    target=self._worker, args=(index, queues, remaining, remaining_lock),
+                    name=f'pipeline-{stage.name}-{worker}', daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        feeder = threading.Thread(target=self._feed, args=(items, queues[0]), name='pipeline-input', daemon=True)
+        feeder.start()
+        try:
+            self._worker(last, queues, remaining, remaining_lock)
+        finally:
+            feeder.join()
+            for thread in threads:
+                thread.join()
+
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+    def _feed(self, items: Iterable[Any], first: queue.Queue):
+        """输入线程：把输入数据项放入第一个阶段的队列，结束（或读取输入出错）后通知第一个阶段"""
+        try:
+            for item in items:
+                first.put(item)
+        except Exception as e:
+            print(f"流水线输入失败: {e}")
+        finally:
+            for _ in range(self.stages[0].workers):
+                first.put(_DONE)
+
+    def _worker(self, index: int, queues: List[queue.Queue], remaining: List[int],
+                remaining_lock: threading.Lock):
+        """阶段工作线程：处理输入直到收到结束标记，最后一个退出的线程通知下游阶段"""
+        stage = self.stages[index]
+        stats = self.stats[stage.name]
+        output = queues[index + 1] if index + 1 < len(queues) else None
+        batch = []
+
+        while True:
+            item = queues[index].get()
+            if item is _DONE:
+                break
+            with stats.lock:
+                stats.items_in += 1
+                if stats.started_at is None:
+                    stats.started_at = time.perf_counter()
+            if stage.batch_size:
+                batch.append(item)
+                if len(batch) >= stage.batch_size:
+                    self._process(stage, stats, batch, output)
+                    batch = []
+            else:
+                self._process(stage, stats, item, output)
+
+        if batch:
+            self._process(stage, stats, batch, output)
+
+        with remaining_lock:
+            remaining[index] -= 1
+            last = remaining[index] == 0
+        if last:
+            with stats.lock:
+                stats.finished_at = time.perf_counter()
+            if output is not None:
+                for _ in range(self.stages[index + 1].workers):
+                    output.put(_DONE)
+
+    @staticmethod
+    def _process(stage: Stage, stats: StageStats, item: Any, output: Optional[queue.Queue]):
+        """调用处理函数并把输出放入下游队列，单个数据项出错不影响其他数据项"""
+        start = time.perf_counter()
+        try:
+            results = list(stage.fn(item) or ())
+        except Exception as e:
+            print(f"流水线阶段 {stage.name} 处理失败: {e}")
+            with stats.lock:
+                stats.errors += 1
+                stats.busy += time.perf_counter() - start
+            return
+
+        with stats.lock:
+            stats.items_out += len(results)
+            stats.busy += time.perf_counter() - start
+        if output is not None:
+            for result in results:
+                output.put(result)
+
+
+class CrawlPipeline:
+    """
+    搜索爬取流水线
+
+    fetch（按页请求搜索结果）→ parse（解析页面）→ normalize（normalize_movie_data 清洗）
+    → dedupe（去掉最近出现过的重复数据项，并按数量限制截断）→ write（按批写入数据库）。
+    多个数据源的分页请求交错进入流水线，各数据源的请求由各自主机的限速器控制。
+    """
+
+    def __init__(self, crawlers: Dict[str, BaseCrawler], write: Callable[[str, List[Dict[str, Any]]], int],
+                 fetch_workers: int = 4, parse_workers: int = 2, batch_size: int = 200,
+                 queue_size: int = 64, dedupe_window: int = 10000,
+                 on_batch: Optional[Callable[[int, int, int], None]] = None):
+        """
+        Args:
+            crawlers: 数据源名称到爬虫实例的映射
+            write: 写入函数，接收 (数据源, 标准化数据列表)，返回保存成功的数量
+            fetch_workers: 抓取线程数
+            parse_workers: 解析线程数
+            batch_size: 每次写入的数据项数量（一个事务）
+            queue_size: 阶段之间的队列容量
+            dedupe_window: 去重时记住的最近数据项数量。翻页时榜单变化造成的重复通常只出现在相邻几页，
+                           更早的重复由数据库 upsert 合并，窗口有界使内存占用不随爬取数量增长
+            on_batch: 每批写入后、以及每个数据源全部处理完时的回调，参数为累计 (爬取数量, 保存数量, 完成的数据源数量)
+        """
+        self.crawlers = crawlers
+        self.write = write
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.dedupe_window = dedupe_window
+        self.on_batch = on_batch
+
+    def run(self, query: str = '', limit: int = 20,
+            sources: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        爬取并写入
+
+        Args:
+            query: 搜索关键词
+            limit: 每个数据源的爬取数量
+            sources: 要爬取的数据源，默认全部
+
+        Returns:
+            total（爬取数量）、saved（保存数量）、by_source（各数据源的两项数量）和 stages（各阶段吞吐量）
+        """
+        sources = [source for source in (sources or list(self.crawlers)) if source in self.crawlers]
+        # 已经没有更多结果的数据源（某一页结果不足一页），不再请求后续页
+        exhausted: Set[str] = set()
+        recent: 'OrderedDict[Tuple[str, str], None]' = OrderedDict()
+        kept = {source: 0 for source in sources}
+        by_source = {source: {'total': 0, 'saved': 0} for source in sources}
+        totals = {'total': 0, 'saved': 0}
+
+        # 各数据源在途的数据项（请求、页面、条目）数量；请求已全部发出且在途数量归零时该数据源处理完毕
+        in_flight = {source: 0 for source in sources}
+        issued: Set[str] = set()
+        finished: Set[str] = set()
+        progress_lock = threading.Lock()
+
+        def report():
+            if self.on_batch:
+                self.on_batch(totals['total'], totals['saved'], len(finished))
+
+        def settle(source: str, delta: int):
+            with progress_lock:
+                in_flight[source] += delta
+                if source in finished or source not in issued or in_flight[source]:
+                    return
+                finished.add(source)
+            report()
+
+        def tracked(fn):
+            """包装单个数据项的处理函数：输出替换输入计入在途数量，出错时输入视为处理完毕"""
+            def wrapper(entry):
+                try:
+                    results = list(fn(entry) or ())
+                except Exception:
+                    settle(entry[0], -1)
+                    raise
+                settle(entry[0], len(results) - 1)
+                return results
+            return wrapper
+
+        def fetch(request):
+            source, url, params, page_limit = request
+            if source in exhausted:
+                return None
+            response = self.crawlers[source].fetch_search_page(url, params)
+            if response is None:
+                exhausted.add(source)
+                return None
+            return [(source, response, page_limit)]
+
+        def parse(page):
+            source, response, page_limit = page
+            items = self.crawlers[source].parse_search_response(response, page_limit)
+            if len(items) < page_limit:
+                exhausted.add(source)
+            return [(source, item) for item in items]
+
+        def normalize(entry):
+            source, item = entry
+            data = self.crawlers[source].normalize_movie_data(item)
+            return [(source, data)] if data['title'] else None
+
+        def dedupe(entry):
+            source, data = entry
+            key = (source, data['url'] or data['title'])
+            if key in recent or kept[source] >= limit:
+                return None
+            recent[key] = None
+            if len(recent) > self.dedupe_window:
+                recent.popitem(last=False)
+            kept[source] += 1
+            return [entry]
+
+        def write(batch):
+            grouped: Dict[str, List[Dict[str, Any]]] = {}
+            for source, data in batch:
+                grouped.setdefault(source, []).append(data)
+            try:
+                for source, movies_data in grouped.items():
+                    saved = self.write(source, movies_data)
+                    by_source[source]['total'] += len(movies_data)
+                    by_source[source]['saved'] += saved
+                    totals['total'] += len(movies_data)
+                    totals['saved'] += saved
+            finally:
+                for source, movies_data in grouped.items():
+                    settle(source, -len(movies_data))
+            report()
+            return None
+
+        def requests():
+            for request in self._interleave_requests(query, limit, sources, exhausted, on_issued):
+                settle(request[0], 1)
+                yield request
+
+        def on_issued(source: str):
+            with progress_lock:
+                issued.add(source)
+            settle(source, 0)
+
+        pipeline = Pipeline([
+            Stage('fetch', tracked(fetch), workers=self.fetch_workers),
+            Stage('parse', tracked(parse), workers=self.parse_workers),
+            Stage('normalize', tracked(normalize)),
+            Stage('dedupe', tracked(dedupe)),
+            Stage('write', write, batch_size=self.batch_size),
+        ], queue_size=self.queue_size)
+
+        stages = pipeline.run(requests())
+        return {**totals, 'by_source': by_source, 'stages': stages}
+
+    def _interleave_requests(self, query: str, limit: int, sources: List[str], exhausted: Set[str],
+                             on_issued: Optional[Callable[[str], None]] = None
+                             ) -> Iterator[Tuple[str, str, Dict[str, Any], int]]:
+        """
+        轮流生成各数据源的分页请求，跳过已经没有更多结果的数据源
+
+        某个数据源不再生成请求（请求生成器结束或已经没有更多结果）时调用 on_issued(数据源)。
+        """
+        pending = [(source, self.crawlers[source].search_requests(query, limit)) for source in sources]
+        while pending:
+            active = []
+            for source, requests in pending:
+                request = None if source in exhausted else next(requests, None)
+                if request is None:
+                    if on_issued:
+                        on_issued(source)
+                    continue
+                url, params, page_limit = request
+                yield source, url, params, page_limit
+                active.append((source, requests))
+            pending = active
+
+
+def format_stage_stats(stages: Dict[str, Dict[str, Any]]) -> str:
+    """格式化各阶段吞吐量，用于打印"""
+    lines = [f"{'阶段':<10} {'输入':>8} {'输出':>8} {'错误':>6} {'忙碌':>8} {'耗时':>8} {'每秒':>10}"]
+    for name, stats in stages.items():
+        lines.append(f"{name:<10} {stats['in']:>8} {stats['out']:>8} {stats['errors']:>6} "
+                     f"{stats['busy_seconds']:>7.1f}s {stats['elapsed_seconds']:>7.1f}s {stats['per_second']:>10.1f}")
+    return '\n'.join(lines)
@@ -0,0 +1,83 @@
+# 请求限速器
+import threading
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """令牌桶限速器"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量，即允许的突发请求数
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """
+        获取令牌，令牌不足时阻塞等待
+
+        Args:
+            tokens: 需要的令牌数
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """按主机分别限速，不同主机之间互不影响"""
+
+    def __init__(self, default_rate: float = 0.5, capacity: float = 1.0):
+        """
+        初始化限速器
+
+        Args:
+            default_rate: 默认每秒请求数
+            capacity: 默认突发请求数
+        """
+        self.default_rate = default_rate
+        self.capacity = capacity
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def set_rate(self, host: str, rate: float, capacity: Optional[float] = None):
+        """设置指定主机的速率"""
+        with self._lock:
+            self._buckets[host] = TokenBucket(rate, capacity or self.capacity)
+
+    def acquire(self, host: str, rate: Optional[float] = None):
+        """
+        获取指定主机的请求许可
+
+        Args:
+            host: 主机名
+            rate: 首次访问该主机时使用的速率，默认使用 default_rate
+        """
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(host)
+                if bucket is None:
+                    bucket = TokenBucket(rate or self.default_rate, self.capacity)
+                    self._buckets[host] = bucket
+        bucket.acquire()
+
+
+# 进程内共享的限速器，同一主机的所有爬虫实例共用一个令牌桶
+default_rate_limiter = HostRateLimiter()
@@ -1,5 +1,6 @@
 # 烂番茄爬虫
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterator, Tuple
+import requests
 from bs4 import BeautifulSoup
 import re
 from .base_crawler import BaseCrawler
@@ -8,12 +9,26 @@ from .base_crawler import BaseCrawler
 class RottenTomatoesCrawler(BaseCrawler):
     """烂番茄电影爬虫"""
 
-    def __init__(self, delay: float = 2.0):
-        super().__init__(delay)
+    # 新片影评数增长较快
+    search_cache_ttl = 3600
+    detail_cache_ttl = 12 * 3600
+
+    # 详情页需要提取的元素
+    detail_targets = [
+        ('h1', 'slot', 'title'),
+        ('p', 'slot', 'releaseYear'),
+        ('score-board-deprecated', None, None),
+        ('span', 'slot', 'count'),
+        ('p', 'slot', 'description'),
+        ('img', 'slot', 'posterImage'),
+    ]
+
+    def __init__(self, delay: float = 2.0, **kwargs):
+        super().__init__(delay, **kwargs)
         self.base_url = 'https://www.rottentomatoes.com'
 
-    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
-        """搜索烂番茄电影"""
+    def search_requests(self, query: str, limit: int) -> Iterator[Tuple[str, Dict[str, Any], int]]:
+        """烂番茄搜索一次返回全部结果"""
         # 烂番茄搜索API（简化版）
         search_url = f'{self.base_url}/api/private/v2.0/search'
 
@@ -22,11 +37,10 @@ class RottenTomatoesCrawler(BaseCrawler):
             'limit': limit,
             'type': 'movie',
         }
+        yield search_url, params, limit
 
-        response = self._request(search_url, params)
-        if not response:
-            return []
-
+    def parse_search_response(self, response: requests.Response, limit: int) -> List[Dict[str, Any]]:
+        """解析烂番茄搜索结果"""
         try:
             data = response.json()
             movies = []
@@ -45,14 +59,14 @@ class RottenTomatoesCrawler(BaseCrawler):
     def get_detail(self, movie_id: str) -> Optional[Dict[str, Any]]:
         """获取烂番茄电影详情"""
         url = f'{self.base_url}/m/{movie_id}'
-        response = self._request(url)
+        response = self._request(url, ttl=self.detail_cache_ttl)
 
         if not response:
             return None
 
         try:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            return self._parse_movie_detail(soup, movie_id)
+            return self._parse_cached(response, lambda: self._parse_movie_detail(
+                self._make_soup(response.text, self.detail_targets), movie_id))
         except Exception as e:
             print(f"解析烂番茄详情失败: {e}")
             return None
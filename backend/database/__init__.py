@@ -1,5 +1,5 @@
 # 数据库模块初始化
 from .db import Database
-from .models import Movie, Review
+from .models import Movie, Review, CrawlJob
 
-__all__ = ['Database', 'Movie', 'Review']
+__all__ = ['Database', 'Movie', 'Review', 'CrawlJob']
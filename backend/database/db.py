@@ -1,27 +1,270 @@
 # 数据库操作模块
+import base64
+import json
+import os
 import sqlite3
-from typing import List, Optional, Dict, Any
+import threading
+import weakref
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Iterator
 from contextlib import contextmanager
-from datetime import datetime
-from .models import Movie, Review, MovieWithReviews
+from datetime import datetime, timedelta
+from .models import Movie, Review, MovieWithReviews, CrawlJob, format_timestamp
+from .matching import BatchMatcher, cluster_duplicates, collect_keys, extract_external_ids, normalize_title
+
+
+# 电影 upsert：冲突时原地更新，保持主键不变；空值不覆盖其他数据源已写入的字段
+MOVIE_UPSERT_SQL = '''
+    INSERT INTO movies (title, year, description, poster_url, updated_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(title) DO UPDATE SET
+        year = COALESCE(excluded.year, movies.year),
+        description = COALESCE(NULLIF(excluded.description, ''), movies.description),
+        poster_url = COALESCE(NULLIF(excluded.poster_url, ''), movies.poster_url),
+        updated_at = excluded.updated_at
+'''
+
+# 变更检测：内容没有变化时跳过写入
+MOVIE_CHANGED_SQL = '''
+    WHERE movies.year IS NOT COALESCE(excluded.year, movies.year)
+       OR movies.description IS NOT COALESCE(NULLIF(excluded.description, ''), movies.description)
+       OR movies.poster_url IS NOT COALESCE(NULLIF(excluded.poster_url, ''), movies.poster_url)
+'''
+
+# 影评 upsert：同一电影同一数据源只保留一条记录
+REVIEW_UPSERT_SQL = '''
+    INSERT INTO reviews (movie_id, source, score, votes, url, popularity, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(movie_id, source) DO UPDATE SET
+        score = COALESCE(excluded.score, reviews.score),
+        votes = COALESCE(excluded.votes, reviews.votes),
+        url = COALESCE(NULLIF(excluded.url, ''), reviews.url),
+        popularity = COALESCE(NULLIF(excluded.popularity, 0), reviews.popularity),
+        updated_at = excluded.updated_at
+'''
+
+# 按ID补全跨数据源匹配到的电影：只填充缺失的字段，避免不同数据源的年份、简介来回覆盖
+MOVIE_FILL_SQL = '''
+    UPDATE movies SET
+        year = COALESCE(year, ?1),
+        description = COALESCE(NULLIF(description, ''), NULLIF(?2, ''), description),
+        poster_url = COALESCE(NULLIF(poster_url, ''), NULLIF(?3, ''), poster_url),
+        updated_at = ?4
+    WHERE id = ?5
+'''
+
+MOVIE_FILL_CHANGED_SQL = '''
+    AND ((year IS NULL AND ?1 IS NOT NULL)
+         OR (COALESCE(description, '') = '' AND COALESCE(?2, '') != '')
+         OR (COALESCE(poster_url, '') = '' AND COALESCE(?3, '') != ''))
+'''
+
+REVIEW_CHANGED_SQL = '''
+    WHERE reviews.score IS NOT COALESCE(excluded.score, reviews.score)
+       OR reviews.votes IS NOT COALESCE(excluded.votes, reviews.votes)
+       OR reviews.url IS NOT COALESCE(NULLIF(excluded.url, ''), reviews.url)
+       OR reviews.popularity IS NOT COALESCE(NULLIF(excluded.popularity, 0), reviews.popularity)
+'''
+
+
+# 把新的标题键的原始标题追加到电影的别名（与电影标题相同或已有的别名跳过），用于 movie_aliases 的触发器
+ALIAS_APPEND_SQL = '''
+    UPDATE movies SET aliases = COALESCE(aliases || char(10), '') || new.title
+    WHERE id = new.movie_id AND title != new.title
+      AND instr(char(10) || COALESCE(aliases, '') || char(10), char(10) || new.title || char(10)) = 0;
+'''
+
+
+# 当前 Unix 时间戳（秒），用于触发器和 SQL 中的时间计算
+UNIX_NOW_SQL = "((julianday('now') - 2440587.5) * 86400)"
+
+# 排序方式对应的 movie_stats 排序键（均有对应的降序索引）
+# 没有评分的电影 avg_score、composite_score 为 NULL，用 -1 代替，使排序键非空，游标分页可以直接在索引上定位
+SORT_COLUMNS = {
+    'popularity': 's.popularity',
+    'score': 'COALESCE(s.avg_score, -1)',
+    'votes': 's.votes',
+    'composite': 'COALESCE(s.composite_score, -1)',
+}
+
+
+def encode_cursor(sort_by: str, value: Any, movie_id: int) -> str:
+    """
+    把排序键编码为不透明的分页游标
+
+    Args:
+        sort_by: 排序方式
+        value: 最后一条结果的排序列值
+        movie_id: 最后一条结果的电影ID
+
+    Returns:
+        URL 安全的游标字符串
+    """
+    raw = json.dumps([sort_by, value, movie_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_by: str) -> Tuple[Any, int]:
+    """
+    解析分页游标
+
+    Args:
+        cursor: encode_cursor 生成的游标
+        sort_by: 当前请求的排序方式，必须与生成游标时一致
+
+    Returns:
+        (排序列值, 电影ID)
+
+    Raises:
+        ValueError: 游标无效或与排序方式不匹配
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort_by, value, movie_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('无效的分页游标')
+    if cursor_sort_by != sort_by or not isinstance(movie_id, int) or not isinstance(value, (int, float)):
+        raise ValueError('无效的分页游标')
+    return value, movie_id
+
+
+class _PooledConnection:
+    """
+    线程本地的连接
+
+    只由创建它的线程的线程本地存储引用，线程结束时随线程本地存储一起回收，由 finalizer 关闭连接；
+    连接池只保留弱引用，短生命周期的线程（每个请求一个线程的开发服务器、每次爬取的流水线线程）
+    不会遗留连接和文件句柄。
+    """
+
+    __slots__ = ('conn', 'depth', 'finalizer', '__weakref__')
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.depth = 0
+        self.finalizer = weakref.finalize(self, conn.close)
 
 
 class Database:
     """数据库操作类"""
 
-    def __init__(self, db_path: str = 'movies.db'):
+    def __init__(self, db_path: str = 'movies.db', pooled: bool = True,
+                 journal_mode: str = 'WAL', synchronous: str = 'NORMAL',
+                 cache_size_kb: int = 64 * 1024, mmap_size: int = 256 * 1024 * 1024,
+                 busy_timeout_ms: int = 5000):
+        """
+        初始化数据库
+
+        Args:
+            db_path: 数据库文件路径
+            pooled: 是否在线程内复用连接，False 时每次操作新建连接
+            journal_mode: 日志模式，默认 WAL（写入不阻塞读取）
+            synchronous: 同步级别，WAL 模式下 NORMAL 即可保证数据库不损坏
+            cache_size_kb: 每个连接的页缓存大小（KB）
+            mmap_size: 内存映射读取的最大字节数，0 表示关闭
+            busy_timeout_ms: 等待写锁的超时时间（毫秒）
+        """
         self.db_path = db_path
+        self.pooled = pooled
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+
+        # 线程本地连接池（只保留弱引用，见 _PooledConnection），记录创建连接的进程，fork 出的子进程不能复用父进程的连接
+        self._local = threading.local()
+        self._connections: 'weakref.WeakSet[_PooledConnection]' = weakref.WeakSet()
+        self._pool_lock = threading.Lock()
+        self._pid = os.getpid()
+
+        # 本进程内提交的数据写入次数，用于判断写入代数是否需要重新读取
+        self._write_count = 0
+
         self.init_database()
 
+    def _connect(self) -> sqlite3.Connection:
+        """创建新连接并应用 PRAGMA 配置"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=not self.pooled,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f'PRAGMA journal_mode = {self.journal_mode}')
+        conn.execute(f'PRAGMA synchronous = {self.synchronous}')
+        conn.execute(f'PRAGMA cache_size = {-int(self.cache_size_kb)}')
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        return conn
+
     @contextmanager
     def get_connection(self):
-        """获取数据库连接"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """获取数据库连接（同一线程内复用同一个连接）"""
+        if not self.pooled:
+            conn = self._connect()
+            try:
+                yield conn
+            finally:
+                conn.close()
+            return
+
+        if self._pid != os.getpid():
+            self.reset_after_fork()
+
+        pooled = getattr(self._local, 'pooled', None)
+        if pooled is None:
+            pooled = _PooledConnection(self._connect())
+            self._local.pooled = pooled
+            with self._pool_lock:
+                self._connections.add(pooled)
+        conn = pooled.conn
+
+        pooled.depth += 1
         try:
             yield conn
+        except Exception:
+            conn.rollback()
+            raise
         finally:
-            conn.close()
+            pooled.depth -= 1
+            # 最外层退出时不允许遗留未提交的事务，避免长期占用写锁
+            if pooled.depth == 0 and conn.in_transaction:
+                conn.rollback()
+
+    def connection_count(self) -> int:
+        """当前打开的线程本地连接数量（已结束的线程的连接已经关闭，不计入）"""
+        with self._pool_lock:
+            return sum(1 for pooled in self._connections if pooled.finalizer.alive)
+
+    def close(self):
+        """关闭连接池中的所有连接"""
+        with self._pool_lock:
+            connections, self._connections = list(self._connections), weakref.WeakSet()
+        for pooled in connections:
+            try:
+                pooled.finalizer()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    def reset_after_fork(self):
+        """
+        在 fork 出的子进程中丢弃继承自父进程的连接
+
+        SQLite 连接不能跨 fork 使用；在子进程中关闭它们会触发检查点等文件操作，
+        因此只保留引用（避免被垃圾回收时关闭），之后每个线程在首次访问时重新建立连接。
+        get_connection 检测到进程号变化时会自动调用，也可以在服务器的 post_fork 钩子中显式调用。
+        """
+        inherited = list(self._connections)
+        for pooled in inherited:
+            pooled.finalizer.detach()
+        self._inherited_connections = (getattr(self, '_inherited_connections', [])
+                                       + [pooled.conn for pooled in inherited])
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()
+        self._pool_lock = threading.Lock()
+        self._pid = os.getpid()
 
     def init_database(self):
         """初始化数据库表"""
@@ -36,10 +279,15 @@ class Database:
                     year INTEGER,
                     description TEXT,
                     poster_url TEXT,
+                    aliases TEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            # aliases 为合并进来的其他数据源标题（换行分隔），由 movie_aliases 的触发器维护，旧数据库补充该列
+            cursor.execute('PRAGMA table_info(movies)')
+            if 'aliases' not in [row[1] for row in cursor.fetchall()]:
+                cursor.execute('ALTER TABLE movies ADD COLUMN aliases TEXT')
 
             # 创建 reviews 表
             cursor.execute('''
@@ -68,264 +316,1821 @@ class Database:
                 CREATE INDEX IF NOT EXISTS idx_popularity ON reviews(popularity)
             ''')
 
+            # 创建元数据表，generation 为数据写入代数，供查询缓存和 ETag 判断数据是否变化
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0)")
+
+            # 创建爬取任务队列表
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source TEXT NOT NULL,
+                    query TEXT NOT NULL DEFAULT '',
+                    limit_count INTEGER NOT NULL DEFAULT 20,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    sources_total INTEGER NOT NULL DEFAULT 0,
+                    sources_done INTEGER NOT NULL DEFAULT 0,
+                    total INTEGER NOT NULL DEFAULT 0,
+                    saved INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_crawl_jobs_status ON crawl_jobs(status, id)
+            ''')
+
+            # 创建聚合统计表
+            self._init_movie_stats(cursor)
+
+            # 创建跨数据源匹配索引
+            self._init_match_index(cursor)
+
+            # 创建复查调度表
+            self._init_crawl_schedule(cursor)
+
+            # 创建电影变更日志（搜索建议索引和综合评分增量同步）
+            self._init_movie_changes(cursor)
+
+            # 创建综合评分参数表
+            self._init_scoring(cursor)
+
+            # 创建热度快照和趋势表
+            self._init_trending(cursor)
+
+            # 创建全文检索索引
+            self.fts_enabled = self._init_fts(cursor)
+
+            # 上次延迟触发器的批量导入中途退出（进程被杀死），触发器已在上面重建，补算期间漏掉的派生数据
+            cursor.execute("SELECT 1 FROM meta WHERE key = 'bulk_load_in_progress'")
+            if cursor.fetchone():
+                print("上次批量导入没有正常结束，重建统计表和全文索引...")
+                changes_before = conn.total_changes
+                # 全文索引先与电影表一致，补全别名时由触发器增量更新
+                if self.fts_enabled:
+                    cursor.execute("INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')")
+                self._rebuild_movie_aliases(cursor)
+                self._finish_bulk_load(cursor)
+                self._commit_data_change(conn, changes_before)
+
             conn.commit()
 
-    def insert_movie(self, movie: Movie) -> int:
-        """插入电影"""
+    def _init_movie_stats(self, cursor: sqlite3.Cursor):
+        """
+        创建每部电影的聚合统计表
+
+        movie_stats 由触发器随 reviews 的增删改增量维护，
+        热度排行和排序搜索可以直接按索引顺序读取前 N 条，无需对全表 GROUP BY。
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movie_stats'")
+        exists = cursor.fetchone() is not None
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS movie_stats (
+                movie_id INTEGER PRIMARY KEY,
+                review_count INTEGER NOT NULL DEFAULT 0,
+                score_sum REAL NOT NULL DEFAULT 0,
+                score_count INTEGER NOT NULL DEFAULT 0,
+                avg_score REAL,
+                popularity INTEGER NOT NULL DEFAULT 0,
+                votes INTEGER NOT NULL DEFAULT 0,
+                composite_score REAL,
+                FOREIGN KEY(movie_id) REFERENCES movies(id)
+            )
+        ''')
+        # 综合评分列由评分引擎（scoring.ScoreEngine）写入，旧数据库补充该列
+        cursor.execute('PRAGMA table_info(movie_stats)')
+        if 'composite_score' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute('ALTER TABLE movie_stats ADD COLUMN composite_score REAL')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_stats_popularity ON movie_stats(popularity DESC, movie_id DESC)
+        ''')
+        cursor.execute('DROP INDEX IF EXISTS idx_stats_avg_score')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_stats_score_key
+            ON movie_stats(COALESCE(avg_score, -1) DESC, movie_id DESC)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_stats_votes ON movie_stats(votes DESC, movie_id DESC)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_stats_composite
+            ON movie_stats(COALESCE(composite_score, -1) DESC, movie_id DESC)
+        ''')
+
+        # 电影的增删同步统计行，保证没有影评的电影也能被排序读取到
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS movie_stats_movie_ai AFTER INSERT ON movies BEGIN
+                INSERT INTO movie_stats (movie_id) VALUES (new.id)
+                ON CONFLICT(movie_id) DO NOTHING;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS movie_stats_movie_ad AFTER DELETE ON movies BEGIN
+                DELETE FROM movie_stats WHERE movie_id = old.id;
+            END
+        ''')
+
+        # 影评变化时按差值增量更新
+        add_review = '''
+            INSERT INTO movie_stats (movie_id, review_count, score_sum, score_count, avg_score, popularity, votes)
+            VALUES (new.movie_id, 1, COALESCE(new.score, 0), new.score IS NOT NULL, new.score,
+                    COALESCE(new.popularity, 0), COALESCE(new.votes, 0))
+            ON CONFLICT(movie_id) DO UPDATE SET
+                review_count = review_count + 1,
+                score_sum = score_sum + excluded.score_sum,
+                score_count = score_count + excluded.score_count,
+                avg_score = (score_sum + excluded.score_sum) / NULLIF(score_count + excluded.score_count, 0),
+                popularity = popularity + excluded.popularity,
+                votes = votes + excluded.votes;
+        '''
+        remove_review = '''
+            UPDATE movie_stats SET
+                review_count = review_count - 1,
+                score_sum = score_sum - COALESCE(old.score, 0),
+                score_count = score_count - (old.score IS NOT NULL),
+                avg_score = (score_sum - COALESCE(old.score, 0)) / NULLIF(score_count - (old.score IS NOT NULL), 0),
+                popularity = popularity - COALESCE(old.popularity, 0),
+                votes = votes - COALESCE(old.votes, 0)
+            WHERE movie_id = old.movie_id;
+        '''
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS movie_stats_review_ai AFTER INSERT ON reviews BEGIN
+                {add_review}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS movie_stats_review_ad AFTER DELETE ON reviews BEGIN
+                {remove_review}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS movie_stats_review_au
+            AFTER UPDATE OF movie_id, score, votes, popularity ON reviews BEGIN
+                {remove_review}
+                {add_review}
+            END
+        ''')
+
+        # 旧数据库首次创建统计表时回填
+        if not exists:
+            self._rebuild_movie_stats(cursor)
+
+    def _rebuild_movie_stats(self, cursor: sqlite3.Cursor):
+        """
+        根据 movies 和 reviews 全量重算统计表
+
+        综合评分被清空，重算的统计行全部记入变更日志，评分引擎下次运行时会全量重算。
+        """
+        cursor.execute('DELETE FROM movie_stats')
+        cursor.execute('''
+            INSERT INTO movie_stats (movie_id, review_count, score_sum, score_count, avg_score, popularity, votes)
+            SELECT m.id,
+                   COUNT(r.id),
+                   COALESCE(SUM(r.score), 0),
+                   COUNT(r.score),
+                   AVG(r.score),
+                   COALESCE(SUM(r.popularity), 0),
+                   COALESCE(SUM(r.votes), 0)
+            FROM movies m
+            LEFT JOIN reviews r ON m.id = r.movie_id
+            GROUP BY m.id
+        ''')
+
+    def rebuild_movie_stats(self):
+        """全量重算聚合统计表（用于修复或批量导入之后）"""
+        with self.get_connection() as conn:
+            changes_before = conn.total_changes
+            self._rebuild_movie_stats(conn.cursor())
+            self._commit_data_change(conn, changes_before)
+
+    @contextmanager
+    def bulk_load(self, defer_indexes: bool = False, cache_size_kb: int = 256 * 1024):
+        """
+        批量导入模式
+
+        导入期间关闭同步写盘并加大页缓存；defer_indexes 为 True 时先删除二级索引和
+        统计表、全文索引的同步触发器，导入结束后重建索引，并一次性重算 movie_stats
+        和 FTS 索引，比逐行维护快得多。删除触发器期间其他进程的写入不会同步到
+        统计表和全文索引，只应在离线导入时开启。删除前在 meta 表记下导入标记，导入中途进程
+        退出时，下次 init_database 据此补算统计表和全文索引。
+
+        需要在连接池模式下使用，导入期间的写入与 PRAGMA 设置共用同一个线程连接。
+
+        Args:
+            defer_indexes: 是否延迟重建索引和触发器
+            cache_size_kb: 导入期间的页缓存大小（KB）
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            now = datetime.now().isoformat()
+            cursor.execute('PRAGMA synchronous = OFF')
+            cursor.execute(f'PRAGMA cache_size = {-int(cache_size_kb)}')
+
+            deferred = []
+            if defer_indexes:
+                # 只处理有建表语句的对象，UNIQUE 约束自带的索引是 upsert 冲突检测所必需的
+                cursor.execute('''
+                    SELECT type, name, sql FROM sqlite_master
+                    WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+                      AND tbl_name IN ('movies', 'reviews', 'movie_stats', 'movie_links', 'movie_aliases')
+                ''')
+                deferred = [(row['type'], row['name'], row['sql']) for row in cursor.fetchall()]
+                cursor.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('bulk_load_in_progress', 1)")
+                for object_type, name, _ in deferred:
+                    cursor.execute(f'DROP {object_type.upper()} IF EXISTS {name}')
+                conn.commit()
+
+            try:
+                yield self
+            finally:
+                if deferred:
+                    print(f"重建 {len(deferred)} 个索引和触发器...")
+                    changes_before = conn.total_changes
+                    # 先建索引再补全别名（按电影ID查找标题键），最后创建触发器，补全别名时不逐行触发
+                    for object_type, _, sql in deferred:
+                        if object_type == 'index':
+                            cursor.execute(sql)
+                    self._rebuild_movie_aliases(cursor)
+                    for object_type, _, sql in deferred:
+                        if object_type == 'trigger':
+                            cursor.execute(sql)
+                    if self.fts_enabled:
+                        cursor.execute("INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')")
+                    self._finish_bulk_load(cursor)
+                    self._commit_data_change(conn, changes_before)
+
+                cursor.execute(f'PRAGMA synchronous = {self.synchronous}')
+                cursor.execute(f'PRAGMA cache_size = {-int(self.cache_size_kb)}')
+
+    def _finish_bulk_load(self, cursor: sqlite3.Cursor):
+        """触发器恢复后重算统计表和复查调度，并清除批量导入标记（全文索引由调用方重建）"""
+        self._rebuild_movie_stats(cursor)
+        self._sync_crawl_schedule(cursor)
+        cursor.execute("DELETE FROM meta WHERE key = 'bulk_load_in_progress'")
+
+    def _init_match_index(self, cursor: sqlite3.Cursor):
+        """
+        创建跨数据源匹配使用的阻塞索引
+
+        movie_links 记录各数据源的外部ID（豆瓣 subject、IMDb tt 编号、烂番茄 slug）对应的电影，
+        movie_aliases 记录各数据源标题的匹配键（见 matching.normalize_title）、原始标题和年份。
+        新数据只与匹配键或外部ID相同的电影比较，不需要两两比较全部电影。
+        与电影标题不同的原始标题由触发器追加到 movies.aliases，全文检索和搜索建议据此找到合并后的电影。
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movie_aliases'")
+        exists = cursor.fetchone() is not None
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS movie_links (
+                source TEXT NOT NULL,
+                external_id TEXT NOT NULL,
+                movie_id INTEGER NOT NULL,
+                PRIMARY KEY(source, external_id),
+                FOREIGN KEY(movie_id) REFERENCES movies(id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_movie_links_movie ON movie_links(movie_id)
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS movie_aliases (
+                title_key TEXT NOT NULL,
+                movie_id INTEGER NOT NULL,
+                year INTEGER,
+                title TEXT,
+                PRIMARY KEY(title_key, movie_id),
+                FOREIGN KEY(movie_id) REFERENCES movies(id)
+            )
+        ''')
+        # 旧数据库的标题键没有原始标题，只有之后写入的别名会进入 movies.aliases
+        cursor.execute('PRAGMA table_info(movie_aliases)')
+        if 'title' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute('ALTER TABLE movie_aliases ADD COLUMN title TEXT')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_movie_aliases_movie ON movie_aliases(movie_id)
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS movie_aliases_title_ai AFTER INSERT ON movie_aliases
+            WHEN new.title IS NOT NULL BEGIN
+                {ALIAS_APPEND_SQL}
+            END
+        ''')
+        # 合并电影时标题键转移到保留的电影
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS movie_aliases_title_au AFTER UPDATE OF movie_id ON movie_aliases
+            WHEN new.title IS NOT NULL BEGIN
+                {ALIAS_APPEND_SQL}
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS movie_match_ad AFTER DELETE ON movies BEGIN
+                DELETE FROM movie_links WHERE movie_id = old.id;
+                DELETE FROM movie_aliases WHERE movie_id = old.id;
+            END
+        ''')
+
+        if not exists:
+            self._rebuild_match_index(cursor)
+
+    def _rebuild_match_index(self, cursor: sqlite3.Cursor):
+        """根据已有的电影标题和影评 URL 重建匹配索引"""
+        cursor.execute('DELETE FROM movie_aliases')
+        cursor.execute('DELETE FROM movie_links')
+
+        read_cursor = cursor.connection.cursor()
+        read_cursor.row_factory = None
+        read_cursor.execute('SELECT id, title, year FROM movies')
+        while True:
+            rows = read_cursor.fetchmany(5000)
+            if not rows:
+                break
+            cursor.executemany(
+                'INSERT OR IGNORE INTO movie_aliases (title_key, movie_id, year, title) VALUES (?, ?, ?, ?)',
+                ((normalize_title(title), movie_id, year, title)
+                 for movie_id, title, year in rows if normalize_title(title))
+            )
+
+        read_cursor.execute('SELECT movie_id, source, url FROM reviews WHERE url IS NOT NULL')
+        while True:
+            rows = read_cursor.fetchmany(5000)
+            if not rows:
+                break
+            cursor.executemany(
+                'INSERT OR IGNORE INTO movie_links (source, external_id, movie_id) VALUES (?, ?, ?)',
+                ((link_source, external_id, movie_id)
+                 for movie_id, source, url in rows
+                 for link_source, external_id in extract_external_ids({'url': url}, source))
+            )
+
+    def _rebuild_movie_aliases(self, cursor: sqlite3.Cursor):
+        """按标题键的原始标题重新生成全部电影的别名（延迟触发器的批量导入之后）"""
+        cursor.execute('''
+            UPDATE movies SET aliases = (
+                SELECT group_concat(title, char(10)) FROM (
+                    SELECT DISTINCT a.title FROM movie_aliases a
+                    WHERE a.movie_id = movies.id AND a.title IS NOT NULL AND a.title != movies.title
+                )
+            )
+            WHERE id IN (SELECT movie_id FROM movie_aliases WHERE title IS NOT NULL)
+        ''')
+
+    def rebuild_match_index(self):
+        """全量重建跨数据源匹配索引"""
+        with self.get_connection() as conn:
+            self._rebuild_match_index(conn.cursor())
+            conn.commit()
+
+    def _init_crawl_schedule(self, cursor: sqlite3.Cursor):
+        """
+        创建增量复查调度表
+
+        每个 (电影, 数据源) 一行，记录外部ID、上次抓取时间、下次到期时间，
+        以及检查次数和其中数据有变化的次数。时间为 Unix 时间戳（秒）。
+        关联到新的外部ID时由触发器加入调度，首次复查在影评更新一天后。
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'crawl_schedule'")
+        exists = cursor.fetchone() is not None
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_schedule (
+                movie_id INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                external_id TEXT NOT NULL,
+                last_crawled_at REAL,
+                next_due_at REAL NOT NULL,
+                checks INTEGER NOT NULL DEFAULT 0,
+                changes INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY(movie_id, source),
+                FOREIGN KEY(movie_id) REFERENCES movies(id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_crawl_schedule_due ON crawl_schedule(source, next_due_at)
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS crawl_schedule_link_ai AFTER INSERT ON movie_links BEGIN
+                INSERT INTO crawl_schedule (movie_id, source, external_id, last_crawled_at, next_due_at)
+                SELECT new.movie_id, new.source, new.external_id, crawled_at, COALESCE(crawled_at, {UNIX_NOW_SQL}) + 86400
+                FROM (
+                    SELECT (julianday(updated_at, 'utc') - 2440587.5) * 86400 AS crawled_at
+                    FROM reviews WHERE movie_id = new.movie_id AND source = new.source
+                    UNION ALL SELECT NULL
+                    LIMIT 1
+                )
+                WHERE true
+                ON CONFLICT(movie_id, source) DO NOTHING;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS crawl_schedule_movie_ad AFTER DELETE ON movies BEGIN
+                DELETE FROM crawl_schedule WHERE movie_id = old.id;
+            END
+        ''')
+
+        if not exists:
+            self._sync_crawl_schedule(cursor)
+
+    def _sync_crawl_schedule(self, cursor: sqlite3.Cursor):
+        """把尚未调度的外部ID加入调度表（首次建表和延迟触发器的批量导入之后）"""
+        cursor.execute(f'''
+            INSERT INTO crawl_schedule (movie_id, source, external_id, last_crawled_at, next_due_at)
+            SELECT l.movie_id, l.source, l.external_id,
+                   (julianday(r.updated_at, 'utc') - 2440587.5) * 86400,
+                   COALESCE((julianday(r.updated_at, 'utc') - 2440587.5) * 86400, {UNIX_NOW_SQL}) + 86400
+            FROM movie_links l
+            LEFT JOIN reviews r ON r.movie_id = l.movie_id AND r.source = l.source
+            WHERE NOT EXISTS (
+                SELECT 1 FROM crawl_schedule c WHERE c.movie_id = l.movie_id AND c.source = l.source
+            )
+            ON CONFLICT(movie_id, source) DO NOTHING
+        ''')
+
+    def _init_movie_changes(self, cursor: sqlite3.Cursor):
+        """
+        创建电影变更日志
+
+        标题、别名、年份、热度、评分或投票数变化的电影由触发器记入 movie_changes，每部电影只保留最近一次变更，
+        seq 单调递增。内存中的搜索建议索引和综合评分各自记住已同步到的 seq，之后只读取更新的变更。
+        统计表被全量重算时（rebuild_movie_stats、延迟触发器的批量导入）所有电影都会记入日志。
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS movie_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                movie_id INTEGER NOT NULL UNIQUE
+            )
+        ''')
+
+        def log_change(movie_id: str) -> str:
+            return f'''
+                DELETE FROM movie_changes WHERE movie_id = {movie_id};
+                INSERT INTO movie_changes (movie_id) VALUES ({movie_id});
+            '''
+
+        # 原触发器不记录别名变化，搜索建议索引还需要别名
+        cursor.execute('DROP TRIGGER IF EXISTS movie_changes_movie_au')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS movie_changes_movie_alias_au AFTER UPDATE OF title, year, aliases ON movies
+            WHEN new.title IS NOT old.title OR new.year IS NOT old.year OR new.aliases IS NOT old.aliases BEGIN
+                {log_change('new.id')}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS movie_changes_movie_ad AFTER DELETE ON movies BEGIN
+                {log_change('old.id')}
+            END
+        ''')
+        # 新电影由 movie_stats_movie_ai 插入统计行，在这里一并记录
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS movie_changes_stats_ai AFTER INSERT ON movie_stats BEGIN
+                {log_change('new.movie_id')}
+            END
+        ''')
+        # 原触发器只记录热度变化，综合评分还需要评分和投票数的变化
+        cursor.execute('DROP TRIGGER IF EXISTS movie_changes_stats_au')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS movie_changes_stats_score_au
+            AFTER UPDATE OF popularity, score_sum, score_count, votes ON movie_stats
+            WHEN new.popularity IS NOT old.popularity OR new.score_sum IS NOT old.score_sum
+              OR new.score_count IS NOT old.score_count OR new.votes IS NOT old.votes BEGIN
+                {log_change('new.movie_id')}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS movie_changes_stats_ad AFTER DELETE ON movie_stats BEGIN
+                {log_change('old.movie_id')}
+            END
+        ''')
+
+    def get_suggest_entries(self) -> Tuple[int, List[tuple]]:
+        """
+        读取构建搜索建议索引所需的全部电影
+
+        先读取变更序号再读取电影，两次读取之间的写入会在下次增量同步时再应用一次（结果相同）。
+
+        Returns:
+            (当前变更序号, [(电影ID, 标题, 年份, 热度, 别名)])
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM movie_changes')
+            seq = cursor.fetchone()[0]
+            cursor.execute('''
+                SELECT m.id, m.title, m.year, COALESCE(s.popularity, 0), m.aliases
+                FROM movies m
+                LEFT JOIN movie_stats s ON s.movie_id = m.id
+            ''')
+            return seq, cursor.fetchall()
+
+    def get_movie_changes(self, since_seq: int, limit: int) -> List[tuple]:
+        """
+        读取变更序号之后的电影变更
+
+        Args:
+            since_seq: 已同步到的变更序号
+            limit: 最多读取的数量
+
+        Returns:
+            [(变更序号, 电影ID, 标题, 年份, 热度, 别名)]，电影已删除时标题为 None
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
             cursor.execute('''
-                INSERT OR REPLACE INTO movies (title, year, description, poster_url, updated_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (movie.title, movie.year, movie.description, movie.poster_url, now))
+                SELECT c.seq, c.movie_id, m.title, m.year, COALESCE(s.popularity, 0), m.aliases
+                FROM movie_changes c
+                LEFT JOIN movies m ON m.id = c.movie_id
+                LEFT JOIN movie_stats s ON s.movie_id = c.movie_id
+                WHERE c.seq > ?
+                ORDER BY c.seq
+                LIMIT ?
+            ''', (since_seq, limit))
+            return cursor.fetchall()
+
+    def _init_scoring(self, cursor: sqlite3.Cursor):
+        """
+        创建综合评分参数表
+
+        score_params 保存最近一次全量计算时各数据源评分的均值、标准差和投票数中位数，
+        source 为空字符串的一行是全部数据源合计。增量计算沿用这些参数，只重算变更过的电影。
+        meta 表中 score_seq 为综合评分已同步到的变更序号，score_params_seq 为参数计算时的变更序号。
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS score_params (
+                source TEXT PRIMARY KEY,
+                mean REAL NOT NULL,
+                std REAL NOT NULL,
+                vote_median REAL NOT NULL,
+                reviews INTEGER NOT NULL
+            )
+        ''')
+
+    def get_score_state(self) -> Dict[str, Any]:
+        """
+        读取综合评分的同步状态
+
+        Returns:
+            seq（当前变更序号）、scored_seq（已同步到的序号，从未计算过为 None）、
+            movies（电影数）、pending（之后变更过的电影数）、drift（参数计算之后变更过的电影数）
+            和 params（各数据源的 (均值, 标准差, 投票数中位数, 影评数)）
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM movie_changes')
+            seq = cursor.fetchone()[0]
+            cursor.execute("SELECT key, value FROM meta WHERE key IN ('score_seq', 'score_params_seq')")
+            meta = dict(cursor.fetchall())
+            cursor.execute('SELECT COUNT(*) FROM movie_stats')
+            movies = cursor.fetchone()[0]
+
+            def count_changes(since_seq: Optional[int]) -> int:
+                if since_seq is None:
+                    return movies
+                cursor.execute('SELECT COUNT(*) FROM movie_changes WHERE seq > ?', (since_seq,))
+                return cursor.fetchone()[0]
+
+            cursor.execute('SELECT source, mean, std, vote_median, reviews FROM score_params')
+            params = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+            return {
+                'seq': seq,
+                'scored_seq': meta.get('score_seq'),
+                'movies': movies,
+                'pending': count_changes(meta.get('score_seq')),
+                'drift': count_changes(meta.get('score_params_seq')),
+                'params': params,
+            }
+
+    def get_changed_movie_ids(self, since_seq: int) -> List[int]:
+        """读取变更序号之后变更过的电影ID（包括已删除的电影）"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute('SELECT movie_id FROM movie_changes WHERE seq > ? ORDER BY movie_id', (since_seq,))
+            return [row[0] for row in cursor.fetchall()]
+
+    def iter_review_scores(self, movie_ids: Optional[List[int]] = None, batch_size: int = 100000,
+                           chunk_size: int = 500) -> Iterator[List[tuple]]:
+        """
+        分批读取有评分的影评
+
+        Args:
+            movie_ids: 只读取这些电影的影评，为 None 时读取全部
+            batch_size: 全量读取时每批的行数
+            chunk_size: 按电影ID读取时每次 IN 查询的电影数量
+
+        Yields:
+            [(电影ID, 数据源, 评分, 投票数)]
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            if movie_ids is None:
+                cursor.execute('''
+                    SELECT movie_id, source, score, votes FROM reviews WHERE score IS NOT NULL
+                ''')
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+                return
+
+            for start in range(0, len(movie_ids), chunk_size):
+                chunk = movie_ids[start:start + chunk_size]
+                cursor.execute(f'''
+                    SELECT movie_id, source, score, votes FROM reviews
+                    WHERE movie_id IN ({', '.join('?' * len(chunk))}) AND score IS NOT NULL
+                ''', chunk)
+                rows = cursor.fetchall()
+                if rows:
+                    yield rows
+
+    def save_scores(self, scores: Iterable[Tuple[int, Optional[float]]], seq: int,
+                    params: Optional[Dict[str, tuple]] = None) -> int:
+        """
+        在一个事务中写入综合评分并记录已同步到的变更序号
+
+        Args:
+            scores: (电影ID, 综合评分)，评分为 None 表示没有可用的评分
+            seq: 计算前读取的变更序号，之后的变更留给下次计算
+            params: 全量计算得到的各数据源参数；给出时同时替换参数表，
+                    并清空 scores 之外、已经没有评分的电影的综合评分
+
+        Returns:
+            实际变化的电影数
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            changes_before = conn.total_changes
+            cursor.executemany('''
+                UPDATE movie_stats SET composite_score = ?2
+                WHERE movie_id = ?1 AND composite_score IS NOT ?2
+            ''', scores)
+            if params is not None:
+                cursor.execute('''
+                    UPDATE movie_stats SET composite_score = NULL
+                    WHERE score_count = 0 AND composite_score IS NOT NULL
+                ''')
+            changed = conn.total_changes - changes_before
+
+            # 并发计算时序号只前进不后退
+            keys = ['score_seq'] if params is None else ['score_seq', 'score_params_seq']
+            cursor.executemany('''
+                INSERT INTO meta (key, value) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)
+            ''', [(key, seq) for key in keys])
+            if params is not None:
+                cursor.execute('DELETE FROM score_params')
+                cursor.executemany('''
+                    INSERT INTO score_params (source, mean, std, vote_median, reviews) VALUES (?, ?, ?, ?, ?)
+                ''', [(source, *values) for source, values in params.items()])
+
+            # 只有综合评分变化时才递增写入代数
+            self._commit_data_change(conn, conn.total_changes - changed)
+            return changed
+
+    def _init_trending(self, cursor: sqlite3.Cursor):
+        """
+        创建热度快照和趋势表
+
+        popularity_history 按时间桶（默认一天）记录电影的热度快照，同一时间桶内只保留最后一次，
+        热度没有变化时不记录。movie_trends 只保存有热度增长的电影：score 为 updated_at 时刻
+        按指数衰减累计的热度增长，trend_key = ln(score) + 衰减率 × updated_at。
+        所有电影的分数以相同速率衰减，按 trend_key 排序等价于按当前时刻的衰减分数排序，
+        没有新增长的电影不需要随时间重写。trending_top 为预先计算的前 K 名。
+        meta 表中 trend_seq 为趋势已同步到的变更序号。
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS popularity_history (
+                movie_id INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                popularity INTEGER NOT NULL,
+                PRIMARY KEY(movie_id, bucket)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS movie_trends (
+                movie_id INTEGER PRIMARY KEY,
+                score REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                trend_key REAL NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_movie_trends_key ON movie_trends(trend_key DESC)
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trending_top (
+                rank INTEGER PRIMARY KEY,
+                movie_id INTEGER NOT NULL
+            )
+        ''')
+
+    def get_trend_changes(self) -> Tuple[int, Optional[int], List[tuple]]:
+        """
+        读取趋势上次同步之后热度可能变化的电影
+
+        Returns:
+            (当前变更序号, 已同步到的序号（从未同步过为 None）,
+             [(电影ID, 当前热度, 最近快照的时间桶, 最近快照的热度, 趋势分数, 趋势更新时间)])，
+            电影已删除时当前热度为 None，没有快照或趋势时对应字段为 None
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM movie_changes')
+            seq = cursor.fetchone()[0]
+            cursor.execute("SELECT value FROM meta WHERE key = 'trend_seq'")
+            row = cursor.fetchone()
+            if row is None:
+                return seq, None, []
+            cursor.execute('''
+                SELECT c.movie_id, s.popularity, h.bucket, h.popularity, t.score, t.updated_at
+                FROM movie_changes c
+                LEFT JOIN movie_stats s ON s.movie_id = c.movie_id
+                LEFT JOIN movie_trends t ON t.movie_id = c.movie_id
+                LEFT JOIN popularity_history h ON h.movie_id = c.movie_id AND h.bucket = (
+                    SELECT MAX(bucket) FROM popularity_history WHERE movie_id = c.movie_id
+                )
+                WHERE c.seq > ?
+            ''', (row[0],))
+            return seq, row[0], cursor.fetchall()
+
+    def init_trend_baseline(self, seq: int, bucket: int):
+        """
+        首次计算趋势时记录全部电影的热度作为基准快照
+
+        Args:
+            seq: 读取变更前的变更序号
+            bucket: 当前时间桶
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO popularity_history (movie_id, bucket, popularity)
+                SELECT movie_id, ?, popularity FROM movie_stats WHERE popularity > 0
+                ON CONFLICT(movie_id, bucket) DO UPDATE SET popularity = excluded.popularity
+            ''', (bucket,))
+            cursor.execute('''
+                INSERT INTO meta (key, value) VALUES ('trend_seq', ?)
+                ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)
+            ''', (seq,))
             conn.commit()
-            return cursor.lastrowid
 
-    def insert_review(self, review: Review) -> int:
-        """插入影评"""
+    def save_trends(self, seq: int, snapshots: List[Tuple[int, int, int]],
+                    trends: List[Tuple[int, float, float, float]], removed: List[int],
+                    prune_before: int, top_k: int, min_key: float) -> int:
+        """
+        在一个事务中写入热度快照和趋势分数，并重新生成前 K 名
+
+        Args:
+            seq: 计算前读取的变更序号
+            snapshots: (电影ID, 时间桶, 热度)
+            trends: (电影ID, 分数, 更新时间, trend_key)
+            removed: 已删除的电影ID，同时删除其快照和趋势
+            prune_before: 早于该时间桶的快照删除（每部电影至少保留最近一次快照作为基准）
+            top_k: 前 K 名的数量
+            min_key: 当前衰减分数低于阈值的电影不进入前 K 名，阈值换算成的 trend_key 下限
+
+        Returns:
+            前 K 名的数量
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            now = datetime.now().isoformat()
+            changes_before = conn.total_changes
+            cursor.executemany('''
+                INSERT INTO popularity_history (movie_id, bucket, popularity) VALUES (?, ?, ?)
+                ON CONFLICT(movie_id, bucket) DO UPDATE SET popularity = excluded.popularity
+            ''', snapshots)
+            cursor.executemany('''
+                INSERT INTO movie_trends (movie_id, score, updated_at, trend_key) VALUES (?, ?, ?, ?)
+                ON CONFLICT(movie_id) DO UPDATE SET
+                    score = excluded.score, updated_at = excluded.updated_at, trend_key = excluded.trend_key
+            ''', trends)
+            for movie_id in removed:
+                cursor.execute('DELETE FROM popularity_history WHERE movie_id = ?', (movie_id,))
+                cursor.execute('DELETE FROM movie_trends WHERE movie_id = ?', (movie_id,))
+            # 只有本次写入快照的电影可能有过期快照
+            cursor.executemany('''
+                DELETE FROM popularity_history
+                WHERE movie_id = ?1 AND bucket < ?2 AND bucket < ?3
+            ''', [(movie_id, bucket, prune_before) for movie_id, bucket, _ in snapshots])
+
+            cursor.execute('DELETE FROM trending_top')
+            cursor.execute('''
+                INSERT INTO trending_top (rank, movie_id)
+                SELECT ROW_NUMBER() OVER (ORDER BY trend_key DESC, movie_id DESC), movie_id
+                FROM (
+                    SELECT movie_id, trend_key FROM movie_trends
+                    WHERE trend_key >= ?
+                    ORDER BY trend_key DESC
+                    LIMIT ?
+                )
+            ''', (min_key, top_k))
+            top_count = cursor.rowcount
+
             cursor.execute('''
-                INSERT OR REPLACE INTO reviews 
-                (movie_id, source, score, votes, url, popularity, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (review.movie_id, review.source, review.score, review.votes,
-                   review.url, review.popularity, now))
+                INSERT INTO meta (key, value) VALUES ('trend_seq', ?)
+                ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)
+            ''', (seq,))
+            self._commit_data_change(conn, changes_before)
+            return top_count
+
+    def get_due_crawls(self, source: str, limit: int, now: float) -> List[Dict[str, Any]]:
+        """
+        获取到期需要复查的电影，最早到期的优先
+
+        Args:
+            source: 数据源
+            limit: 本次最多复查的数量（数据源预算）
+            now: 当前 Unix 时间戳
+
+        Returns:
+            调度信息和当前影评数据（score/votes/popularity，用于判断是否变化）
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT c.movie_id, c.source, c.external_id, c.last_crawled_at, c.next_due_at,
+                       c.checks, c.changes, r.score, r.votes, r.popularity
+                FROM crawl_schedule c
+                LEFT JOIN reviews r ON r.movie_id = c.movie_id AND r.source = c.source
+                WHERE c.source = ? AND c.next_due_at <= ?
+                ORDER BY c.next_due_at
+                LIMIT ?
+            ''', (source, now, limit))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def record_crawl_results(self, results: List[Dict[str, Any]]):
+        """
+        记录复查结果和下次到期时间
+
+        Args:
+            results: 每项包含 movie_id、source、next_due_at，以及 crawled_at 和 changed；
+                     抓取失败的项 crawled_at 为 None，不计入检查次数
+        """
+        with self.get_connection() as conn:
+            conn.executemany('''
+                UPDATE crawl_schedule SET
+                    checks = checks + (:crawled_at IS NOT NULL),
+                    changes = changes + COALESCE(:changed, 0),
+                    last_crawled_at = COALESCE(:crawled_at, last_crawled_at),
+                    next_due_at = :next_due_at
+                WHERE movie_id = :movie_id AND source = :source
+            ''', results)
             conn.commit()
-            return cursor.lastrowid
+
+    def get_crawl_schedule_stats(self, now: float) -> Dict[str, Dict[str, int]]:
+        """各数据源的调度数量和当前到期数量"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT source, COUNT(*) AS scheduled, SUM(next_due_at <= ?) AS due
+                FROM crawl_schedule GROUP BY source
+            ''', (now,))
+            return {row['source']: {'scheduled': row['scheduled'], 'due': row['due'] or 0}
+                    for row in cursor.fetchall()}
+
+    def find_duplicate_movies(self) -> List[List[int]]:
+        """
+        查找已有数据中的重复电影
+
+        只比较匹配索引中标题键相同的电影，判断规则与写入时的匹配相同。
+
+        Returns:
+            电影ID分组，组内第一个为保留的电影
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT a.title_key, a.movie_id, m.year
+                FROM movie_aliases a
+                JOIN movies m ON m.id = a.movie_id
+                WHERE a.title_key IN (
+                    SELECT title_key FROM movie_aliases GROUP BY title_key HAVING COUNT(*) > 1
+                )
+            ''')
+            blocks: Dict[str, List[tuple]] = {}
+            for row in cursor.fetchall():
+                blocks.setdefault(row['title_key'], []).append((row['movie_id'], row['year']))
+
+            movie_sources: Dict[int, Dict[str, str]] = {}
+            candidates = sorted({movie_id for members in blocks.values() for movie_id, _ in members})
+            for start in range(0, len(candidates), 500):
+                chunk = candidates[start:start + 500]
+                placeholders = ', '.join('?' * len(chunk))
+                cursor.execute(f'''
+                    SELECT movie_id, source, external_id FROM movie_links WHERE movie_id IN ({placeholders})
+                ''', chunk)
+                for row in cursor.fetchall():
+                    movie_sources.setdefault(row['movie_id'], {}).setdefault(row['source'], row['external_id'])
+
+        # 同一部电影可能通过不同的标题键出现在多个分块中，用并查集合并重叠的分组
+        parent: Dict[int, int] = {}
+
+        def find(movie_id: int) -> int:
+            root = parent.setdefault(movie_id, movie_id)
+            while root != parent[root]:
+                root = parent[root]
+            return root
+
+        for members in blocks.values():
+            for cluster in cluster_duplicates(members, movie_sources):
+                for movie_id in cluster[1:]:
+                    a, b = find(cluster[0]), find(movie_id)
+                    if a != b:
+                        parent[max(a, b)] = min(a, b)
+
+        groups: Dict[int, List[int]] = {}
+        for movie_id in parent:
+            groups.setdefault(find(movie_id), []).append(movie_id)
+        return [sorted(group) for group in groups.values() if len(group) > 1]
+
+    def merge_movies(self, keep_id: int, duplicate_ids: List[int]):
+        """
+        把重复电影合并到保留的电影
+
+        影评、外部ID和标题键转移到保留的电影（同一数据源已有影评时保留原有影评），
+        保留电影缺失的字段用重复记录补全，然后删除重复记录。
+
+        Args:
+            keep_id: 保留的电影ID
+            duplicate_ids: 要合并的电影ID
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            changes_before = conn.total_changes
+            now = datetime.now().isoformat()
+            for duplicate_id in duplicate_ids:
+                if duplicate_id == keep_id:
+                    continue
+                cursor.execute('''
+                    UPDATE OR IGNORE reviews SET movie_id = ? WHERE movie_id = ?
+                ''', (keep_id, duplicate_id))
+                cursor.execute('DELETE FROM reviews WHERE movie_id = ?', (duplicate_id,))
+                cursor.execute('''
+                    UPDATE OR IGNORE movie_links SET movie_id = ? WHERE movie_id = ?
+                ''', (keep_id, duplicate_id))
+                cursor.execute('''
+                    UPDATE OR IGNORE movie_aliases SET movie_id = ? WHERE movie_id = ?
+                ''', (keep_id, duplicate_id))
+                cursor.execute('''
+                    UPDATE OR IGNORE crawl_schedule SET movie_id = ? WHERE movie_id = ?
+                ''', (keep_id, duplicate_id))
+                cursor.execute('''
+                    SELECT year, description, poster_url FROM movies WHERE id = ?
+                ''', (duplicate_id,))
+                row = cursor.fetchone()
+                if row:
+                    cursor.execute(MOVIE_FILL_SQL, (row['year'], row['description'], row['poster_url'],
+                                                    now, keep_id))
+                cursor.execute('DELETE FROM movies WHERE id = ?', (duplicate_id,))
+            # 合并后热度的跳变不是新增热度，保留的电影从下次快照重新开始计算趋势
+            cursor.execute('DELETE FROM popularity_history WHERE movie_id = ?', (keep_id,))
+            cursor.execute('DELETE FROM movie_trends WHERE movie_id = ?', (keep_id,))
+            self._commit_data_change(conn, changes_before)
+
+    def _init_fts(self, cursor: sqlite3.Cursor) -> bool:
+        """
+        创建 FTS5 全文索引及同步触发器
+
+        使用 trigram 分词器，中文标题（如“流浪地球”）可以按任意子串匹配。
+        别名（其他数据源的标题）一并索引，搜索 “Wandering Earth” 也能找到合并后的“流浪地球”。
+
+        Returns:
+            当前 SQLite 是否支持 FTS5 trigram 分词
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movies_fts'")
+        exists = cursor.fetchone() is not None
+
+        # 旧索引没有别名列，删除后按新的列重建
+        if exists:
+            cursor.execute('PRAGMA table_info(movies_fts)')
+            if 'aliases' not in [row[1] for row in cursor.fetchall()]:
+                for trigger in ('movies_fts_ai', 'movies_fts_ad', 'movies_fts_au'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+                cursor.execute('DROP TABLE movies_fts')
+                exists = False
+
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+                    title, description, aliases,
+                    content='movies', content_rowid='id',
+                    tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 不可用，搜索将回退到 LIKE: {e}")
+            return False
+
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS movies_fts_ai AFTER INSERT ON movies BEGIN
+                INSERT INTO movies_fts (rowid, title, description, aliases)
+                VALUES (new.id, new.title, new.description, new.aliases);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS movies_fts_ad AFTER DELETE ON movies BEGIN
+                INSERT INTO movies_fts (movies_fts, rowid, title, description, aliases)
+                VALUES ('delete', old.id, old.title, old.description, old.aliases);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS movies_fts_au AFTER UPDATE OF title, description, aliases ON movies BEGIN
+                INSERT INTO movies_fts (movies_fts, rowid, title, description, aliases)
+                VALUES ('delete', old.id, old.title, old.description, old.aliases);
+                INSERT INTO movies_fts (rowid, title, description, aliases)
+                VALUES (new.id, new.title, new.description, new.aliases);
+            END
+        ''')
+
+        # 已有数据的旧数据库首次创建索引时需要重建
+        if not exists:
+            cursor.execute("INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')")
+            # bm25 排序时标题命中的权重最高，别名次之，简介最低
+            cursor.execute("INSERT INTO movies_fts (movies_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 5.0)')")
+
+        return True
+
+    def _fts_query(self, query: str) -> Optional[str]:
+        """
+        构造 FTS5 查询表达式
+
+        trigram 分词器至少需要 3 个字符，更短的关键词返回 None 由调用方回退到 LIKE。
+        """
+        if not self.fts_enabled or len(query) < 3:
+            return None
+        # 整个关键词作为一个短语，保持与 LIKE 相同的子串语义
+        return '"' + query.replace('"', '""') + '"'
+
+    def get_generation(self) -> int:
+        """
+        获取数据写入代数
+
+        电影和影评每次有实际变更的写入都会在同一事务内递增代数。
+        其他连接（包括其他进程）的提交通过 PRAGMA data_version 感知，
+        只有检测到变化时才重新读取 meta 表。
+
+        Returns:
+            当前写入代数
+        """
+        with self.get_connection() as conn:
+            data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+            state = (id(conn), data_version, self._write_count)
+            if getattr(self._local, 'generation_state', None) != state:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+                self._local.generation = row[0]
+                self._local.generation_state = state
+            return self._local.generation
+
+    def _commit_data_change(self, conn: sqlite3.Connection, total_changes_before: int):
+        """
+        提交电影/影评数据的写入，有实际变更时递增写入代数
+
+        Args:
+            conn: 数据库连接
+            total_changes_before: 写入前的 conn.total_changes
+        """
+        if conn.total_changes != total_changes_before:
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+        conn.commit()
+        with self._pool_lock:
+            self._write_count += 1
+
+    def insert_movie(self, movie: Movie, skip_unchanged: bool = True) -> int:
+        """
+        插入或更新电影（按标题 upsert，已存在的电影保持原有ID）
+
+        Args:
+            movie: 电影数据
+            skip_unchanged: 内容没有变化时跳过写入
+
+        Returns:
+            电影ID
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            changes_before = conn.total_changes
+            now = datetime.now().isoformat()
+            cursor.execute(self._movie_upsert_sql(skip_unchanged),
+                           (movie.title, movie.year, movie.description, movie.poster_url, now))
+            cursor.execute('SELECT id FROM movies WHERE title = ?', (movie.title,))
+            movie_id = cursor.fetchone()['id']
+            if normalize_title(movie.title):
+                cursor.execute(
+                    'INSERT OR IGNORE INTO movie_aliases (title_key, movie_id, year, title) VALUES (?, ?, ?, ?)',
+                    (normalize_title(movie.title), movie_id, movie.year, movie.title)
+                )
+            self._commit_data_change(conn, changes_before)
+            return movie_id
+
+    def insert_review(self, review: Review, skip_unchanged: bool = True) -> int:
+        """
+        插入或更新影评（按电影ID和数据源 upsert）
+
+        Args:
+            review: 影评数据
+            skip_unchanged: 内容没有变化时跳过写入
+
+        Returns:
+            影评ID
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            changes_before = conn.total_changes
+            now = datetime.now().isoformat()
+            cursor.execute(self._review_upsert_sql(skip_unchanged),
+                           (review.movie_id, review.source, review.score, review.votes,
+                            review.url, review.popularity, now))
+            cursor.execute('SELECT id FROM reviews WHERE movie_id = ? AND source = ?',
+                           (review.movie_id, review.source))
+            review_id = cursor.fetchone()['id']
+            cursor.executemany('INSERT OR IGNORE INTO movie_links (source, external_id, movie_id) VALUES (?, ?, ?)',
+                               ((*link, review.movie_id)
+                                for link in extract_external_ids({'url': review.url}, review.source)))
+            self._commit_data_change(conn, changes_before)
+            return review_id
+
+    @staticmethod
+    def _movie_upsert_sql(skip_unchanged: bool) -> str:
+        return MOVIE_UPSERT_SQL + (MOVIE_CHANGED_SQL if skip_unchanged else '')
+
+    @staticmethod
+    def _movie_fill_sql(skip_unchanged: bool) -> str:
+        return MOVIE_FILL_SQL + (MOVIE_FILL_CHANGED_SQL if skip_unchanged else '')
+
+    @staticmethod
+    def _review_upsert_sql(skip_unchanged: bool) -> str:
+        return REVIEW_UPSERT_SQL + (REVIEW_CHANGED_SQL if skip_unchanged else '')
+
+    def upsert_movies_with_reviews(self, movies_data: List[Dict[str, Any]],
+                                   source: Optional[str] = None,
+                                   skip_unchanged: bool = True) -> List[Optional[int]]:
+        """
+        在单个事务中批量写入电影及其影评
+
+        写入前先通过匹配索引查找同一部电影：外部ID相同，或标题匹配键相同且年份相差
+        不超过一年（同一数据源关联了不同外部ID的除外）。匹配到的数据项合并到已有电影，
+        影评写在该电影下，标题不同时只补全电影缺失的字段；同一批次内的数据项之间也会合并。
+        没有匹配但标题与已有电影完全相同（如翻拍片）时，新电影标题加上年份以示区分。
+
+        Args:
+            movies_data: 标准化后的爬虫数据列表（见 BaseCrawler.normalize_movie_data），
+                         数据项可以带 source 字段覆盖默认数据源
+            source: 默认数据源名称
+            skip_unchanged: 内容没有变化的电影和影评跳过写入
+
+        Returns:
+            与输入顺序一致的电影ID列表，标题为空的数据项对应 None
+        """
+        now = datetime.now().isoformat()
+
+        entries = []
+        for data in movies_data:
+            if not data.get('title'):
+                entries.append(None)
+                continue
+            review_source = data.get('source') or source
+            entries.append((data, review_source, normalize_title(data['title']), data.get('year'),
+                            extract_external_ids(data, review_source)))
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            changes_before = conn.total_changes
+            matcher = self._load_matcher(cursor, [entry[2:] for entry in entries if entry])
+
+            existing_titles = self._get_movie_ids(cursor, [entry[0]['title'] for entry in entries if entry])
+
+            # 逐条匹配：标题不同的已有电影按ID补全，其余按标题 upsert
+            targets = []
+            fills: Dict[int, tuple] = {}
+            groups: Dict[str, tuple] = {}
+            same_title = set()
+            for entry in entries:
+                if entry is None:
+                    targets.append(None)
+                    continue
+                data, _, key, year, external_ids = entry
+                fields = (year, data.get('description'), data.get('poster_url'))
+                movie_id, group = matcher.match(key, year, external_ids)
+                if movie_id is not None:
+                    matcher.add_existing(movie_id, key, year, external_ids)
+                    if existing_titles.get(data['title']) != movie_id:
+                        fills[movie_id] = self._merge_fields(fields, fills.get(movie_id))
+                        targets.append(movie_id)
+                        continue
+                    group = data['title']
+                    same_title.add(group)
+                else:
+                    group = group or data['title']
+                    matcher.add(group, key, year, external_ids)
+                groups[group] = self._merge_fields(fields, groups.get(group))
+                targets.append(group)
+
+            # 与已有电影同名却没有匹配上的新电影，标题加上年份
+            renamed = {}
+            for title in list(groups):
+                year = groups[title][0]
+                if title in existing_titles and title not in same_title and year is not None:
+                    renamed[title] = f'{title} ({year})'
+                    groups[renamed[title]] = groups.pop(title)
+
+            cursor.executemany(self._movie_fill_sql(skip_unchanged),
+                               ((*fields, now, movie_id) for movie_id, fields in fills.items()))
+            cursor.executemany(self._movie_upsert_sql(skip_unchanged),
+                               ((title, *fields, now) for title, fields in groups.items()))
+
+            title_ids = self._get_movie_ids(cursor, list(groups))
+            movie_ids = [
+                target if target is None or isinstance(target, int)
+                else title_ids.get(renamed.get(target, target))
+                for target in targets
+            ]
+
+            review_params = {}
+            alias_params = {}
+            link_params = set()
+            for entry, movie_id in zip(entries, movie_ids):
+                if entry is None or movie_id is None:
+                    continue
+                data, review_source, key, year, external_ids = entry
+                if key:
+                    alias_params.setdefault((key, movie_id), (key, movie_id, year, data['title']))
+                link_params.update((*link, movie_id) for link in external_ids)
+                if not review_source:
+                    continue
+                review_params[(movie_id, review_source)] = (
+                    movie_id, review_source, data.get('score'), data.get('votes'),
+                    data.get('url'), data.get('popularity') or 0, now
+                )
+
+            cursor.executemany(self._review_upsert_sql(skip_unchanged), review_params.values())
+            cursor.executemany(
+                'INSERT OR IGNORE INTO movie_aliases (title_key, movie_id, year, title) VALUES (?, ?, ?, ?)',
+                alias_params.values()
+            )
+            cursor.executemany('INSERT OR IGNORE INTO movie_links (source, external_id, movie_id) VALUES (?, ?, ?)',
+                               link_params)
+
+            self._commit_data_change(conn, changes_before)
+
+        return movie_ids
+
+    @staticmethod
+    def _merge_fields(fields: tuple, previous: Optional[tuple]) -> tuple:
+        """合并同一部电影的多条数据，后出现的非空字段优先"""
+        if previous is None:
+            return fields
+        return tuple(new if new not in (None, '') else old for new, old in zip(fields, previous))
+
+    def _load_matcher(self, cursor: sqlite3.Cursor, entries: List[tuple],
+                      chunk_size: int = 500) -> BatchMatcher:
+        """按本批数据项的标题键和外部ID批量查询匹配索引，构造匹配器"""
+        keys, wanted_links = collect_keys(entries)
+
+        links: Dict[tuple, int] = {}
+        external_ids = sorted({external_id for _, external_id in wanted_links})
+        for start in range(0, len(external_ids), chunk_size):
+            chunk = external_ids[start:start + chunk_size]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f'''
+                SELECT source, external_id, movie_id FROM movie_links WHERE external_id IN ({placeholders})
+            ''', chunk)
+            for row in cursor.fetchall():
+                if (row['source'], row['external_id']) in wanted_links:
+                    links[(row['source'], row['external_id'])] = row['movie_id']
+
+        aliases: Dict[str, List[tuple]] = {}
+        keys = sorted(keys)
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f'''
+                SELECT title_key, movie_id, year FROM movie_aliases WHERE title_key IN ({placeholders})
+                ORDER BY movie_id
+            ''', chunk)
+            for row in cursor.fetchall():
+                aliases.setdefault(row['title_key'], []).append((row['movie_id'], row['year']))
+
+        # 候选电影已关联的外部ID，用于排除同名不同片
+        movie_sources: Dict[int, Dict[str, str]] = {}
+        candidates = sorted({movie_id for entries_ in aliases.values() for movie_id, _ in entries_})
+        for start in range(0, len(candidates), chunk_size):
+            chunk = candidates[start:start + chunk_size]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f'''
+                SELECT movie_id, source, external_id FROM movie_links WHERE movie_id IN ({placeholders})
+            ''', chunk)
+            for row in cursor.fetchall():
+                movie_sources.setdefault(row['movie_id'], {}).setdefault(row['source'], row['external_id'])
+
+        return BatchMatcher(links, aliases, movie_sources)
+
+    def _get_movie_ids(self, cursor: sqlite3.Cursor, titles: List[str],
+                       chunk_size: int = 500) -> Dict[str, int]:
+        """按标题批量查询电影ID"""
+        title_ids = {}
+        for start in range(0, len(titles), chunk_size):
+            chunk = titles[start:start + chunk_size]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f'SELECT id, title FROM movies WHERE title IN ({placeholders})', chunk)
+            for row in cursor.fetchall():
+                title_ids[row['title']] = row['id']
+        return title_ids
 
     def get_movie_by_id(self, movie_id: int) -> Optional[MovieWithReviews]:
         """根据ID获取电影详情"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
-            # 获取电影信息
-            cursor.execute('SELECT * FROM movies WHERE id = ?', (movie_id,))
+            # 获取电影信息，平均评分、热度和综合评分取自统计表，与列表页一致
+            cursor.execute('''
+                SELECT m.*, s.avg_score AS stats_avg_score, s.composite_score AS stats_composite_score,
+                       s.popularity AS stats_popularity
+                FROM movies m
+                LEFT JOIN movie_stats s ON s.movie_id = m.id
+                WHERE m.id = ?
+            ''', (movie_id,))
             movie_row = cursor.fetchone()
 
             if not movie_row:
                 return None
 
-            movie = Movie(
-                id=movie_row['id'],
-                title=movie_row['title'],
-                year=movie_row['year'],
-                description=movie_row['description'],
-                poster_url=movie_row['poster_url'],
-                created_at=datetime.fromisoformat(movie_row['created_at']) if movie_row['created_at'] else None,
-                updated_at=datetime.fromisoformat(movie_row['updated_at']) if movie_row['updated_at'] else None,
-            )
+            movie = self._row_to_movie(movie_row)
 
             # 获取影评信息
             cursor.execute('SELECT * FROM reviews WHERE movie_id = ?', (movie_id,))
             review_rows = cursor.fetchall()
 
-            reviews = []
-            total_score = 0
-            total_popularity = 0
-
-            for row in review_rows:
-                review = Review(
-                    id=row['id'],
-                    movie_id=row['movie_id'],
-                    source=row['source'],
-                    score=row['score'],
-                    votes=row['votes'],
-                    url=row['url'],
-                    popularity=row['popularity'] or 0,
-                    updated_at=datetime.fromisoformat(row['updated_at']) if row['updated_at'] else None,
-                )
-                reviews.append(review)
-                if review.score:
-                    total_score += review.score
-                total_popularity += review.popularity or 0
-
-            # 计算平均评分
-            avg_score = total_score / len(reviews) if reviews else 0
-
             return MovieWithReviews(
                 movie=movie,
-                reviews=reviews,
-                avg_score=avg_score,
-                popularity=total_popularity
+                reviews=[self._row_to_review(row) for row in review_rows],
+                avg_score=movie_row['stats_avg_score'] or 0,
+                popularity=movie_row['stats_popularity'] or 0,
+                composite_score=movie_row['stats_composite_score']
             )
 
     def search_movies(self, query: str = None, source: str = None,
                    min_score: float = None, sort_by: str = 'popularity',
-                   limit: int = 20) -> List[MovieWithReviews]:
-        """搜索电影"""
+                   limit: int = 20, cursor: str = None) -> List[MovieWithReviews]:
+        """
+        搜索电影
+
+        Args:
+            query: 关键词，匹配标题和简介（3 个字符以上走 FTS5 索引）
+            source: 数据源
+            min_score: 最低评分
+            sort_by: 排序方式 (popularity/score/votes/composite/relevance)
+            limit: 结果数量限制
+            cursor: 上一页返回的分页游标
+
+        Returns:
+            电影列表
+        """
+        return self.search_movies_page(query, source, min_score, sort_by, limit, cursor)[0]
+
+    def search_movies_page(self, query: str = None, source: str = None,
+                           min_score: float = None, sort_by: str = 'popularity',
+                           limit: int = 20, cursor: str = None, as_dict: bool = False
+                           ) -> Tuple[List[Any], Optional[str]]:
+        """
+        分页搜索电影
+
+        使用基于排序键 (排序列, 电影ID) 的游标分页，翻到任意深度都只需
+        从索引上的游标位置读取 limit 条，不会像 OFFSET 那样重新扫描前面的结果。
+
+        Args:
+            同 search_movies
+            as_dict: 直接返回响应格式的字典（与 MovieWithReviews.to_dict 相同），不创建模型对象
+
+        Returns:
+            (电影列表, 下一页游标)，没有更多结果时游标为 None
+
+        Raises:
+            ValueError: 游标无效
+        """
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            db_cursor = conn.cursor()
 
-            # 构建查询
-            sql = '''
-                SELECT m.*, 
-                       GROUP_CONCAT(
-                           json_object('source', r.source, 'score', r.score, 'votes', r.votes, 'url', r.url, 'popularity', r.popularity),
-                           ', '
-                       ) as reviews_json
-                FROM movies m
-                LEFT JOIN reviews r ON m.id = r.movie_id
-            '''
+            # 构建查询：从 movie_stats 按索引顺序读取前 N 条
+            joins = ''
             params = []
             conditions = []
 
-            if query:
-                conditions.append('m.title LIKE ?')
-                params.append(f'%{query}%')
+            fts_query = self._fts_query(query) if query else None
+            if fts_query:
+                joins = '''
+                JOIN (
+                    SELECT rowid AS movie_id, rank
+                    FROM movies_fts WHERE movies_fts MATCH ?
+                ) f ON f.movie_id = s.movie_id
+                '''
+                params.append(fts_query)
+            elif query:
+                conditions.append('(m.title LIKE ? OR m.description LIKE ? OR m.aliases LIKE ?)')
+                params.extend([f'%{query}%'] * 3)
 
+            # 数据源和评分条件要求同一条影评同时满足
+            review_conditions = []
             if source:
-                conditions.append('r.source = ?')
+                review_conditions.append('r.source = ?')
                 params.append(source)
 
             if min_score:
-                conditions.append('r.score >= ?')
+                review_conditions.append('r.score >= ?')
                 params.append(min_score)
 
-            if conditions:
-                sql += ' WHERE ' + ' AND '.join(conditions)
+            if review_conditions:
+                conditions.append(
+                    'EXISTS (SELECT 1 FROM reviews r WHERE r.movie_id = s.movie_id AND '
+                    + ' AND '.join(review_conditions) + ')'
+                )
 
-            sql += ' GROUP BY m.id'
+            # 排序：相关度按 rank 升序，其余按 movie_stats 排序键降序，电影ID作为唯一的次级键
+            # rank 上的比较条件会被 FTS5 当作排序函数配置，用一元加号阻止条件下推
+            if sort_by == 'relevance' and fts_query:
+                key_column, descending = '+f.rank', False
+            else:
+                sort_by = sort_by if sort_by in SORT_COLUMNS else 'popularity'
+                key_column, descending = SORT_COLUMNS[sort_by], True
 
-            # 排序
-            if sort_by == 'popularity':
-                sql += ' ORDER BY COALESCE(SUM(r.popularity), 0) DESC'
-            elif sort_by == 'score':
-                sql += ' ORDER BY AVG(r.score) DESC'
-            elif sort_by == 'votes':
-                sql += ' ORDER BY SUM(r.votes) DESC'
+            keyset = decode_cursor(cursor, sort_by) if cursor else None
+            movies, next_key = self._query_movies(db_cursor, joins, conditions, params, limit,
+                                                  key_column, descending, keyset, as_dict)
+            return movies, encode_cursor(sort_by, *next_key) if next_key else None
 
-            # 限制结果数量
-            sql += ' LIMIT ?'
-            params.append(limit)
+    def get_trending_movies(self, limit: int = 10, cursor: str = None) -> List[MovieWithReviews]:
+        """获取热度趋势排行"""
+        return self.get_trending_movies_page(limit, cursor)[0]
 
-            cursor.execute(sql, params)
-            rows = cursor.fetchall()
+    def get_trending_movies_page(self, limit: int = 10, cursor: str = None, as_dict: bool = False
+                                 ) -> Tuple[List[Any], Optional[str]]:
+        """
+        分页获取热度趋势排行
 
-            movies = []
-            for row in rows:
-                movie = Movie(
-                    id=row['id'],
-                    title=row['title'],
-                    year=row['year'],
-                    description=row['description'],
-                    poster_url=row['poster_url'],
-                    created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None,
-                    updated_at=datetime.fromisoformat(row['updated_at']) if row['updated_at'] else None,
-                )
+        按趋势引擎（trending.TrendingEngine）预先生成的前 K 名顺序读取；
+        还没有趋势数据（从未计算过，或近期没有热度增长）时按总热度排序。
+
+        Args:
+            limit: 每页数量
+            cursor: 上一页返回的分页游标
+            as_dict: 直接返回响应格式的字典
+
+        Returns:
+            (电影列表, 下一页游标)
+        """
+        with self.get_connection() as conn:
+            db_cursor = conn.cursor()
+            db_cursor.execute('SELECT 1 FROM trending_top LIMIT 1')
+            if db_cursor.fetchone() is None:
+                sort_by, joins, key_column, descending = 'popularity', '', SORT_COLUMNS['popularity'], True
+            else:
+                sort_by, joins, key_column, descending = \
+                    'trending', 'JOIN trending_top t ON t.movie_id = s.movie_id', 't.rank', False
+            keyset = decode_cursor(cursor, sort_by) if cursor else None
+            movies, next_key = self._query_movies(db_cursor, joins, [], [], limit,
+                                                  key_column, descending, keyset, as_dict)
+            return movies, encode_cursor(sort_by, *next_key) if next_key else None
+
+    def iter_export(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        按电影ID顺序流式导出全部电影及其影评
+
+        电影用一条查询配合 fetchmany 分批读取，每批的影评用一次 IN 查询读取，
+        内存占用只和 batch_size 有关，与数据总量无关。查询在整个导出期间保持打开，
+        导出结果是同一个快照。
+
+        Args:
+            batch_size: 每批读取的电影数量
+
+        Yields:
+            电影字典，reviews 字段为该电影的影评列表
+        """
+        with self.get_connection() as conn:
+            movie_cursor = conn.cursor()
+            movie_cursor.row_factory = None
+            movie_cursor.execute('''
+                SELECT id, title, year, description, poster_url, created_at, updated_at
+                FROM movies ORDER BY id
+            ''')
+            review_cursor = conn.cursor()
+
+            while True:
+                rows = movie_cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+
+                reviews_by_movie = self._get_reviews_by_movie(review_cursor, [row[0] for row in rows], as_dict=True)
+                for movie_id, title, year, description, poster_url, created_at, updated_at in rows:
+                    yield {
+                        'id': movie_id,
+                        'title': title,
+                        'year': year,
+                        'description': description,
+                        'poster_url': poster_url,
+                        'created_at': format_timestamp(created_at),
+                        'updated_at': format_timestamp(updated_at),
+                        'reviews': reviews_by_movie.get(movie_id, []),
+                    }
+
+    def _query_movies(self, cursor: sqlite3.Cursor, joins: str, conditions: List[str],
+                      params: List[Any], limit: int, key_column: str, descending: bool = True,
+                      keyset: Optional[Tuple[Any, int]] = None, as_dict: bool = False
+                      ) -> Tuple[List[Any], Optional[Tuple[Any, int]]]:
+        """
+        按排序键读取一页电影及其影评
+
+        先取出前 N 部电影，再用一次 IN 查询批量读取这些电影的影评。
+        给出游标位置时分两段读取：先读排序键与游标相同、电影ID更小的部分，
+        不足一页再读排序键之后的部分。两段都是索引上的定位查询，
+        页码再深也不需要扫描前面的结果。（行值比较 (key, id) < (?, ?) 在 SQLite 中
+        只能按第一列定位，排序键大量相同时会逐行扫描，所以不使用。）
+
+        Args:
+            cursor: 数据库游标
+            joins: 附加的 JOIN 子句
+            conditions: WHERE 条件
+            params: 查询参数，与 joins、conditions 中的占位符顺序一致
+            limit: 结果数量
+            key_column: 排序键表达式
+            descending: 排序键是否降序（电影ID总是降序）
+            keyset: 上一页最后一条的 (排序键, 电影ID)
+            as_dict: 直接返回响应格式的字典，不创建模型对象
 
-                # 解析影评JSON
-                reviews = []
-                scores = {}
-                total_score = 0
-                total_popularity = 0
-
-                if row['reviews_json']:
-                    import json
-                    try:
-                        reviews_data = json.loads(f'[{row["reviews_json"]}]')
-                        for r_data in reviews_data:
-                            if r_data:
-                                review = Review(
-                                    movie_id=row['id'],
-                                    source=r_data.get('source', ''),
-                                    score=r_data.get('score'),
-                                    votes=r_data.get('votes'),
-                                    url=r_data.get('url'),
-                                    popularity=r_data.get('popularity', 0),
-                                )
-                                reviews.append(review)
-                                if r_data.get('score'):
-                                    scores[r_data.get('source', '')] = r_data.get('score')
-                                    total_score += r_data.get('score', 0)
-                                total_popularity += r_data.get('popularity', 0)
-                    except (json.JSONDecodeError, TypeError):
-                        pass
-
-                avg_score = total_score / len(reviews) if reviews else 0
-
-                movies.append(MovieWithReviews(
-                    movie=movie,
-                    reviews=reviews,
-                    avg_score=avg_score,
-                    popularity=total_popularity
+        Returns:
+            (电影列表, 下一页起点的 (排序键, 电影ID))，没有更多结果时为 None
+        """
+        direction = 'DESC' if descending else 'ASC'
+        # 多读一行用于判断是否还有下一页
+        if keyset is None:
+            rows = self._fetch_movie_rows(cursor, joins, conditions, params, key_column,
+                                          f'{key_column} {direction}, s.movie_id DESC', limit + 1)
+        else:
+            value, movie_id = keyset
+            rows = self._fetch_movie_rows(cursor, joins, conditions + [f'{key_column} = ?', 's.movie_id < ?'],
+                                          params + [value, movie_id], key_column, 's.movie_id DESC', limit + 1)
+            if len(rows) <= limit:
+                after = f'{key_column} < ?' if descending else f'{key_column} > ?'
+                rows += self._fetch_movie_rows(cursor, joins, conditions + [after], params + [value], key_column,
+                                               f'{key_column} {direction}, s.movie_id DESC',
+                                               limit + 1 - len(rows))
+
+        next_key = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_key = (rows[-1]['sort_key'], rows[-1]['id']) if rows else None
+
+        reviews_by_movie = self._get_reviews_by_movie(cursor, [row['id'] for row in rows], as_dict=as_dict)
+
+        if as_dict:
+            return [self._movie_row_to_dict(row, reviews_by_movie.get(row['id'], [])) for row in rows], next_key
+
+        movies = [
+            MovieWithReviews(
+                movie=self._row_to_movie(row),
+                reviews=reviews_by_movie.get(row['id'], []),
+                avg_score=row['stats_avg_score'] or 0,
+                popularity=row['stats_popularity'] or 0,
+                composite_score=row['stats_composite_score']
+            )
+            for row in rows
+        ]
+        return movies, next_key
+
+    @staticmethod
+    def _fetch_movie_rows(cursor: sqlite3.Cursor, joins: str, conditions: List[str],
+                          params: List[Any], key_column: str, order_by: str,
+                          limit: int) -> List[sqlite3.Row]:
+        """从 movie_stats 按给定顺序读取电影行，sort_key 列为排序键"""
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        cursor.execute(f'''
+            SELECT m.*, s.avg_score AS stats_avg_score, s.composite_score AS stats_composite_score,
+                   s.popularity AS stats_popularity, {key_column} AS sort_key
+            FROM movie_stats s
+            JOIN movies m ON m.id = s.movie_id
+            {joins}
+            {where}
+            ORDER BY {order_by}
+            LIMIT ?
+        ''', params + [limit])
+        return cursor.fetchall()
+
+    def _get_reviews_by_movie(self, cursor: sqlite3.Cursor, movie_ids: List[int],
+                              chunk_size: int = 500, as_dict: bool = False) -> Dict[int, List[Any]]:
+        """批量读取多部电影的影评，按电影ID分组；as_dict 为 True 时直接返回 Review.to_dict 格式的字典"""
+        # 使用元组行而不是 sqlite3.Row，按位置直接映射到 Review
+        review_cursor = cursor.connection.cursor()
+        review_cursor.row_factory = None
+
+        reviews_by_movie: Dict[int, List[Review]] = {}
+        for start in range(0, len(movie_ids), chunk_size):
+            chunk = movie_ids[start:start + chunk_size]
+            placeholders = ', '.join('?' * len(chunk))
+            review_cursor.execute(f'''
+                SELECT id, movie_id, source, score, votes, url, popularity, updated_at
+                FROM reviews WHERE movie_id IN ({placeholders})
+            ''', chunk)
+            if as_dict:
+                for review_id, movie_id, source, score, votes, url, popularity, updated_at in review_cursor:
+                    reviews_by_movie.setdefault(movie_id, []).append({
+                        'id': review_id,
+                        'movie_id': movie_id,
+                        'source': source,
+                        'score': score,
+                        'votes': votes,
+                        'url': url,
+                        'popularity': popularity or 0,
+                        'updated_at': format_timestamp(updated_at),
+                    })
+                continue
+            for review_id, movie_id, source, score, votes, url, popularity, updated_at in review_cursor:
+                reviews_by_movie.setdefault(movie_id, []).append(Review(
+                    id=review_id,
+                    movie_id=movie_id,
+                    source=source,
+                    score=score,
+                    votes=votes,
+                    url=url,
+                    popularity=popularity or 0,
+                    updated_at=updated_at,
                 ))
+        return reviews_by_movie
+
+    @staticmethod
+    def _row_to_movie(row: sqlite3.Row) -> Movie:
+        """数据库行转换为 Movie"""
+        return Movie(
+            id=row['id'],
+            title=row['title'],
+            year=row['year'],
+            description=row['description'],
+            poster_url=row['poster_url'],
+            created_at=row['created_at'],
+            updated_at=row['updated_at'],
+        )
+
+    @staticmethod
+    def _movie_row_to_dict(row: sqlite3.Row, reviews: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """电影行和影评字典直接转换为响应格式，与 MovieWithReviews.to_dict 的结果相同"""
+        return {
+            'id': row['id'],
+            'title': row['title'],
+            'year': row['year'],
+            'description': row['description'],
+            'poster_url': row['poster_url'],
+            'created_at': format_timestamp(row['created_at']),
+            'updated_at': format_timestamp(row['updated_at']),
+            'scores': {review['source']: review['score'] for review in reviews if review['score'] is not None},
+            'avg_score': row['stats_avg_score'] or 0,
+            'composite_score': row['stats_composite_score'],
+            'popularity': row['stats_popularity'] or 0,
+            'reviews': reviews,
+        }
+
+    @staticmethod
+    def _row_to_review(row: sqlite3.Row) -> Review:
+        """数据库行转换为 Review"""
+        return Review(
+            id=row['id'],
+            movie_id=row['movie_id'],
+            source=row['source'],
+            score=row['score'],
+            votes=row['votes'],
+            url=row['url'],
+            popularity=row['popularity'] or 0,
+            updated_at=row['updated_at'],
+        )
 
-            return movies
+    def enqueue_crawl_job(self, source: str, query: str = '', limit: int = 20,
+                          sources_total: int = 1) -> int:
+        """
+        添加爬取任务
 
-    def get_trending_movies(self, limit: int = 10) -> List[MovieWithReviews]:
-        """获取热度排行"""
+        Args:
+            source: 数据源名称，all 表示所有数据源
+            query: 搜索关键词
+            limit: 每个数据源的爬取数量
+            sources_total: 任务涉及的数据源数量，用于计算进度
+
+        Returns:
+            任务ID
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            now = datetime.now().isoformat()
+            cursor.execute('''
+                INSERT INTO crawl_jobs (source, query, limit_count, sources_total, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (source, query, limit, sources_total, now, now))
+            conn.commit()
+            return cursor.lastrowid
 
-            sql = '''
-                SELECT m.*, 
-                       GROUP_CONCAT(
-                           json_object('source', r.source, 'score', r.score, 'votes', r.votes, 'url', r.url, 'popularity', r.popularity),
-                           ', '
-                       ) as reviews_json
-                FROM movies m
-                LEFT JOIN reviews r ON m.id = r.movie_id
-                GROUP BY m.id
-                ORDER BY COALESCE(SUM(r.popularity), 0) DESC
-                LIMIT ?
-            '''
+    def claim_crawl_job(self) -> Optional[CrawlJob]:
+        """
+        取出最早的待执行任务并标记为执行中
 
-            cursor.execute(sql, (limit,))
-            rows = cursor.fetchall()
+        使用 BEGIN IMMEDIATE 保证多个进程/线程不会领取同一个任务。
 
-            movies = []
-            for row in rows:
-                movie = Movie(
-                    id=row['id'],
-                    title=row['title'],
-                    year=row['year'],
-                    description=row['description'],
-                    poster_url=row['poster_url'],
-                    created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None,
-                    updated_at=datetime.fromisoformat(row['updated_at']) if row['updated_at'] else None,
-                )
+        Returns:
+            任务，队列为空时返回 None
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                SELECT id FROM crawl_jobs WHERE status = 'pending' ORDER BY id LIMIT 1
+            ''')
+            row = cursor.fetchone()
+            if not row:
+                conn.rollback()
+                return None
 
-                # 解析影评JSON
-                reviews = []
-                scores = {}
-                total_score = 0
-                total_popularity = 0
-
-                if row['reviews_json']:
-                    import json
-                    try:
-                        reviews_data = json.loads(f'[{row["reviews_json"]}]')
-                        for r_data in reviews_data:
-                            if r_data:
-                                review = Review(
-                                    movie_id=row['id'],
-                                    source=r_data.get('source', ''),
-                                    score=r_data.get('score'),
-                                    votes=r_data.get('votes'),
-                                    url=r_data.get('url'),
-                                    popularity=r_data.get('popularity', 0),
-                                )
-                                reviews.append(review)
-                                if r_data.get('score'):
-                                    scores[r_data.get('source', '')] = r_data.get('score')
-                                    total_score += r_data.get('score', 0)
-                                total_popularity += r_data.get('popularity', 0)
-                    except (json.JSONDecodeError, TypeError):
-                        pass
-
-                avg_score = total_score / len(reviews) if reviews else 0
-
-                movies.append(MovieWithReviews(
-                    movie=movie,
-                    reviews=reviews,
-                    avg_score=avg_score,
-                    popularity=total_popularity
-                ))
+            now = datetime.now().isoformat()
+            cursor.execute('''
+                UPDATE crawl_jobs SET status = 'running', started_at = ?, updated_at = ?
+                WHERE id = ?
+            ''', (now, now, row['id']))
+            conn.commit()
+            return self.get_crawl_job(row['id'])
+
+    def update_crawl_job(self, job_id: int, **fields):
+        """
+        更新任务状态和进度
+
+        Args:
+            job_id: 任务ID
+            fields: 要更新的字段（status/sources_done/total/saved/error/finished_at）
+        """
+        allowed = {'status', 'sources_done', 'total', 'saved', 'error', 'finished_at'}
+        columns = [name for name in fields if name in allowed]
+        if not columns:
+            return
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            assignments = ', '.join(f'{name} = ?' for name in columns)
+            params = [fields[name] for name in columns]
+            params.extend([datetime.now().isoformat(), job_id])
+            cursor.execute(f'UPDATE crawl_jobs SET {assignments}, updated_at = ? WHERE id = ?', params)
+            conn.commit()
+
+    def get_crawl_job(self, job_id: int) -> Optional[CrawlJob]:
+        """根据ID获取爬取任务"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM crawl_jobs WHERE id = ?', (job_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+
+            def parse_time(value):
+                return datetime.fromisoformat(value) if value else None
+
+            return CrawlJob(
+                id=row['id'],
+                source=row['source'],
+                query=row['query'],
+                limit=row['limit_count'],
+                status=row['status'],
+                sources_total=row['sources_total'],
+                sources_done=row['sources_done'],
+                total=row['total'],
+                saved=row['saved'],
+                error=row['error'],
+                created_at=parse_time(row['created_at']),
+                started_at=parse_time(row['started_at']),
+                finished_at=parse_time(row['finished_at']),
+            )
+
+    def requeue_stale_crawl_jobs(self, timeout_seconds: int = 600) -> int:
+        """
+        将长时间没有进度的执行中任务重新放回队列（进程崩溃后恢复）
 
-            return movies
+        Args:
+            timeout_seconds: 超过该时间没有更新的任务视为已失联
+
+        Returns:
+            重新入队的任务数
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cutoff = (datetime.now() - timedelta(seconds=timeout_seconds)).isoformat()
+            cursor.execute('''
+                UPDATE crawl_jobs SET status = 'pending', sources_done = 0, total = 0, saved = 0
+                WHERE status = 'running' AND updated_at < ?
+            ''', (cutoff,))
+            conn.commit()
+            return cursor.rowcount
 
     def get_sources(self) -> List[str]:
         """获取可用的数据源"""
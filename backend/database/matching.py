@@ -0,0 +1,189 @@
+# 跨数据源电影匹配（实体解析）
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+# 各数据源详情页 URL 中的外部ID
+EXTERNAL_ID_PATTERNS = {
+    'douban': re.compile(r'douban\.com/subject/(\d+)'),
+    'imdb': re.compile(r'imdb\.com/title/(tt\d+)'),
+    'rotten_tomatoes': re.compile(r'rottentomatoes\.com/m/([^/?#]+)'),
+}
+
+# 同一部电影在不同数据源的年份可能相差一年（上映地区、首映与公映）
+YEAR_TOLERANCE = 1
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """
+    生成标题匹配键
+
+    NFKC 规范化（全角转半角）、忽略大小写，并去掉标点和空白，
+    "你的名字。"、"你的名字" 和 "Your Name." / "your name" 分别得到相同的键。
+
+    Args:
+        title: 原始标题
+
+    Returns:
+        匹配键，标题为空时返回空字符串
+    """
+    if not title:
+        return ''
+    title = unicodedata.normalize('NFKC', title).casefold()
+    return ''.join(ch for ch in title if ch.isalnum())
+
+
+def extract_external_ids(data: Dict[str, Any], source: Optional[str] = None) -> List[Tuple[str, str]]:
+    """
+    提取数据项关联的外部ID
+
+    包括数据项自身 URL 中的ID，以及爬虫解析到的其他数据源ID（external_ids 字段，
+    如豆瓣详情页上的 IMDb 编号）。
+
+    Args:
+        data: 标准化后的数据项
+        source: 数据项的数据源
+
+    Returns:
+        (数据源, 外部ID) 列表
+    """
+    ids = []
+    pattern = EXTERNAL_ID_PATTERNS.get(source)
+    if pattern and data.get('url'):
+        match = pattern.search(data['url'])
+        if match:
+            ids.append((source, match.group(1)))
+    for other_source, external_id in (data.get('external_ids') or {}).items():
+        if external_id and (other_source, str(external_id)) not in ids:
+            ids.append((other_source, str(external_id)))
+    return ids
+
+
+def years_compatible(a: Optional[int], b: Optional[int]) -> bool:
+    """年份相差不超过容差；任一方缺失年份时视为兼容"""
+    return a is None or b is None or abs(a - b) <= YEAR_TOLERANCE
+
+
+class BatchMatcher:
+    """
+    一批数据项的匹配器
+
+    数据库中已有电影的阻塞索引（外部ID -> 电影ID，标题键 -> [(电影ID, 年份)]）由调用方
+    按本批出现的键批量查出后传入，每个数据项只需几次字典查找，整体复杂度与数据量成线性。
+    同一批次内尚未入库的数据项之间也会互相匹配，匹配到同一组的数据项使用组内第一个标题。
+    """
+
+    def __init__(self, links: Dict[Tuple[str, str], int],
+                 aliases: Dict[str, List[Tuple[int, Optional[int]]]],
+                 movie_sources: Dict[int, Dict[str, str]]):
+        """
+        Args:
+            links: 已有的外部ID索引
+            aliases: 已有的标题键索引
+            movie_sources: 候选电影已关联的 {数据源: 外部ID}，用于排除同名不同片
+        """
+        self.links = links
+        self.aliases = aliases
+        self.movie_sources = movie_sources
+        # 本批次新电影：以组内第一个标题作为组标识
+        self._pending_links: Dict[Tuple[str, str], str] = {}
+        self._pending_aliases: Dict[str, List[Tuple[str, Optional[int]]]] = {}
+        self._pending_sources: Dict[str, Dict[str, str]] = {}
+
+    def match(self, key: str, year: Optional[int],
+              external_ids: List[Tuple[str, str]]) -> Tuple[Optional[int], Optional[str]]:
+        """
+        匹配一个数据项
+
+        依次按外部ID、标题键加年份匹配已有电影，再匹配本批次的新电影。
+
+        Args:
+            key: 标题匹配键
+            year: 年份
+            external_ids: 外部ID列表
+
+        Returns:
+            (已有电影ID, 本批次新电影的组标题)，都没有匹配时均为 None
+        """
+        for link in external_ids:
+            if link in self.links:
+                return self.links[link], None
+        for link in external_ids:
+            if link in self._pending_links:
+                return None, self._pending_links[link]
+
+        if key:
+            for movie_id, movie_year in self.aliases.get(key, []):
+                if years_compatible(year, movie_year) and \
+                        not self._conflicts(self.movie_sources.get(movie_id, {}), external_ids):
+                    return movie_id, None
+            for group, group_year in self._pending_aliases.get(key, []):
+                if years_compatible(year, group_year) and \
+                        not self._conflicts(self._pending_sources.get(group, {}), external_ids):
+                    return None, group
+
+        return None, None
+
+    def add_existing(self, movie_id: int, key: str, year: Optional[int], external_ids: List[Tuple[str, str]]):
+        """登记匹配到已有电影的数据项，本批次后续数据项可以通过它的外部ID和标题匹配"""
+        for link in external_ids:
+            self.links.setdefault(link, movie_id)
+            self.movie_sources.setdefault(movie_id, {}).setdefault(*link)
+        if key:
+            entries = self.aliases.setdefault(key, [])
+            if all(existing != movie_id for existing, _ in entries):
+                entries.append((movie_id, year))
+
+    def add(self, group: str, key: str, year: Optional[int], external_ids: List[Tuple[str, str]]):
+        """登记本批次的新电影（或新电影组的新成员），供后续数据项匹配"""
+        for link in external_ids:
+            self._pending_links.setdefault(link, group)
+            self._pending_sources.setdefault(group, {}).setdefault(*link)
+        if key:
+            entries = self._pending_aliases.setdefault(key, [])
+            if all(existing != group for existing, _ in entries):
+                entries.append((group, year))
+
+    @staticmethod
+    def _conflicts(known: Dict[str, str], external_ids: List[Tuple[str, str]]) -> bool:
+        """同一数据源已关联了不同的外部ID，说明是同名的另一部电影（如翻拍）"""
+        return any(source in known and known[source] != external_id for source, external_id in external_ids)
+
+
+def collect_keys(items: List[Tuple[str, Optional[int], List[Tuple[str, str]]]]) -> Tuple[Set[str], Set[Tuple[str, str]]]:
+    """汇总一批数据项的标题键和外部ID，用于批量查询阻塞索引"""
+    keys = {key for key, _, _ in items if key}
+    links = {link for _, _, external_ids in items for link in external_ids}
+    return keys, links
+
+
+def cluster_duplicates(members: List[Tuple[int, Optional[int]]],
+                       movie_sources: Dict[int, Dict[str, str]]) -> List[List[int]]:
+    """
+    把同一标题键下的已有电影分组，每组是同一部电影的重复记录
+
+    按电影ID顺序依次放入第一个兼容的组：年份与组内所有电影相差不超过容差，
+    且同一数据源没有关联不同的外部ID。
+
+    Args:
+        members: 同一标题键下的 (电影ID, 年份)
+        movie_sources: 电影已关联的 {数据源: 外部ID}
+
+    Returns:
+        电影ID分组，只包含两部及以上电影的组，组内第一个为最早入库的电影
+    """
+    clusters: List[Tuple[List[int], List[Optional[int]], Dict[str, str]]] = []
+    for movie_id, year in sorted(members):
+        sources = movie_sources.get(movie_id, {})
+        for ids, years, known in clusters:
+            if all(years_compatible(year, other) for other in years) and \
+                    not BatchMatcher._conflicts(known, list(sources.items())):
+                ids.append(movie_id)
+                years.append(year)
+                for source, external_id in sources.items():
+                    known.setdefault(source, external_id)
+                break
+        else:
+            clusters.append(([movie_id], [year], dict(sources)))
+    return [ids for ids, _, _ in clusters if len(ids) > 1]
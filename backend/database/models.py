@@ -1,19 +1,91 @@
 # 数据模型定义
 from dataclasses import dataclass
-from typing import Optional, Dict
+from typing import Optional, Tuple, Union
 from datetime import datetime
 
 
-@dataclass
-class Movie:
+def format_timestamp(value) -> Optional[str]:
+    """
+    把时间戳格式化为 ISO 8601 字符串
+
+    数据库中的时间戳是 'YYYY-MM-DD[T ]HH:MM:SS[.ffffff]' 格式的字符串（isoformat 写入或
+    CURRENT_TIMESTAMP 默认值），直接统一分隔符为 'T'，结果与
+    datetime.fromisoformat(value).isoformat() 相同，但不需要解析。
+
+    Args:
+        value: datetime、数据库中的时间戳字符串或 None
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if len(value) in (19, 26) and value[10] in ' T':
+        return value if value[10] == 'T' else value[:10] + 'T' + value[11:]
+    return datetime.fromisoformat(value).isoformat()
+
+
+class LazyTimestamp:
+    """
+    延迟解析的时间戳属性
+
+    槽中保存数据库原始字符串，第一次读取属性时才解析为 datetime（结果写回槽中）。
+    序列化（to_dict）直接使用原始字符串，大多数请求完全不需要解析时间。
+    """
+
+    def __init__(self, slot: str):
+        self.slot = slot
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = getattr(instance, self.slot)
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+            setattr(instance, self.slot, value)
+        return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.slot, value)
+
+
+class SlotsModel:
+    """
+    使用 __slots__ 的数据模型基类
+
+    实例没有 __dict__，每行数据占用的内存更少。子类在 _fields 中列出字段，
+    提供与 dataclass 相同的 __repr__ 和 __eq__。
+    """
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self._fields)
+        return f'{type(self).__name__}({fields})'
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._fields)
+
+
+class Movie(SlotsModel):
     """电影数据模型"""
-    id: Optional[int] = None
-    title: str = ""
-    year: Optional[int] = None
-    description: Optional[str] = None
-    poster_url: Optional[str] = None
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
+    __slots__ = ('id', 'title', 'year', 'description', 'poster_url', '_created_at', '_updated_at')
+    _fields = ('id', 'title', 'year', 'description', 'poster_url', 'created_at', 'updated_at')
+
+    created_at = LazyTimestamp('_created_at')
+    updated_at = LazyTimestamp('_updated_at')
+
+    def __init__(self, id: Optional[int] = None, title: str = "", year: Optional[int] = None,
+                 description: Optional[str] = None, poster_url: Optional[str] = None,
+                 created_at: Union[datetime, str, None] = None, updated_at: Union[datetime, str, None] = None):
+        self.id = id
+        self.title = title
+        self.year = year
+        self.description = description
+        self.poster_url = poster_url
+        self._created_at = created_at
+        self._updated_at = updated_at
 
     def to_dict(self):
         """转换为字典"""
@@ -23,22 +95,29 @@ class Movie:
             'year': self.year,
             'description': self.description,
             'poster_url': self.poster_url,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'created_at': format_timestamp(self._created_at),
+            'updated_at': format_timestamp(self._updated_at),
         }
 
 
-@dataclass
-class Review:
+class Review(SlotsModel):
     """影评数据模型"""
-    id: Optional[int] = None
-    movie_id: int = 0
-    source: str = ""
-    score: Optional[float] = None
-    votes: Optional[int] = None
-    url: Optional[str] = None
-    popularity: int = 0
-    updated_at: Optional[datetime] = None
+    __slots__ = ('id', 'movie_id', 'source', 'score', 'votes', 'url', 'popularity', '_updated_at')
+    _fields = ('id', 'movie_id', 'source', 'score', 'votes', 'url', 'popularity', 'updated_at')
+
+    updated_at = LazyTimestamp('_updated_at')
+
+    def __init__(self, id: Optional[int] = None, movie_id: int = 0, source: str = "",
+                 score: Optional[float] = None, votes: Optional[int] = None, url: Optional[str] = None,
+                 popularity: int = 0, updated_at: Union[datetime, str, None] = None):
+        self.id = id
+        self.movie_id = movie_id
+        self.source = source
+        self.score = score
+        self.votes = votes
+        self.url = url
+        self.popularity = popularity
+        self._updated_at = updated_at
 
     def to_dict(self):
         """转换为字典"""
@@ -50,29 +129,74 @@ class Review:
             'votes': self.votes,
             'url': self.url,
             'popularity': self.popularity,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'updated_at': format_timestamp(self._updated_at),
         }
 
 
-@dataclass
-class MovieWithReviews:
+class MovieWithReviews(SlotsModel):
     """带影评的电影数据模型"""
-    movie: Movie
-    reviews: list
-    avg_score: float = 0.0
-    popularity: int = 0
+    __slots__ = ('movie', 'reviews', 'avg_score', 'popularity', 'composite_score')
+    _fields = __slots__
+
+    def __init__(self, movie: Movie, reviews: list, avg_score: float = 0.0, popularity: int = 0,
+                 composite_score: Optional[float] = None):
+        self.movie = movie
+        self.reviews = reviews
+        self.avg_score = avg_score
+        self.popularity = popularity
+        self.composite_score = composite_score
 
     def to_dict(self):
         """转换为字典"""
         scores = {}
+        reviews = []
         for review in self.reviews:
             if review.score is not None:
                 scores[review.source] = review.score
+            reviews.append(review.to_dict())
 
         return {
             **self.movie.to_dict(),
             'scores': scores,
             'avg_score': self.avg_score,
+            'composite_score': self.composite_score,
             'popularity': self.popularity,
-            'reviews': [r.to_dict() for r in self.reviews],
+            'reviews': reviews,
+        }
+
+
+@dataclass
+class CrawlJob:
+    """爬取任务数据模型"""
+    id: Optional[int] = None
+    source: str = ""
+    query: str = ""
+    limit: int = 20
+    status: str = "pending"
+    sources_total: int = 0
+    sources_done: int = 0
+    total: int = 0
+    saved: int = 0
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'source': self.source,
+            'query': self.query,
+            'limit': self.limit,
+            'status': self.status,
+            'progress': self.sources_done / self.sources_total if self.sources_total else 0.0,
+            'sources_total': self.sources_total,
+            'sources_done': self.sources_done,
+            'total': self.total,
+            'saved': self.saved,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
         }
@@ -0,0 +1,229 @@
+# 综合评分：各数据源评分标准化后按投票数加权，并向全站均值收缩（贝叶斯平均）
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+from utils.helpers import normalize_score
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+# 各数据源评分的满分（烂番茄 meterScore 在解析时已经除以 10）
+SOURCE_SCALES = {
+    'douban': 10.0,
+    'imdb': 10.0,
+    'rotten_tomatoes': 10.0,
+}
+
+# score_params 表中全部数据源合计参数的键
+GLOBAL_SOURCE = ''
+
+
+class ScoreParams(NamedTuple):
+    """一个数据源的评分分布参数"""
+    mean: float
+    std: float
+    vote_median: float
+    reviews: int
+
+
+def _columns(batches: Iterable[List[tuple]]) -> Tuple[List[int], List[str], List[float], List[float]]:
+    """把 (电影ID, 数据源, 评分, 投票数) 行转换为四列，评分换算到 10 分制，投票数缺失记为 0"""
+    movie_ids, sources, scores, votes = [], [], [], []
+    for rows in batches:
+        for movie_id, source, score, vote in rows:
+            movie_ids.append(movie_id)
+            sources.append(source)
+            scores.append(normalize_score(max(score, 0.0), SOURCE_SCALES.get(source, 10.0)))
+            votes.append(float(vote or 0))
+    return movie_ids, sources, scores, votes
+
+
+def compute_params(sources: List[str], scores: List[float], votes: List[float]) -> Dict[str, ScoreParams]:
+    """
+    计算各数据源（以及全部数据源合计）的评分均值、标准差和投票数中位数
+
+    Args:
+        sources: 每条影评的数据源
+        scores: 每条影评 10 分制的评分
+        votes: 每条影评的投票数
+
+    Returns:
+        数据源到参数的映射，GLOBAL_SOURCE 为合计
+    """
+    if HAS_NUMPY:
+        codes, names = _encode_sources(sources)
+        score_array = np.asarray(scores, dtype=np.float64)
+        vote_array = np.asarray(votes, dtype=np.float64)
+        groups = [(name, codes == code) for code, name in enumerate(names)]
+        groups.append((GLOBAL_SOURCE, slice(None)))
+        params = {}
+        for name, mask in groups:
+            group_scores = score_array[mask]
+            group_votes = vote_array[mask]
+            group_votes = group_votes[group_votes > 0]
+            params[name] = ScoreParams(
+                mean=float(group_scores.mean()),
+                std=float(group_scores.std()),
+                vote_median=float(np.median(group_votes)) if len(group_votes) else 1.0,
+                reviews=int(len(group_scores)),
+            )
+        return params
+
+    grouped: Dict[str, Tuple[List[float], List[float]]] = {}
+    for source, score, vote in zip(sources, scores, votes):
+        for name in (source, GLOBAL_SOURCE):
+            group_scores, group_votes = grouped.setdefault(name, ([], []))
+            group_scores.append(score)
+            if vote > 0:
+                group_votes.append(vote)
+
+    params = {}
+    for name, (group_scores, group_votes) in grouped.items():
+        mean = sum(group_scores) / len(group_scores)
+        std = math.sqrt(sum((score - mean) ** 2 for score in group_scores) / len(group_scores))
+        params[name] = ScoreParams(mean, std, _median(group_votes) if group_votes else 1.0, len(group_scores))
+    return params
+
+
+def composite_scores(movie_ids: List[int], sources: List[str], scores: List[float], votes: List[float],
+                     params: Dict[str, ScoreParams], prior: float = 1.0) -> List[Tuple[int, float]]:
+    """
+    计算每部电影的综合评分
+
+    1. 标准化：每条评分先换算为所在数据源内的 z 分数，再按全站均值和标准差换回 10 分制，
+       消除不同数据源打分松紧的差异（烂番茄新鲜度普遍偏高、豆瓣偏低）；
+    2. 加权：权重为 log2(1 + 投票数 / 该数据源投票数中位数)，投票数为中位数时权重为 1，
+       对数增长使单个数据源的超高投票数不会完全压过其他数据源；
+    3. 收缩：(Σ 权重 × 评分 + prior × 全站均值) / (Σ 权重 + prior)，
+       投票少的电影向全站均值靠拢，不会凭几个高分排到前面。
+
+    参数中没有的数据源按全部数据源合计的参数处理。
+
+    Args:
+        movie_ids: 每条影评的电影ID
+        sources: 每条影评的数据源
+        scores: 每条影评 10 分制的评分
+        votes: 每条影评的投票数
+        params: compute_params 的结果
+        prior: 先验权重，相当于一条投票数为中位数的全站平均评分
+
+    Returns:
+        [(电影ID, 综合评分)]，评分保留三位小数
+    """
+    overall = params[GLOBAL_SOURCE]
+    if HAS_NUMPY:
+        codes, names = _encode_sources(sources)
+        table = np.array([params.get(name, overall)[:3] for name in names], dtype=np.float64).reshape(-1, 3)
+        mean, std, median = table[codes, 0], table[codes, 1], table[codes, 2]
+
+        score_array = np.asarray(scores, dtype=np.float64)
+        z = np.divide(score_array - mean, std, out=np.zeros_like(score_array), where=std > 0)
+        adjusted = np.clip(overall.mean + z * overall.std, 0.0, 10.0)
+        weights = np.log2(1.0 + np.maximum(np.asarray(votes, dtype=np.float64), 1.0) / median)
+
+        unique_ids, inverse = np.unique(np.asarray(movie_ids, dtype=np.int64), return_inverse=True)
+        weighted_sum = np.bincount(inverse, weights=weights * adjusted)
+        weight_total = np.bincount(inverse, weights=weights)
+        result = np.round((weighted_sum + prior * overall.mean) / (weight_total + prior), 3)
+        return list(zip(unique_ids.tolist(), result.tolist()))
+
+    totals: Dict[int, List[float]] = {}
+    for movie_id, source, score, vote in zip(movie_ids, sources, scores, votes):
+        mean, std, median, _ = params.get(source, overall)
+        z = (score - mean) / std if std > 0 else 0.0
+        adjusted = min(max(overall.mean + z * overall.std, 0.0), 10.0)
+        weight = math.log2(1.0 + max(vote, 1.0) / median)
+        total = totals.setdefault(movie_id, [0.0, 0.0])
+        total[0] += weight * adjusted
+        total[1] += weight
+    return [(movie_id, round((weighted_sum + prior * overall.mean) / (weight_total + prior), 3))
+            for movie_id, (weighted_sum, weight_total) in sorted(totals.items())]
+
+
+def _encode_sources(sources: List[str]) -> Tuple['np.ndarray', List[str]]:
+    """数据源名称编码为整数数组"""
+    names: Dict[str, int] = {}
+    codes = np.fromiter((names.setdefault(source, len(names)) for source in sources),
+                        dtype=np.int32, count=len(sources))
+    return codes, list(names)
+
+
+def _median(values: List[float]) -> float:
+    """中位数"""
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+class ScoreEngine:
+    """
+    综合评分引擎
+
+    综合评分写入 movie_stats.composite_score，按 idx_stats_composite 索引顺序分页排序。
+    每次爬取后调用 update：只读取变更日志中新变更的电影，沿用已保存的数据源参数重算，
+    写入量与本次变更的电影数成正比，与电影总数无关。首次运行、统计表被全量重算，
+    或参数计算之后变更过的电影超过 refresh_ratio 时，重新计算参数并全量重算。
+    """
+
+    def __init__(self, prior: float = 1.0, refresh_ratio: float = 0.1, batch_size: int = 100000):
+        """
+        Args:
+            prior: 先验权重，见 composite_scores
+            refresh_ratio: 参数计算之后变更过的电影占比超过该值时全量重算
+            batch_size: 全量读取影评时每批的行数
+        """
+        self.prior = prior
+        self.refresh_ratio = refresh_ratio
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+
+    def update(self, db, full: bool = False) -> Dict[str, Any]:
+        """
+        重算变更过的电影的综合评分
+
+        Args:
+            db: Database 实例
+            full: 是否强制全量重算
+
+        Returns:
+            mode（full/incremental/none）、movies（重算的电影数）、changed（综合评分变化的电影数）和 seconds
+        """
+        with self._lock:
+            start = time.perf_counter()
+            state = db.get_score_state()
+            full = (full or state['scored_seq'] is None or GLOBAL_SOURCE not in state['params']
+                    or state['drift'] > state['movies'] * self.refresh_ratio)
+
+            if full:
+                movie_ids, sources, scores, votes = _columns(db.iter_review_scores(batch_size=self.batch_size))
+                if not scores:
+                    changed = db.save_scores([], state['seq'], params={})
+                    return self._result('full', 0, changed, start)
+                params = compute_params(sources, scores, votes)
+                results = composite_scores(movie_ids, sources, scores, votes, params, self.prior)
+                changed = db.save_scores(results, state['seq'],
+                                         params={name: tuple(values) for name, values in params.items()})
+                return self._result('full', len(results), changed, start)
+
+            if not state['pending']:
+                return self._result('none', 0, 0, start)
+
+            changed_ids = db.get_changed_movie_ids(state['scored_seq'])
+            params = {name: ScoreParams(*values) for name, values in state['params'].items()}
+            movie_ids, sources, scores, votes = _columns(db.iter_review_scores(changed_ids))
+            results = composite_scores(movie_ids, sources, scores, votes, params, self.prior) if scores else []
+            # 变更后已经没有评分（或已删除）的电影清空综合评分
+            scored = {movie_id for movie_id, _ in results}
+            results.extend((movie_id, None) for movie_id in changed_ids if movie_id not in scored)
+            changed = db.save_scores(results, state['seq'])
+            return self._result('incremental', len(changed_ids), changed, start)
+
+    @staticmethod
+    def _result(mode: str, movies: int, changed: int, start: float) -> Dict[str, Any]:
+        return {'mode': mode, 'movies': movies, 'changed': changed,
+                'seconds': round(time.perf_counter() - start, 3)}
@@ -0,0 +1,402 @@
+# 搜索建议前缀索引：按标题前缀（中文标题还支持拼音全拼和首字母）查找热门电影
+import bisect
+import heapq
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .matching import normalize_title
+
+try:
+    from pypinyin import lazy_pinyin
+    HAS_PINYIN = True
+except ImportError:
+    HAS_PINYIN = False
+
+
+# 大于任何标题字符，prefix + _MAX_CHAR 是所有以 prefix 开头的键的上界
+_MAX_CHAR = '\U0010ffff'
+
+
+# 中日韩统一表意文字（基本区和扩展 A 区）
+_CJK_RE = re.compile('[\u3400-\u4dbf\u4e00-\u9fff]')
+
+
+class _PinyinTable(dict):
+    """
+    str.translate 使用的转换表：汉字转换为不带声调的拼音（或拼音首字母），其他字符不变
+
+    首次遇到的字符才查询 pypinyin，多音字取 pypinyin 字典中的第一个读音。
+    """
+
+    def __init__(self, initials: bool = False):
+        super().__init__()
+        self.initials = initials
+
+    def __missing__(self, code: int) -> str:
+        ch = chr(code)
+        if _CJK_RE.match(ch):
+            syllable = lazy_pinyin(ch)[0]
+            ch = syllable[0] if self.initials else syllable
+        self[code] = ch
+        return ch
+
+
+_FULL_PINYIN = _PinyinTable()
+_PINYIN_INITIALS = _PinyinTable(initials=True)
+
+
+def suggest_keys(title: Optional[str]) -> List[str]:
+    """
+    生成标题的前缀匹配键
+
+    包括标题匹配键（matching.normalize_title），安装了 pypinyin 时中文标题再加上
+    拼音全拼和拼音首字母，"你的名字" 的键为 你的名字 / nidemingzi / ndmz。
+    拼音按单字查表，不做词组消歧（"长城" 得到 zhangcheng）：按词组转换每个标题约需 0.1ms，
+    百万部电影的索引构建太慢；查表只需要一次 str.translate。
+
+    Args:
+        title: 原始标题
+
+    Returns:
+        去重后的键列表，标题为空时返回空列表
+    """
+    key = normalize_title(title)
+    if not key:
+        return []
+    keys = [key]
+    if HAS_PINYIN and _CJK_RE.search(key):
+        for extra in (key.translate(_FULL_PINYIN), key.translate(_PINYIN_INITIALS)):
+            if extra not in keys:
+                keys.append(extra)
+    return keys
+
+
+def movie_keys(title: Optional[str], aliases: Optional[str] = None) -> List[str]:
+    """
+    生成一部电影的前缀匹配键：标题的键加上其他数据源标题（别名）的键
+
+    Args:
+        title: 原始标题
+        aliases: 其他数据源的原始标题，换行分隔（movies.aliases）
+
+    Returns:
+        去重后的键列表，标题为空时返回空列表
+    """
+    keys = suggest_keys(title)
+    if keys and aliases:
+        for alias in aliases.split('\n'):
+            for key in suggest_keys(alias):
+                if key not in keys:
+                    keys.append(key)
+    return keys
+
+
+class _SortedPairs:
+    """
+    分块存放的有序 (键, 电影ID) 数组
+
+    每块最多 2 * block_size 个元素，各块的最大键单独保存用于二分查找；
+    插入和删除只移动一个块内的元素，百万级的键也能在微秒级完成增量更新。
+    """
+
+    def __init__(self, keys: List[str], ids: List[int], block_size: int = 512):
+        """
+        Args:
+            keys: 已排序的键
+            ids: 与键一一对应的电影ID
+            block_size: 块大小
+        """
+        self.block_size = block_size
+        self._keys = [keys[i:i + block_size] for i in range(0, len(keys), block_size)]
+        self._ids = [ids[i:i + block_size] for i in range(0, len(ids), block_size)]
+        self._maxes = [block[-1] for block in self._keys]
+        self._len = len(keys)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def insert(self, key: str, movie_id: int):
+        """插入一个键"""
+        if not self._keys:
+            self._keys, self._ids, self._maxes = [[key]], [[movie_id]], [key]
+            self._len = 1
+            return
+        b = min(bisect.bisect_right(self._maxes, key), len(self._maxes) - 1)
+        block, ids = self._keys[b], self._ids[b]
+        i = bisect.bisect_right(block, key)
+        block.insert(i, key)
+        ids.insert(i, movie_id)
+        self._maxes[b] = block[-1]
+        self._len += 1
+        if len(block) > 2 * self.block_size:
+            half = len(block) // 2
+            self._keys[b:b + 1] = [block[:half], block[half:]]
+            self._ids[b:b + 1] = [ids[:half], ids[half:]]
+            self._maxes[b:b + 1] = [block[half - 1], block[-1]]
+
+    def remove(self, key: str, movie_id: int) -> bool:
+        """删除一个键，返回是否找到"""
+        b = bisect.bisect_left(self._maxes, key)
+        while b < len(self._keys) and self._keys[b][0] <= key:
+            block, ids = self._keys[b], self._ids[b]
+            i = bisect.bisect_left(block, key)
+            while i < len(block) and block[i] == key:
+                if ids[i] == movie_id:
+                    del block[i]
+                    del ids[i]
+                    self._len -= 1
+                    if block:
+                        self._maxes[b] = block[-1]
+                    else:
+                        del self._keys[b], self._ids[b], self._maxes[b]
+                    return True
+                i += 1
+            b += 1
+        return False
+
+    def range_ids(self, prefix: str) -> List[int]:
+        """以 prefix 开头的键对应的电影ID（同一部电影的多个键都匹配时会重复出现）"""
+        upper = prefix + _MAX_CHAR
+        result = []
+        b = bisect.bisect_left(self._maxes, prefix)
+        while b < len(self._keys) and self._keys[b][0] < upper:
+            block = self._keys[b]
+            lo = bisect.bisect_left(block, prefix)
+            hi = bisect.bisect_left(block, upper, lo)
+            result.extend(self._ids[b][lo:hi])
+            b += 1
+        return result
+
+
+class SuggestIndex:
+    """
+    内存中的搜索建议索引
+
+    所有匹配键按顺序存放（见 _SortedPairs），前缀查询用二分查找定位键的区间，再按热度取前 N 部电影。
+    单个字母、常见词开头等前缀对应的区间很大，构建时预先计算这些前缀的结果并随写入增量维护，
+    查询只需要一次字典查找；其他前缀的区间不超过 scan_limit 个键，直接扫描。
+
+    数据变化通过 movie_changes 变更日志增量同步（见 sync），变更过多时整体重建。
+    """
+
+    def __init__(self, max_results: int = 20, scan_limit: int = 256, rebuild_ratio: float = 0.2):
+        """
+        Args:
+            max_results: 单次查询最多返回的数量，也是预先计算的每个前缀的结果数量
+            scan_limit: 区间内的键超过这个数量的前缀预先计算结果
+            rebuild_ratio: 待同步的变更超过电影数量的这个比例时整体重建，而不是逐条更新
+        """
+        self.max_results = max_results
+        self.scan_limit = scan_limit
+        self.rebuild_ratio = rebuild_ratio
+        self._pairs = _SortedPairs([], [])
+        # 电影ID -> (标题, 年份, 热度, 别名)
+        self._movies: Dict[int, Tuple[str, Optional[int], int, Optional[str]]] = {}
+        # 前缀 -> 按热度降序的电影ID
+        self._top: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.seq: Optional[int] = None
+        self.generation: Optional[int] = None
+        self.rebuilds = 0
+        self.updates = 0
+
+    def _rank(self, movie_id: int) -> Tuple[int, int]:
+        """排序键：热度降序，热度相同时新电影在前（与热度排行一致）"""
+        return self._movies[movie_id][2], movie_id
+
+    def build(self, entries: Iterable[Tuple[int, str, Optional[int], int, Optional[str]]], seq: int = 0):
+        """
+        整体构建索引
+
+        新索引在锁外构建，完成后替换旧索引，构建期间查询不受影响。
+
+        Args:
+            entries: (电影ID, 标题, 年份, 热度, 别名)，别名见 movie_keys
+            seq: 数据对应的变更序号
+        """
+        movies = {}
+        all_keys, all_ids = [], []
+        for movie_id, title, year, popularity, aliases in entries:
+            keys = movie_keys(title, aliases)
+            if not keys:
+                continue
+            movies[movie_id] = (title, year, popularity or 0, aliases)
+            all_keys.extend(keys)
+            all_ids.extend([movie_id] * len(keys))
+        # 按键排序下标，直接比较字符串比比较 (键, 电影ID) 元组快得多
+        order = sorted(range(len(all_keys)), key=all_keys.__getitem__)
+        keys = [all_keys[i] for i in order]
+        ids = [all_ids[i] for i in order]
+        del all_keys, all_ids, order
+
+        rank = lambda movie_id: (movies[movie_id][2], movie_id)
+        top = {}
+
+        def collect(lo: int, hi: int, length: int) -> List[int]:
+            """
+            自底向上计算区间 [lo, hi)（键的公共前缀长度为 length）内超过 scan_limit 的子前缀的结果
+
+            大的子区间只把自己的前 N 部电影交给上一层，每个键只被扫描一次。
+
+            Returns:
+                本区间的候选电影ID，包含本区间前 N 部电影
+            """
+            candidates = []
+            while lo < hi:
+                if len(keys[lo]) <= length:
+                    candidates.append(ids[lo])
+                    lo += 1
+                    continue
+                prefix = keys[lo][:length + 1]
+                end = bisect.bisect_left(keys, prefix + _MAX_CHAR, lo, hi)
+                if end - lo > self.scan_limit:
+                    top[prefix] = heapq.nlargest(self.max_results, set(collect(lo, end, length + 1)), key=rank)
+                    candidates.extend(top[prefix])
+                else:
+                    candidates.extend(ids[lo:end])
+                lo = end
+            return candidates
+
+        collect(0, len(keys), 0)
+
+        sorted_pairs = _SortedPairs(keys, ids)
+        with self._lock:
+            self._pairs, self._movies, self._top = sorted_pairs, movies, top
+            self.seq = seq
+            self.rebuilds += 1
+
+    def apply(self, changes: List[Tuple[int, int, Optional[str], Optional[int], int, Optional[str]]]):
+        """
+        逐条应用变更
+
+        Args:
+            changes: get_movie_changes 返回的 (变更序号, 电影ID, 标题, 年份, 热度, 别名)，标题为 None 表示已删除
+        """
+        with self._lock:
+            for seq, movie_id, title, year, popularity, aliases in changes:
+                self._update(movie_id, title, year, popularity or 0, aliases)
+                self.seq = max(self.seq or 0, seq)
+            self.updates += len(changes)
+
+    def _update(self, movie_id: int, title: Optional[str], year: Optional[int], popularity: int,
+                aliases: Optional[str] = None):
+        """更新一部电影的键和热度，并维护受影响前缀的预先计算结果（调用方持有锁）"""
+        previous = self._movies.pop(movie_id, None)
+        old_keys = movie_keys(previous[0], previous[3]) if previous else []
+        new_keys = movie_keys(title, aliases)
+        old_rank = (previous[2], movie_id) if previous else None
+
+        # 只有热度变化时（最常见的情况）键不变，不需要改动键数组
+        if old_keys != new_keys:
+            for key in old_keys:
+                self._pairs.remove(key, movie_id)
+            for key in new_keys:
+                self._pairs.insert(key, movie_id)
+        if new_keys:
+            self._movies[movie_id] = (title, year, popularity, aliases)
+
+        prefixes = {key[:i] for key in old_keys + new_keys for i in range(1, len(key) + 1)}
+        for prefix in prefixes:
+            top = self._top.get(prefix)
+            if top is not None:
+                self._update_top(prefix, top, movie_id, old_rank, new_keys)
+
+    def _update_top(self, prefix: str, top: List[int], movie_id: int,
+                    old_rank: Optional[Tuple[int, int]], new_keys: List[str]):
+        """
+        更新一个前缀的预先计算结果
+
+        电影离开前缀或热度下降时，原本排在结果之外的电影可能应该补进来，
+        这时删除该前缀的结果，下次查询时重新计算。
+        """
+        full = len(top) >= self.max_results
+        matches = any(key.startswith(prefix) for key in new_keys)
+        if movie_id in top:
+            top.remove(movie_id)
+            if not matches:
+                if full:
+                    del self._top[prefix]
+                return
+            if full and self._rank(movie_id) < old_rank:
+                del self._top[prefix]
+                return
+        elif not matches or (full and self._rank(movie_id) <= self._rank(top[-1])):
+            return
+
+        rank = self._rank(movie_id)
+        position = 0
+        while position < len(top) and self._rank(top[position]) > rank:
+            position += 1
+        top.insert(position, movie_id)
+        if len(top) > self.max_results:
+            top.pop()
+
+    def sync(self, db) -> bool:
+        """
+        与数据库同步，数据写入代数没有变化时直接返回
+
+        Args:
+            db: Database 实例
+
+        Returns:
+            是否读取了新数据
+        """
+        generation = db.get_generation()
+        if generation == self.generation:
+            return False
+        with self._sync_lock:
+            if generation == self.generation:
+                return False
+            if self.seq is not None:
+                threshold = max(int(len(self._movies) * self.rebuild_ratio), 1000)
+                changes = db.get_movie_changes(self.seq, threshold + 1)
+                if len(changes) <= threshold:
+                    self.apply(changes)
+                    self.generation = generation
+                    return True
+            seq, entries = db.get_suggest_entries()
+            self.build(entries, seq)
+            self.generation = generation
+            return True
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        按前缀查找电影
+
+        Args:
+            query: 用户输入，与标题使用相同的规范化（忽略大小写、标点和空白）
+            limit: 返回数量，不超过 max_results
+
+        Returns:
+            按热度降序的电影（id、title、year、popularity）
+        """
+        prefix = normalize_title(query)
+        if not prefix:
+            return []
+        with self._lock:
+            top = self._top.get(prefix)
+            if top is None:
+                ids = self._pairs.range_ids(prefix)
+                top = heapq.nlargest(self.max_results, set(ids), key=self._rank)
+                # 写入使区间变大，或预先计算的结果因热度下降被删除时，缓存本次结果并继续增量维护
+                if len(ids) > self.scan_limit:
+                    self._top[prefix] = top
+            results = []
+            for movie_id in top[:limit]:
+                title, year, popularity, _ = self._movies[movie_id]
+                results.append({'id': movie_id, 'title': title, 'year': year, 'popularity': popularity})
+            return results
+
+    def stats(self) -> Dict[str, Any]:
+        """索引规模和同步次数"""
+        with self._lock:
+            return {
+                'movies': len(self._movies),
+                'keys': len(self._pairs),
+                'cached_prefixes': len(self._top),
+                'seq': self.seq,
+                'rebuilds': self.rebuilds,
+                'updates': self.updates,
+                'pinyin': HAS_PINYIN,
+            }
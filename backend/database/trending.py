@@ -0,0 +1,89 @@
+# 热度趋势：按热度快照计算指数衰减的热度增长，增量更新并预先生成前 K 名
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class TrendingEngine:
+    """
+    热度趋势引擎
+
+    热度是各数据源的投票数之和，按总量排序时老牌热门电影永远排在前面。
+    趋势分数只累计两次快照之间的热度增长，并按半衰期指数衰减：
+    score(t) = score(t0) × 2^(-(t - t0) / 半衰期) + 新增热度。
+    分数只与增长量有关，与复查的频率无关；首次出现的电影只记录基准快照，不计入增长。
+
+    每次爬取后调用 update：只读取变更日志中新变更的电影，写入快照、更新趋势分数并重新生成
+    前 K 名，/api/trending 直接按名次读取。
+    """
+
+    def __init__(self, half_life_days: float = 3.0, top_k: int = 500, min_score: float = 1.0,
+                 history_days: int = 90, bucket_seconds: int = 86400):
+        """
+        Args:
+            half_life_days: 趋势分数的半衰期（天）
+            top_k: 预先生成的前 K 名数量
+            min_score: 当前衰减分数低于该值的电影不进入前 K 名
+            history_days: 快照保留天数（每部电影至少保留最近一次快照）
+            bucket_seconds: 快照时间桶长度（秒），同一时间桶内只保留最后一次快照
+        """
+        self.rate = math.log(2) / (half_life_days * 86400)
+        self.top_k = top_k
+        self.min_score = min_score
+        self.history_days = history_days
+        self.bucket_seconds = bucket_seconds
+        self._lock = threading.Lock()
+
+    def update(self, db, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        根据新变更的电影更新快照和趋势分数
+
+        Args:
+            db: Database 实例
+            now: 当前 Unix 时间戳，默认为当前时间
+
+        Returns:
+            mode（baseline/incremental/none）、movies（处理的电影数）、rising（热度增长的电影数）、
+            top（前 K 名数量）和 seconds
+        """
+        with self._lock:
+            start = time.perf_counter()
+            now = now or time.time()
+            bucket = int(now // self.bucket_seconds)
+            seq, trend_seq, rows = db.get_trend_changes()
+
+            if trend_seq is None:
+                db.init_trend_baseline(seq, bucket)
+                return self._result('baseline', 0, 0, 0, start)
+            if not rows:
+                return self._result('none', 0, 0, 0, start)
+
+            snapshots, trends, removed = [], [], []
+            for movie_id, popularity, _, last_popularity, score, updated_at in rows:
+                if popularity is None:
+                    removed.append(movie_id)
+                    continue
+                # 热度为 0 通常是数据源还没有返回投票数，之后补全的投票数不是新增热度
+                if not popularity or popularity == last_popularity:
+                    continue
+                snapshots.append((movie_id, bucket, popularity))
+                if last_popularity is None or popularity <= last_popularity:
+                    continue
+                decayed = score * math.exp(-self.rate * (now - updated_at)) if score else 0.0
+                new_score = decayed + popularity - last_popularity
+                trends.append((movie_id, new_score, now, self.trend_key(new_score, now)))
+
+            top = db.save_trends(seq, snapshots, trends, removed,
+                                 prune_before=bucket - self.history_days * 86400 // self.bucket_seconds,
+                                 top_k=self.top_k, min_key=self.trend_key(self.min_score, now))
+            return self._result('incremental', len(rows), len(trends), top, start)
+
+    def trend_key(self, score: float, updated_at: float) -> float:
+        """排序键：ln(score) + 衰减率 × 更新时间，任意时刻的衰减分数排序都与之一致"""
+        return math.log(score) + self.rate * updated_at
+
+    @staticmethod
+    def _result(mode: str, movies: int, rising: int, top: int, start: float) -> Dict[str, Any]:
+        return {'mode': mode, 'movies': movies, 'rising': rising, 'top': top,
+                'seconds': round(time.perf_counter() - start, 3)}
@@ -0,0 +1,24 @@
+# gunicorn 配置：gunicorn -c gunicorn.conf.py wsgi:app
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+
+# 工作进程数，默认每个 CPU 一个（读请求主要耗费 CPU，SQLite WAL 模式下多进程并发读取互不阻塞）
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', 4))
+timeout = int(os.getenv('WEB_TIMEOUT', 60))
+keepalive = 5
+
+# 主进程预加载应用：数据库初始化和查询缓存预热只执行一次，结果通过 fork 共享给所有工作进程
+preload_app = True
+
+accesslog = os.getenv('ACCESS_LOG') or None
+
+
+def post_fork(server, worker):
+    """工作进程启动后重建数据库连接并启动后台爬取线程"""
+    from app import db, start_crawl_workers
+    db.reset_after_fork()
+    start_crawl_workers()
@@ -0,0 +1,5 @@
+# 后台任务模块初始化
+from .crawl_worker import CrawlWorkerPool
+from .scheduler import RecrawlScheduler
+
+__all__ = ['CrawlWorkerPool', 'RecrawlScheduler']
@@ -0,0 +1,145 @@
+# 爬取任务后台执行
+import threading
+from datetime import datetime
+from typing import List, Optional
+from database import Database
+from database.models import CrawlJob
+from database.scoring import ScoreEngine
+from database.trending import TrendingEngine
+from crawler import CrawlEngine, CrawlPipeline
+
+
+class CrawlWorkerPool:
+    """
+    爬取任务工作线程池
+
+    任务持久化在 SQLite 的 crawl_jobs 表中，工作线程轮询领取任务并执行，
+    API 只负责入队，响应时间不再取决于爬取耗时。
+    """
+
+    def __init__(self, db: Database, engine: CrawlEngine, workers: int = 2,
+                 poll_interval: float = 2.0, stale_timeout: int = 600,
+                 fetch_workers: int = 4, parse_workers: int = 2, batch_size: int = 200,
+                 scorer: Optional[ScoreEngine] = None, trending: Optional[TrendingEngine] = None):
+        """
+        初始化工作线程池
+
+        Args:
+            db: 数据库实例
+            engine: 爬取引擎
+            workers: 工作线程数
+            poll_interval: 队列为空时的轮询间隔（秒）
+            stale_timeout: 执行中任务超过该时间没有进度时重新入队（秒）
+            fetch_workers: 每个任务的抓取线程数
+            parse_workers: 每个任务的解析线程数
+            batch_size: 每个事务写入的数量
+            scorer: 综合评分引擎，任务成功后增量重算变更电影的综合评分
+            trending: 热度趋势引擎，任务成功后记录热度快照并更新趋势排行
+        """
+        self.db = db
+        self.engine = engine
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.batch_size = batch_size
+        self.scorer = scorer
+        self.trending = trending
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+
+    def start(self):
+        """启动工作线程"""
+        if self._threads:
+            return
+        self._stop.clear()
+        requeued = self.db.requeue_stale_crawl_jobs(self.stale_timeout)
+        if requeued:
+            print(f"重新入队 {requeued} 个中断的爬取任务")
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'crawl-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        """停止工作线程（正在执行的任务会先完成）"""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, source: str, query: str = '', limit: int = 20) -> int:
+        """
+        提交爬取任务
+
+        Args:
+            source: 数据源名称，all 表示所有数据源
+            query: 搜索关键词
+            limit: 每个数据源的爬取数量
+
+        Returns:
+            任务ID
+        """
+        sources_total = len(self.engine.crawlers) if source == 'all' else 1
+        job_id = self.db.enqueue_crawl_job(source, query, limit, sources_total)
+        self._wakeup.set()
+        return job_id
+
+    def _run(self):
+        """工作线程主循环"""
+        while not self._stop.is_set():
+            try:
+                job = self.db.claim_crawl_job()
+            except Exception as e:
+                print(f"领取爬取任务失败: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._execute(job)
+
+    def _execute(self, job: CrawlJob):
+        """执行单个爬取任务并记录进度"""
+        sources = list(self.engine.crawlers) if job.source == 'all' else [job.source]
+
+        def save(source, movies_data):
+            movie_ids = self.db.upsert_movies_with_reviews(movies_data, source=source)
+            return sum(1 for movie_id in movie_ids if movie_id is not None)
+
+        def report(total, saved, sources_done):
+            self.db.update_crawl_job(job.id, total=total, saved=saved, sources_done=sources_done)
+
+        pipeline = CrawlPipeline(self.engine.crawlers, save, fetch_workers=self.fetch_workers,
+                                 parse_workers=self.parse_workers, batch_size=self.batch_size,
+                                 on_batch=report)
+        try:
+            result = pipeline.run(job.query, limit=job.limit, sources=sources)
+            write_errors = result['stages']['write']['errors']
+            if write_errors:
+                self.db.update_crawl_job(job.id, status='failed', sources_done=len(sources),
+                                         error=f'{write_errors} 批数据写入失败',
+                                         finished_at=datetime.now().isoformat())
+            else:
+                self.db.update_crawl_job(job.id, status='succeeded', sources_done=len(sources),
+                                         finished_at=datetime.now().isoformat())
+                self._refresh_rankings()
+        except Exception as e:
+            print(f"爬取任务 {job.id} 失败: {e}")
+            self.db.update_crawl_job(job.id, status='failed', error=str(e),
+                                     finished_at=datetime.now().isoformat())
+
+    def _refresh_rankings(self):
+        """增量更新综合评分和热度趋势，失败不影响任务状态（下次任务或 rescore 脚本会补上）"""
+        for name, engine in (('综合评分', self.scorer), ('热度趋势', self.trending)):
+            if engine is None:
+                continue
+            try:
+                engine.update(self.db)
+            except Exception as e:
+                print(f"{name}更新失败: {e}")
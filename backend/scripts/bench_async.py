@@ -0,0 +1,127 @@
+# 异步读接口基准测试：同步 WSGI（gunicorn）与 ASGI（uvicorn）在高并发下的吞吐量对比
+import sys
+import os
+import argparse
+import asyncio
+import random
+import subprocess
+import tempfile
+import time
+from typing import List, Tuple
+
+# 添加项目根目录到Python路径
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from scripts.bench_db import seed_database, percentile
+from scripts.bench_load import free_port, request_paths, wait_ready
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """读取一个 HTTP/1.1 响应，返回状态码"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def run_client(port: int, paths: List[str], deadline: float, latencies: List[float], errors: List[int]):
+    """单个客户端：在一个 keep-alive 连接上循环发送请求直到时间结束"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    index = random.randrange(len(paths))
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(f'GET {paths[index % len(paths)]} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode('ascii'))
+            await writer.drain()
+            if await read_response(reader) == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors.append(1)
+            index += 1
+    except (OSError, asyncio.IncompleteReadError, ValueError):
+        errors.append(1)
+    finally:
+        writer.close()
+
+
+async def load(port: int, clients: int, duration: float, paths: List[str]) -> Tuple[List[float], int]:
+    """用指定数量的并发客户端施加负载"""
+    deadline = time.perf_counter() + duration
+    latencies: List[float] = []
+    errors: List[int] = []
+    await asyncio.gather(*(run_client(port, paths, deadline, latencies, errors) for _ in range(clients)))
+    return latencies, len(errors)
+
+
+def run_case(command: List[str], env: dict, port: int, clients: int, duration: float,
+             paths: List[str]) -> Tuple[float, float, float, int]:
+    """
+    启动服务器并施加负载
+
+    Returns:
+        (每秒请求数, p50 延迟毫秒, p99 延迟毫秒, 失败数)
+    """
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        latencies, errors = asyncio.run(load(port, clients, duration, paths))
+    finally:
+        server.terminate()
+        server.wait()
+    if not latencies:
+        return 0.0, 0.0, 0.0, errors
+    return (len(latencies) / duration, percentile(latencies, 50) * 1000,
+            percentile(latencies, 99) * 1000, errors)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='同步 WSGI 与异步 ASGI 读接口吞吐量对比')
+    parser.add_argument('--movies', type=int, default=20000, help='电影数量')
+    parser.add_argument('--clients', type=int, default=500, help='并发客户端数')
+    parser.add_argument('--duration', type=float, default=10.0, help='每轮压测时长（秒）')
+    parser.add_argument('--workers', type=int, default=1, help='两种服务器的工作进程数')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn 每进程线程数 / ASGI 数据库线程数')
+    parser.add_argument('--query-cache', action='store_true',
+                        help='开启进程内查询缓存（默认关闭，测量实际查询路径）')
+    args = parser.parse_args()
+
+    scenarios = {
+        'trending': ['/api/trending?limit=20'],
+        'mixed': request_paths(args.movies, 2000),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'bench.db')
+        seed_database(db_path, args.movies)
+
+        print(f"{args.movies} 部电影，{args.clients} 个并发客户端，每轮 {args.duration:.0f}s，"
+              f"{args.workers} 个工作进程，查询缓存{'开启' if args.query_cache else '关闭'}")
+        print(f"{'场景':<10} {'服务器':<10} {'请求/秒':>10} {'p50':>10} {'p99':>10} {'失败':>6}")
+        for scenario, paths in scenarios.items():
+            for server in ('wsgi', 'asgi'):
+                port = free_port()
+                env = dict(os.environ, DATABASE=db_path, PORT=str(port), CRAWL_WORKERS='0',
+                           CRAWLER_CACHE_DIR='', WARM_CACHE='0', WEB_CONCURRENCY=str(args.workers),
+                           WEB_THREADS=str(args.threads), ASYNC_DB_THREADS=str(args.threads))
+                if not args.query_cache:
+                    env['QUERY_CACHE_SIZE'] = '0'
+                if server == 'wsgi':
+                    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']
+                else:
+                    command = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(port),
+                               '--workers', str(args.workers), '--log-level', 'warning', '--no-access-log']
+                rps, p50, p99, errors = run_case(command, env, port, args.clients, args.duration, paths)
+                print(f"{scenario:<10} {server:<10} {rps:>10.0f} {p50:>8.2f}ms {p99:>8.2f}ms {errors:>6}")
+
+
+if __name__ == '__main__':
+    main()
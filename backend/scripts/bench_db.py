@@ -0,0 +1,149 @@
+# 数据库并发读取基准测试脚本
+import sys
+import os
+import argparse
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+
+def seed_database(db_path: str, movie_count: int):
+    """
+    生成测试数据
+
+    Args:
+        db_path: 数据库路径
+        movie_count: 电影数量
+    """
+    Database(db_path, pooled=False).close()
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        'INSERT INTO movies (title, year, description, poster_url) VALUES (?, ?, ?, ?)',
+        ((f'电影 {i}', 1950 + i % 75, f'第 {i} 部测试电影的简介', f'https://example.com/{i}.jpg')
+         for i in range(1, movie_count + 1))
+    )
+    sources = ['douban', 'imdb', 'rotten_tomatoes']
+    conn.executemany(
+        'INSERT INTO reviews (movie_id, source, score, votes, url, popularity) VALUES (?, ?, ?, ?, ?, ?)',
+        ((i, source, round(random.uniform(5, 10), 1), votes, f'https://example.com/{source}/{i}', votes)
+         for i in range(1, movie_count + 1)
+         for source in sources
+         for votes in (random.randint(100, 200000),))
+    )
+    conn.commit()
+    conn.close()
+
+
+def percentile(values, pct: float) -> float:
+    """计算百分位数"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_case(name: str, db: Database, movie_count: int, threads: int,
+             requests_count: int, with_writer: bool):
+    """
+    在并发负载下测量 get_movie_by_id 的延迟
+
+    Args:
+        name: 测试名称
+        db: 数据库实例
+        movie_count: 电影数量
+        threads: 读取线程数
+        requests_count: 读取请求总数
+        with_writer: 是否同时运行一个持续写入的线程
+    """
+    stop = threading.Event()
+
+    def writer():
+        from database.models import Review
+        while not stop.is_set():
+            movie_id = random.randint(1, movie_count)
+            db.insert_review(Review(movie_id=movie_id, source='douban',
+                                    score=8.0, votes=1, popularity=1))
+
+    def read_once(_):
+        movie_id = random.randint(1, movie_count)
+        start = time.perf_counter()
+        db.get_movie_by_id(movie_id)
+        return (time.perf_counter() - start) * 1000
+
+    writer_thread = None
+    if with_writer:
+        writer_thread = threading.Thread(target=writer, daemon=True)
+        writer_thread.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(read_once, range(requests_count)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    if writer_thread:
+        writer_thread.join()
+
+    print(f"{name:<28} p50={statistics.median(latencies):7.3f}ms "
+          f"p99={percentile(latencies, 99):7.3f}ms "
+          f"吞吐={requests_count / elapsed:9.1f} req/s")
+
+
+def check_short_lived_threads(db: Database, threads: int = 200):
+    """
+    回归检查：每个线程只读取一次就退出（与每个请求一个线程的服务器相同），线程结束后连接应当关闭
+
+    Args:
+        db: 连接池模式的数据库实例
+        threads: 依次启动的线程数
+    """
+    db.get_stats()
+    before = db.connection_count()
+    for _ in range(threads):
+        thread = threading.Thread(target=db.get_stats)
+        thread.start()
+        thread.join()
+    after = db.connection_count()
+    print(f"{threads} 个短生命周期线程: 连接数 {before} -> {after}")
+    if after > before:
+        raise SystemExit(f"线程结束后遗留了 {after - before} 个连接")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='数据库连接池并发读取基准测试')
+    parser.add_argument('--movies', type=int, default=5000, help='电影数量')
+    parser.add_argument('--threads', type=int, default=8, help='并发读取线程数')
+    parser.add_argument('--requests', type=int, default=5000, help='读取请求总数')
+    parser.add_argument('--writer', action='store_true', help='同时运行写入线程')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'bench.db')
+        seed_database(db_path, args.movies)
+        print(f"数据: {args.movies} 部电影, {args.threads} 线程, {args.requests} 次读取"
+              f"{', 并发写入' if args.writer else ''}")
+
+        cases = [
+            ('每次新建连接 (DELETE)', dict(pooled=False, journal_mode='DELETE', synchronous='FULL',
+                                       cache_size_kb=2000, mmap_size=0)),
+            ('线程本地连接池 (WAL)', dict()),
+        ]
+        for name, options in cases:
+            db = Database(db_path, **options)
+            run_case(name, db, args.movies, args.threads, args.requests, args.writer)
+            if db.pooled:
+                check_short_lived_threads(db)
+            db.close()
+
+
+if __name__ == '__main__':
+    main()
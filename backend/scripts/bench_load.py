@@ -0,0 +1,147 @@
+# 负载测试脚本：测量不同 gunicorn 工作进程数下的吞吐量
+import sys
+import os
+import argparse
+import http.client
+import multiprocessing
+import random
+import socket
+import subprocess
+import tempfile
+import time
+from typing import List, Tuple
+
+# 添加项目根目录到Python路径
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from scripts.bench_db import seed_database, percentile
+
+
+def free_port() -> int:
+    """获取一个空闲端口"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def request_paths(movie_count: int, count: int) -> List[str]:
+    """
+    生成请求路径：热度排行、统计、按关键词搜索和电影详情混合
+
+    搜索和详情的参数随机，大部分请求不会命中查询缓存。
+    """
+    paths = []
+    for _ in range(count):
+        kind = random.random()
+        if kind < 0.1:
+            paths.append('/api/trending')
+        elif kind < 0.2:
+            paths.append('/api/stats')
+        elif kind < 0.6:
+            paths.append(f'/api/search?query={random.randint(1, movie_count)}&limit=20')
+        else:
+            paths.append(f'/api/movie/{random.randint(1, movie_count)}')
+    return paths
+
+
+def run_client(args: Tuple[int, List[str], float]) -> List[float]:
+    """
+    单个客户端：在一个 keep-alive 连接上循环发送请求直到时间结束
+
+    Returns:
+        每个成功请求的延迟（秒）
+    """
+    port, paths, duration = args
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    latencies = []
+    deadline = time.perf_counter() + duration
+    index = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request('GET', paths[index % len(paths)])
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        index += 1
+    conn.close()
+    return latencies
+
+
+def wait_ready(port: int, timeout: float = 30.0):
+    """等待服务启动"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/stats')
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('服务启动超时')
+
+
+def run_case(db_path: str, workers: int, threads: int, clients: int, duration: float,
+             movie_count: int) -> Tuple[int, float, float, float]:
+    """
+    启动指定工作进程数的 gunicorn 并施加负载
+
+    Returns:
+        (请求数, 每秒请求数, p50 延迟毫秒, p99 延迟毫秒)
+    """
+    port = free_port()
+    env = dict(os.environ, DATABASE=db_path, PORT=str(port), WEB_CONCURRENCY=str(workers),
+               WEB_THREADS=str(threads), CRAWL_WORKERS='0', CRAWLER_CACHE_DIR='')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(port)
+        # 客户端放在独立进程中，避免压测端自身受 GIL 限制
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.map(run_client, [(port, request_paths(movie_count, 1000), duration)
+                                            for _ in range(clients)])
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = [latency for result in results for latency in result]
+    if not latencies:
+        return 0, 0.0, 0.0, 0.0
+    return (len(latencies), len(latencies) / duration,
+            percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='gunicorn 多进程吞吐量测试')
+    parser.add_argument('--movies', type=int, default=20000, help='电影数量')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='测试的工作进程数')
+    parser.add_argument('--threads', type=int, default=4, help='每个工作进程的线程数')
+    parser.add_argument('--clients', type=int, default=16, help='并发客户端数')
+    parser.add_argument('--duration', type=float, default=10.0, help='每轮压测时长（秒）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'bench.db')
+        seed_database(db_path, args.movies)
+
+        print(f"{args.movies} 部电影，{args.clients} 个并发客户端，每轮 {args.duration:.0f}s，"
+              f"每个工作进程 {args.threads} 线程（CPU 核数 {multiprocessing.cpu_count()}）")
+        print(f"{'进程数':>6} {'请求数':>8} {'请求/秒':>10} {'p50':>10} {'p99':>10}")
+        for workers in args.workers:
+            total, rps, p50, p99 = run_case(db_path, workers, args.threads, args.clients,
+                                            args.duration, args.movies)
+            print(f"{workers:>6} {total:>8} {rps:>10.0f} {p50:>8.2f}ms {p99:>8.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
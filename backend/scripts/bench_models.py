@@ -0,0 +1,222 @@
+# 模型与序列化基准测试：dataclass 模型、__slots__ 模型与直接序列化路径对比
+import sys
+import os
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from database.models import Movie, Review, MovieWithReviews, format_timestamp
+from scripts.bench_db import seed_database
+from utils.serialize import dumps, HAS_ORJSON
+
+
+# 原有的 dataclass 模型，作为对比基准
+@dataclass
+class LegacyMovie:
+    id: Optional[int] = None
+    title: str = ""
+    year: Optional[int] = None
+    description: Optional[str] = None
+    poster_url: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    def to_dict(self):
+        return {
+            'id': self.id, 'title': self.title, 'year': self.year,
+            'description': self.description, 'poster_url': self.poster_url,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+@dataclass
+class LegacyReview:
+    id: Optional[int] = None
+    movie_id: int = 0
+    source: str = ""
+    score: Optional[float] = None
+    votes: Optional[int] = None
+    url: Optional[str] = None
+    popularity: int = 0
+    updated_at: Optional[datetime] = None
+
+    def to_dict(self):
+        return {
+            'id': self.id, 'movie_id': self.movie_id, 'source': self.source, 'score': self.score,
+            'votes': self.votes, 'url': self.url, 'popularity': self.popularity,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+@dataclass
+class LegacyMovieWithReviews:
+    movie: LegacyMovie
+    reviews: list
+    avg_score: float = 0.0
+    popularity: int = 0
+    composite_score: Optional[float] = None
+
+    def to_dict(self):
+        scores = {}
+        for review in self.reviews:
+            if review.score is not None:
+                scores[review.source] = review.score
+        return {**self.movie.to_dict(), 'scores': scores, 'avg_score': self.avg_score,
+                'composite_score': self.composite_score, 'popularity': self.popularity,
+                'reviews': [r.to_dict() for r in self.reviews]}
+
+
+def parse_time(value):
+    """原有的逐行时间解析"""
+    return datetime.fromisoformat(value) if value else None
+
+
+def fetch_rows(db: Database, limit: int):
+    """读取热度前 N 部电影的原始行和影评行"""
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        rows = db._fetch_movie_rows(cursor, '', [], [], 's.popularity',
+                                    's.popularity DESC, s.movie_id DESC', limit)
+        ids = [row['id'] for row in rows]
+        review_cursor = conn.cursor()
+        review_cursor.row_factory = None
+        review_cursor.execute(f'''
+            SELECT id, movie_id, source, score, votes, url, popularity, updated_at
+            FROM reviews WHERE movie_id IN ({', '.join('?' * len(ids))})
+        ''', ids)
+        reviews = {}
+        for review in review_cursor.fetchall():
+            reviews.setdefault(review[1], []).append(review)
+        return rows, reviews
+
+
+def build_models(rows, reviews, movie_class, review_class, wrapper_class, convert_time):
+    """把原始行转换为模型对象"""
+    return [
+        wrapper_class(
+            movie=movie_class(id=row['id'], title=row['title'], year=row['year'],
+                              description=row['description'], poster_url=row['poster_url'],
+                              created_at=convert_time(row['created_at']),
+                              updated_at=convert_time(row['updated_at'])),
+            reviews=[review_class(id=r[0], movie_id=r[1], source=r[2], score=r[3], votes=r[4], url=r[5],
+                                  popularity=r[6] or 0, updated_at=convert_time(r[7]))
+                     for r in reviews.get(row['id'], [])],
+            avg_score=row['stats_avg_score'] or 0,
+            popularity=row['stats_popularity'] or 0,
+            composite_score=row['stats_composite_score'],
+        )
+        for row in rows
+    ]
+
+
+def build_dicts(rows, reviews):
+    """直接把原始行转换为响应格式的字典（Database 的 as_dict 路径）"""
+    return [
+        Database._movie_row_to_dict(row, [
+            {'id': r[0], 'movie_id': r[1], 'source': r[2], 'score': r[3], 'votes': r[4], 'url': r[5],
+             'popularity': r[6] or 0, 'updated_at': format_timestamp(r[7])}
+            for r in reviews.get(row['id'], [])
+        ])
+        for row in rows
+    ]
+
+
+def db_models(db: Database, limit: int, legacy: bool = False):
+    """查询一页并构建模型（整页耗时包含查询）"""
+    rows, reviews = fetch_rows(db, limit)
+    if legacy:
+        return build_models(rows, reviews, LegacyMovie, LegacyReview, LegacyMovieWithReviews, parse_time)
+    return build_models(rows, reviews, Movie, Review, MovieWithReviews, lambda value: value)
+
+
+def legacy_body(movies) -> bytes:
+    """原有路径：to_dict 后由 jsonify 序列化"""
+    data = [movie.to_dict() for movie in movies]
+    return json.dumps({'success': True, 'total': len(data), 'data': data, 'next_cursor': None},
+                      sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def page_body(data) -> bytes:
+    """新路径：序列化为 JSON 字节串"""
+    return dumps({'success': True, 'total': len(data), 'data': data, 'next_cursor': None})
+
+
+def measure_time(fn, rounds: int) -> float:
+    """返回单次调用的平均耗时（毫秒）"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def measure_memory(fn):
+    """返回 (结果对象占用的内存, 执行期间的峰值内存)，单位 KB"""
+    tracemalloc.start()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained / 1024, peak / 1024
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='模型与序列化基准测试')
+    parser.add_argument('--movies', type=int, default=5000, help='电影数量')
+    parser.add_argument('--rows', type=int, default=100, help='每个响应的电影数量')
+    parser.add_argument('--rounds', type=int, default=500, help='重复次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'bench.db')
+        seed_database(db_path, args.movies)
+        db = Database(db_path)
+        rows, reviews = fetch_rows(db, args.rows)
+
+        def legacy_models():
+            return build_models(rows, reviews, LegacyMovie, LegacyReview, LegacyMovieWithReviews, parse_time)
+
+        def slotted_models():
+            return build_models(rows, reviews, Movie, Review, MovieWithReviews, lambda value: value)
+
+        legacy, slotted = legacy_models(), slotted_models()
+        direct = db.get_trending_movies_page(args.rows, as_dict=True)[0]
+        assert json.loads(legacy_body(legacy)) == json.loads(page_body([m.to_dict() for m in slotted])) \
+            == json.loads(page_body(direct)) == json.loads(page_body(build_dicts(rows, reviews)))
+
+        print(f"每个响应 {args.rows} 部电影，JSON 序列化: {'orjson' if HAS_ORJSON else 'json'}；"
+              f"对象内存为构建结果占用，峰值内存包含生成响应体，整页包含查询")
+        print(f"{'路径':<24} {'对象内存':>10} {'峰值内存':>10} {'构建':>10} {'序列化':>10} {'整页':>10}")
+        cases = [
+            ('dataclass + jsonify', legacy_models, legacy_body,
+             lambda: legacy_body(db_models(db, args.rows, legacy=True))),
+            ('__slots__ + to_dict', slotted_models, lambda movies: page_body([m.to_dict() for m in movies]),
+             lambda: page_body([m.to_dict() for m in db.get_trending_movies_page(args.rows)[0]])),
+            ('行直接转字典', lambda: build_dicts(rows, reviews), page_body,
+             lambda: page_body(db.get_trending_movies_page(args.rows, as_dict=True)[0])),
+        ]
+        for name, build, serialize, full in cases:
+            built = build()
+            retained, _ = measure_memory(build)
+            _, peak = measure_memory(lambda: serialize(build()))
+            build_ms = measure_time(build, args.rounds)
+            serialize_ms = measure_time(lambda: serialize(built), args.rounds)
+            full_ms = measure_time(full, args.rounds)
+            print(f"{name:<24} {retained:>8.1f}KB {peak:>8.1f}KB {build_ms:>8.3f}ms "
+                  f"{serialize_ms:>8.3f}ms {full_ms:>8.3f}ms")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# 分页基准测试脚本：OFFSET 与游标分页对比
+import sys
+import os
+import argparse
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from scripts.bench_db import seed_database
+
+
+SORT_KEYS = {
+    'popularity': 's.popularity',
+    'score': 'COALESCE(s.avg_score, -1)',
+    'votes': 's.votes',
+}
+
+
+def offset_page(db: Database, sort_by: str, page: int, page_size: int):
+    """OFFSET 分页：每次都要按索引顺序跳过前面所有行"""
+    with db.get_connection() as conn:
+        rows = conn.execute(f'''
+            SELECT m.*, s.avg_score, s.popularity
+            FROM movie_stats s
+            JOIN movies m ON m.id = s.movie_id
+            ORDER BY {SORT_KEYS[sort_by]} DESC, s.movie_id DESC
+            LIMIT ? OFFSET ?
+        ''', (page_size, (page - 1) * page_size)).fetchall()
+        db._get_reviews_by_movie(conn.cursor(), [row['id'] for row in rows])
+        return rows
+
+
+def collect_cursors(db: Database, sort_by: str, pages: int, page_size: int):
+    """顺序翻页，记录每一页的起始游标"""
+    cursors = [None]
+    cursor = None
+    for _ in range(pages - 1):
+        _, cursor = db.search_movies_page(sort_by=sort_by, limit=page_size, cursor=cursor)
+        if not cursor:
+            break
+        cursors.append(cursor)
+    return cursors
+
+
+def measure(fn, rounds: int) -> float:
+    """返回单次调用的平均耗时（毫秒）"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='OFFSET 与游标分页基准测试')
+    parser.add_argument('--movies', type=int, default=200000, help='电影数量')
+    parser.add_argument('--page-size', type=int, default=20, help='每页数量')
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100, 500, 1000], help='测试的页码')
+    parser.add_argument('--sort-by', type=str, default='popularity', choices=list(SORT_KEYS), help='排序方式')
+    parser.add_argument('--rounds', type=int, default=50, help='每个页码的重复次数')
+    args = parser.parse_args()
+
+    max_page = max(args.pages)
+    if max_page * args.page_size > args.movies:
+        print(f'电影数量不足以翻到第 {max_page} 页')
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'bench.db')
+        seed_database(db_path, args.movies)
+        db = Database(db_path)
+        cursors = collect_cursors(db, args.sort_by, max_page, args.page_size)
+
+        print(f"{args.movies} 部电影，每页 {args.page_size} 条，按 {args.sort_by} 排序")
+        print(f"{'页码':>6} {'OFFSET':>12} {'游标':>12}")
+        for page in args.pages:
+            offset_ms = measure(lambda: offset_page(db, args.sort_by, page, args.page_size), args.rounds)
+            keyset_ms = measure(lambda: db.search_movies_page(sort_by=args.sort_by, limit=args.page_size,
+                                                              cursor=cursors[page - 1]), args.rounds)
+            print(f"{page:>6} {offset_ms:10.3f}ms {keyset_ms:10.3f}ms")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+# HTML 解析后端基准测试脚本
+import sys
+import os
+import argparse
+import glob
+import multiprocessing
+import resource
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler import DoubanCrawler, RottenTomatoesCrawler, IMDBCrawler
+from crawler.parsing import HAS_LXML
+
+
+CRAWLERS = {
+    'douban': DoubanCrawler,
+    'rotten_tomatoes': RottenTomatoesCrawler,
+    'imdb': IMDBCrawler,
+}
+
+# 生成测试页面时使用的目标元素
+SAMPLE_ELEMENTS = {
+    'douban': '''
+        <span property="v:itemreviewed">流浪地球</span><span class="year">(2019)</span>
+        <strong class="ll rating_num">7.9</strong><span property="v:votes">1853219</span>
+        <span property="v:summary">近未来，科学家们发现太阳急速衰老膨胀……</span>
+        <img rel="v:image" src="https://img.example.com/p1.jpg">
+    ''',
+    'rotten_tomatoes': '''
+        <h1 slot="title">The Wandering Earth</h1><p slot="releaseYear">2019</p>
+        <score-board-deprecated>71%</score-board-deprecated><span slot="count">52 Reviews</span>
+        <p slot="description">As the sun is dying out...</p><img slot="posterImage" src="https://img.example.com/p2.jpg">
+    ''',
+    'imdb': '''
+        <h1 data-testid="hero-title-block__title">The Wandering Earth</h1>
+        <span data-testid="hero-rating-bar__aggregate-rating__score">6.0/10</span>
+        <div data-testid="hero-rating-bar__aggregate-rating__count">52,341</div>
+        <span data-testid="plot-xl">As the sun is dying out...</span>
+        <img data-testid="hero-media__poster" src="https://img.example.com/p3.jpg">
+    ''',
+}
+
+
+def synthetic_page(source: str, blocks: int = 400) -> str:
+    """生成接近真实详情页体积的测试页面（约 200KB）"""
+    noise = ''.join(
+        f'<div class="item item-{i}"><a href="/link/{i}">链接 {i}</a>'
+        f'<ul><li>演员 {i}</li><li>角色 {i}</li></ul><p>{"影评内容 " * 20}</p></div>'
+        for i in range(blocks)
+    )
+    return f'<html><head><title>{source}</title></head><body>{noise[:len(noise) // 2]}' \
+           f'{SAMPLE_ELEMENTS[source]}{noise[len(noise) // 2:]}</body></html>'
+
+
+def load_pages(fixtures_dir: str):
+    """
+    读取测试页面
+
+    Args:
+        fixtures_dir: 保存的详情页目录，文件名以数据源名称开头（如 douban_1.html），
+                      为空时使用生成的页面
+    """
+    if not fixtures_dir:
+        return [(source, synthetic_page(source)) for source in CRAWLERS]
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, '*.html'))):
+        name = os.path.basename(path)
+        source = next((s for s in CRAWLERS if name.startswith(s)), None)
+        if source:
+            with open(path, encoding='utf-8') as f:
+                pages.append((source, f.read()))
+    return pages
+
+
+def run_backend(parser: str, targeted: bool, pages, rounds: int, queue):
+    """在独立进程中解析页面，回报吞吐量和峰值内存"""
+    crawlers = {name: cls(delay=0, parser=parser, targeted_parsing=targeted)
+                for name, cls in CRAWLERS.items()}
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    parsed = 0
+    for _ in range(rounds):
+        for source, html in pages:
+            crawler = crawlers[source]
+            result = crawler._parse_movie_detail(crawler._make_soup(html, crawler.detail_targets), '1')
+            parsed += 1 if result and result['title'] else 0
+    elapsed = time.perf_counter() - start
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((rounds * len(pages) / elapsed, peak_rss, peak_rss - baseline_rss, parsed))
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='HTML 解析后端基准测试')
+    parser.add_argument('--fixtures', type=str, default='', help='保存的详情页目录')
+    parser.add_argument('--rounds', type=int, default=20, help='每个页面的解析次数')
+    args = parser.parse_args()
+
+    pages = load_pages(args.fixtures)
+    if not pages:
+        print('没有找到测试页面')
+        return
+    print(f"{len(pages)} 个页面，每页解析 {args.rounds} 次，lxml {'可用' if HAS_LXML else '未安装'}")
+
+    backends = [('html.parser', False), ('html.parser', True)]
+    if HAS_LXML:
+        backends += [('lxml', False), ('lxml', True)]
+
+    # 每个后端在独立进程中运行，峰值内存互不影响
+    context = multiprocessing.get_context('spawn')
+    for backend, targeted in backends:
+        queue = context.Queue()
+        process = context.Process(target=run_backend, args=(backend, targeted, pages, args.rounds, queue))
+        process.start()
+        pages_per_sec, peak_rss, delta_rss, parsed = queue.get()
+        process.join()
+        name = f"{backend} ({'定向' if targeted else '完整'})"
+        print(f"{name:<24} {pages_per_sec:8.1f} 页/秒  峰值 RSS {peak_rss / 1024:7.1f}MB "
+              f"(解析增加 {delta_rss / 1024:6.1f}MB)  成功 {parsed}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# 影评读取基准测试脚本：GROUP_CONCAT JSON 与两阶段批量查询对比
+import sys
+import os
+import argparse
+import json
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from database.models import Review, MovieWithReviews
+from scripts.bench_db import seed_database
+
+
+def legacy_trending(db: Database, limit: int):
+    """旧实现：SQL 端拼接 JSON 字符串，Python 端再解析"""
+    with db.get_connection() as conn:
+        rows = conn.execute('''
+            SELECT m.*, s.avg_score AS stats_avg_score, s.popularity AS stats_popularity,
+                   (SELECT GROUP_CONCAT(
+                               json_object('source', r.source, 'score', r.score, 'votes', r.votes, 'url', r.url, 'popularity', r.popularity),
+                               ', '
+                           )
+                    FROM reviews r WHERE r.movie_id = m.id) AS reviews_json
+            FROM movie_stats s
+            JOIN movies m ON m.id = s.movie_id
+            ORDER BY s.popularity DESC, s.movie_id DESC
+            LIMIT ?
+        ''', (limit,)).fetchall()
+
+        movies = []
+        for row in rows:
+            reviews = []
+            if row['reviews_json']:
+                for r_data in json.loads(f'[{row["reviews_json"]}]'):
+                    reviews.append(Review(movie_id=row['id'], source=r_data.get('source', ''),
+                                          score=r_data.get('score'), votes=r_data.get('votes'),
+                                          url=r_data.get('url'), popularity=r_data.get('popularity', 0)))
+            movies.append(MovieWithReviews(movie=Database._row_to_movie(row), reviews=reviews,
+                                           avg_score=row['stats_avg_score'] or 0,
+                                           popularity=row['stats_popularity'] or 0))
+        return movies
+
+
+def measure(fn, rounds: int) -> float:
+    """返回单次调用的平均耗时（毫秒）"""
+    fn()
+    start = time.process_time()
+    for _ in range(rounds):
+        fn()
+    return (time.process_time() - start) / rounds * 1000
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='影评读取方式基准测试')
+    parser.add_argument('--movies', type=int, default=20000, help='电影数量')
+    parser.add_argument('--limit', type=int, default=100, help='每次读取的电影数量')
+    parser.add_argument('--rounds', type=int, default=200, help='重复次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'bench.db')
+        seed_database(db_path, args.movies)
+        db = Database(db_path)
+
+        legacy_ms = measure(lambda: legacy_trending(db, args.limit), args.rounds)
+        batched_ms = measure(lambda: db.get_trending_movies(limit=args.limit), args.rounds)
+
+        print(f"limit={args.limit}, {args.rounds} 轮 CPU 时间")
+        for name, ms in [('GROUP_CONCAT + json.loads', legacy_ms), ('两阶段 IN 批量查询', batched_ms)]:
+            print(f"{name:<28} {ms:8.3f}ms/请求  {ms / args.limit * 1000:8.2f}us/行")
+        print(f"每行节省 {(legacy_ms - batched_ms) / args.limit * 1000:.2f}us")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
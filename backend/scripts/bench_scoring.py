@@ -0,0 +1,83 @@
+# 综合评分和热度趋势基准测试：全量计算耗时，以及模拟一次爬取后增量更新的耗时
+import sys
+import os
+import argparse
+import random
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from database.scoring import ScoreEngine, HAS_NUMPY
+from database.trending import TrendingEngine
+from scripts.bench_db import seed_database
+
+
+def simulate_crawl(db: Database, movie_count: int, changes: int, batch_size: int) -> float:
+    """按 seed_database 的标题格式随机更新一批电影的评分和投票数（与爬虫写入相同的路径），返回耗时"""
+    sources = ['douban', 'imdb', 'rotten_tomatoes']
+    movie_ids = random.sample(range(1, movie_count + 1), changes)
+    start = time.perf_counter()
+    for offset in range(0, changes, batch_size):
+        source = random.choice(sources)
+        batch = []
+        for movie_id in movie_ids[offset:offset + batch_size]:
+            votes = random.randint(100, 200000)
+            batch.append({'title': f'电影 {movie_id}', 'year': 1950 + movie_id % 75,
+                          'score': round(random.uniform(5, 10), 1), 'votes': votes,
+                          'url': f'https://example.com/{source}/{movie_id}', 'popularity': votes})
+        db.upsert_movies_with_reviews(batch, source=source)
+    return time.perf_counter() - start
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='综合评分和热度趋势基准测试')
+    parser.add_argument('--movies', type=int, default=100000, help='电影数量（每部 3 条影评）')
+    parser.add_argument('--db', type=str, default='', help='使用已有的测试数据库（seed_database 生成），不重新生成')
+    parser.add_argument('--changes', type=int, default=10000, help='模拟爬取更新的电影数量')
+    parser.add_argument('--batch-size', type=int, default=200, help='模拟爬取每个事务写入的数量')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = args.db
+        if not db_path:
+            db_path = os.path.join(tmp_dir, 'bench.db')
+            print(f"生成 {args.movies} 部电影...")
+            seed_database(db_path, args.movies)
+        db = Database(db_path)
+        if not args.db:
+            # seed_database 直接写表，补建匹配索引后模拟爬取才能匹配到已有电影
+            db.rebuild_match_index()
+        movie_count = db.get_score_state()['movies']
+        print(f"{movie_count} 部电影，计算: {'numpy' if HAS_NUMPY else '纯 Python'}")
+
+        engine = ScoreEngine()
+        result = engine.update(db, full=True)
+        print(f"全量计算: {result['movies']} 部电影，{result['changed']} 部变化，用时 {result['seconds']:.2f}s")
+        trending = TrendingEngine()
+        result = trending.update(db)
+        if result['mode'] == 'baseline':
+            print(f"热度趋势基准快照: 用时 {result['seconds']:.2f}s")
+
+        write_seconds = simulate_crawl(db, movie_count, min(args.changes, movie_count), args.batch_size)
+        print(f"模拟爬取写入 {args.changes} 部电影，用时 {write_seconds:.2f}s")
+        result = engine.update(db)
+        print(f"增量计算: {result['movies']} 部电影，{result['changed']} 部变化，用时 {result['seconds']:.3f}s")
+        result = trending.update(db)
+        print(f"热度趋势增量更新: {result['movies']} 部电影，{result['rising']} 部热度增长，"
+              f"前 {result['top']} 名，用时 {result['seconds']:.3f}s")
+
+        start = time.perf_counter()
+        db.search_movies_page(sort_by='composite', limit=20)
+        print(f"按综合评分读取第一页: {(time.perf_counter() - start) * 1000:.2f}ms")
+        start = time.perf_counter()
+        db.get_trending_movies_page(10, as_dict=True)
+        print(f"读取热度趋势第一页: {(time.perf_counter() - start) * 1000:.2f}ms")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
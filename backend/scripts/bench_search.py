@@ -0,0 +1,108 @@
+# 全文检索基准测试脚本：FTS5 与 LIKE 对比
+import sys
+import os
+import argparse
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+
+CHARS = '流浪地球星际穿越千与千寻你的名字泰坦尼克号肖申克救赎盗梦空间阿凡达复仇者联盟寄生虫霸王别姬活着大话西游让子弹飞'
+WORDS = ['space', 'love', 'night', 'earth', 'dream', 'city', 'war', 'story', 'last', 'king', 'river', 'ghost']
+
+
+def random_title(rng: random.Random) -> str:
+    """生成随机中英文标题"""
+    if rng.random() < 0.6:
+        return ''.join(rng.choice(CHARS) for _ in range(rng.randint(2, 6)))
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+
+
+def seed_database(db_path: str, movie_count: int):
+    """
+    生成测试数据（写入后一次性重建全文索引）
+
+    Args:
+        db_path: 数据库路径
+        movie_count: 电影数量
+    """
+    Database(db_path).close()
+    rng = random.Random(42)
+    conn = sqlite3.connect(db_path)
+    conn.execute('DROP TRIGGER movies_fts_ai')
+    conn.executemany(
+        'INSERT INTO movies (title, year, description) VALUES (?, ?, ?)',
+        ((f'{random_title(rng)} {i}', 1950 + i % 75,
+          ''.join(rng.choice(CHARS) for _ in range(20)) + ' ' + rng.choice(WORDS))
+         for i in range(movie_count))
+    )
+    conn.execute("INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')")
+    conn.commit()
+    conn.close()
+    # 恢复被删除的触发器
+    Database(db_path).close()
+
+
+def measure(fn, queries) -> list:
+    """逐个执行查询并返回毫秒耗时列表"""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name: str, latencies: list):
+    ordered = sorted(latencies)
+    print(f"{name:<32} p50={statistics.median(ordered):9.2f}ms "
+          f"max={ordered[-1]:9.2f}ms")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='FTS5 与 LIKE 搜索性能对比')
+    parser.add_argument('--movies', type=int, default=1000000, help='电影数量')
+    parser.add_argument('--queries', type=int, default=20, help='查询次数')
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    queries = ['流浪地球', '千与千寻', 'Space Love', 'dream'] + [
+        ''.join(rng.choice(CHARS) for _ in range(3)) for _ in range(args.queries)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'bench.db')
+        start = time.perf_counter()
+        seed_database(db_path, args.movies)
+        print(f"生成 {args.movies} 部电影耗时 {time.perf_counter() - start:.1f}s，查询 {len(queries)} 个关键词")
+
+        db = Database(db_path)
+        with db.get_connection() as conn:
+            def like_filter(query):
+                pattern = f'%{query}%'
+                conn.execute('SELECT id FROM movies WHERE title LIKE ? OR description LIKE ? LIMIT 20',
+                             (pattern, pattern)).fetchall()
+
+            def fts_filter(query):
+                conn.execute('SELECT rowid FROM movies_fts WHERE movies_fts MATCH ? ORDER BY rank LIMIT 20',
+                             (db._fts_query(query),)).fetchall()
+
+            report('LIKE 过滤 (LIMIT 20)', measure(like_filter, queries))
+            report('FTS5 MATCH + bm25 (LIMIT 20)', measure(fts_filter, queries))
+
+        report('search_movies (FTS5)', measure(lambda q: db.search_movies(query=q), queries))
+        db.fts_enabled = False
+        report('search_movies (LIKE)', measure(lambda q: db.search_movies(query=q), queries))
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# 搜索建议索引基准测试：构建耗时、内存占用、前缀查询延迟和增量更新耗时
+import sys
+import os
+import argparse
+import random
+import resource
+import time
+from collections import defaultdict
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.suggest import SuggestIndex, suggest_keys, HAS_PINYIN
+from scripts.bench_db import percentile
+
+
+CHINESE_CHARS = ('的一是不了人我在有他这中大来上国个到说们为子和你地出道也时年得就那要下以生会自着去之过家学'
+                 '对可里后小么心多天而能好都然没日于起还发成事只作当想看文无开手十用主行方又如前所本见经头面'
+                 '公同三已老从动两长知民样现分将外但身些与高意进把法此实回二理美点月明其种声全工己话儿者向情'
+                 '部正名定女问力机给等几很业最间新什打便位因重被走电四第门相次东政海口使教西再平真听世气信北'
+                 '少关并内加化由却代军产入先山五太水万市眼体别处总才场师书比住员九笑性通目华报立马命张活难神')
+
+ENGLISH_WORDS = ('the of love night dark star war man girl city last king lost dead life story world time '
+                 'house blood road black white red blue dream ghost moon sun fire water secret summer winter '
+                 'return rise fall empire legend heart wild little great big new old first final').split()
+
+
+def make_titles(count: int, chinese_ratio: float):
+    """生成测试标题，中文标题和英文标题按比例混合"""
+    for movie_id in range(1, count + 1):
+        if random.random() < chinese_ratio:
+            title = ''.join(random.choice(CHINESE_CHARS) for _ in range(random.randint(2, 6)))
+        else:
+            title = ' '.join(random.choice(ENGLISH_WORDS) for _ in range(random.randint(1, 4)))
+        yield movie_id, f'{title} {movie_id}' if movie_id % 3 == 0 else title, 1950 + movie_id % 75, \
+            int(random.paretovariate(1.2) * 100), None
+
+
+def rss_mb() -> float:
+    """当前进程的峰值常驻内存（MB）"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='搜索建议索引基准测试')
+    parser.add_argument('--movies', type=int, default=1000000, help='电影数量')
+    parser.add_argument('--chinese-ratio', type=float, default=0.5, help='中文标题比例')
+    parser.add_argument('--queries', type=int, default=20000, help='查询次数')
+    parser.add_argument('--updates', type=int, default=2000, help='增量更新次数')
+    args = parser.parse_args()
+
+    random.seed(42)
+    entries = list(make_titles(args.movies, args.chinese_ratio))
+    rss_before = rss_mb()
+
+    index = SuggestIndex()
+    start = time.perf_counter()
+    index.build(entries)
+    build_seconds = time.perf_counter() - start
+    stats = index.stats()
+    print(f"{args.movies} 部电影，{stats['keys']} 个键，拼音: {'开启' if HAS_PINYIN else '未安装 pypinyin'}")
+    print(f"构建耗时 {build_seconds:.1f}s，预先计算 {stats['cached_prefixes']} 个前缀，"
+          f"内存约 {rss_mb() - rss_before:.0f}MB")
+
+    # 从随机电影的键中截取不同长度的前缀作为用户输入
+    latencies = defaultdict(list)
+    for _ in range(args.queries):
+        keys = suggest_keys(random.choice(entries)[1])
+        key = random.choice(keys)
+        prefix = key[:random.randint(1, min(len(key), 8))]
+        start = time.perf_counter()
+        index.search(prefix, 10)
+        latencies[min(len(prefix), 5)].append(time.perf_counter() - start)
+
+    print(f"{'前缀长度':<10} {'查询数':>8} {'p50':>10} {'p99':>10} {'最大':>10}")
+    for length in sorted(latencies):
+        values = latencies[length]
+        label = f'{length}+' if length == 5 else str(length)
+        print(f"{label:<10} {len(values):>8} {percentile(values, 50) * 1000:>8.3f}ms "
+              f"{percentile(values, 99) * 1000:>8.3f}ms {max(values) * 1000:>8.3f}ms")
+
+    # 增量更新：一半为已有电影热度变化，一半为新电影
+    changes = []
+    next_id = args.movies + 1
+    for seq in range(1, args.updates + 1):
+        if seq % 2:
+            movie_id, title, year, popularity, aliases = random.choice(entries)
+            changes.append((seq, movie_id, title, year, popularity + random.randint(1, 1000), aliases))
+        else:
+            _, title, year, popularity, aliases = next(make_titles(1, args.chinese_ratio))
+            changes.append((seq, next_id, f'{title} {next_id}', year, popularity, aliases))
+            next_id += 1
+    start = time.perf_counter()
+    index.apply(changes)
+    elapsed = time.perf_counter() - start
+    print(f"增量更新 {args.updates} 条，每条平均 {elapsed / args.updates * 1000:.3f}ms，"
+          f"合计 {elapsed:.2f}s（整体重建 {build_seconds:.1f}s）")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,12 +7,69 @@ import argparse
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database import Database
-from database.models import Movie, Review
-from crawler import DoubanCrawler, RottenTomatoesCrawler, IMDBCrawler
-from utils.helpers import clean_text, extract_year
+from crawler import DoubanCrawler, RottenTomatoesCrawler, IMDBCrawler, CrawlPipeline, ResponseCache
+from crawler.pipeline import format_stage_stats
+from scripts.rescore import rescore
 
 
-def crawl_source(source: str, query: str = '', limit: int = 50):
+def build_crawlers():
+    """创建所有数据源的爬虫"""
+    # 爬虫响应缓存（CRAWLER_CACHE_DIR 为空时关闭）
+    cache_dir = os.getenv('CRAWLER_CACHE_DIR', '.crawler_cache')
+    cache = ResponseCache(cache_dir, float(os.getenv('CRAWLER_CACHE_MB', 512))) if cache_dir else None
+
+    return {
+        'douban': DoubanCrawler(delay=2.0, cache=cache),
+        'rotten_tomatoes': RottenTomatoesCrawler(delay=2.0, cache=cache),
+        'imdb': IMDBCrawler(delay=2.0, cache=cache),
+    }
+
+
+def save_movies(db: Database, source: str, movies_data) -> int:
+    """批量保存一批数据（单个事务），返回保存成功的数量"""
+    movie_ids = db.upsert_movies_with_reviews(movies_data, source=source)
+    return sum(1 for movie_id in movie_ids if movie_id is not None)
+
+
+def run_pipeline(sources, query: str = '', limit: int = 50, fetch_workers: int = 4,
+                 parse_workers: int = 2, batch_size: int = 200):
+    """
+    通过流式流水线爬取并保存
+
+    抓取、解析和写入相互重叠，阶段之间的队列有界，大量爬取时内存占用保持不变。
+
+    Args:
+        sources: 数据源列表
+        query: 搜索关键词
+        limit: 每个数据源的爬取数量
+        fetch_workers: 抓取线程数
+        parse_workers: 解析线程数
+        batch_size: 每个事务写入的数量
+
+    Returns:
+        保存成功的数量
+    """
+    # 初始化数据库
+    db_path = os.getenv('DATABASE', 'movies.db')
+    db = Database(db_path)
+
+    pipeline = CrawlPipeline(
+        build_crawlers(), lambda source, movies_data: save_movies(db, source, movies_data),
+        fetch_workers=fetch_workers, parse_workers=parse_workers, batch_size=batch_size,
+        on_batch=lambda total, saved, sources_done: print(
+            f"已爬取 {total} 条，已保存 {saved} 条，完成 {sources_done} 个数据源"),
+    )
+    result = pipeline.run(query, limit=limit, sources=sources)
+
+    for source, counts in result['by_source'].items():
+        print(f"{source}: 成功保存 {counts['saved']}/{counts['total']} 条数据")
+    print(format_stage_stats(result['stages']))
+    if result['saved']:
+        rescore(db)
+    return result['saved']
+
+
+def crawl_source(source: str, query: str = '', limit: int = 50, **options):
     """
     爬取指定数据源的数据
     
@@ -20,85 +77,57 @@ def crawl_source(source: str, query: str = '', limit: int = 50):
         source: 数据源名称 (douban/rotten_tomatoes/imdb)
         query: 搜索关键词
         limit: 爬取数量
+        options: 流水线参数，见 run_pipeline
     """
     print(f"开始爬取 {source} 数据...")
+    return run_pipeline([source], query, limit, **options)
 
-    # 初始化数据库
-    db_path = os.getenv('DATABASE', 'movies.db')
-    db = Database(db_path)
 
-    # 获取对应的爬虫
-    crawlers = {
-        'douban': DoubanCrawler(delay=2.0),
-        'rotten_tomatoes': RottenTomatoesCrawler(delay=2.0),
-        'imdb': IMDBCrawler(delay=2.0),
-    }
+def crawl_all(query: str = '', limit: int = 50, **options):
+    """
+    并发爬取所有数据源的数据
 
-    crawler = crawlers.get(source)
-    if not crawler:
-        print(f"错误: 未知的数据源 '{source}'")
-        return 0
-
-    # 爬取数据
-    movies_data = crawler.search(query, limit=limit)
-    print(f"从 {source} 爬取到 {len(movies_data)} 条数据")
-
-    # 保存到数据库
-    saved_count = 0
-    for idx, movie_data in enumerate(movies_data, 1):
-        try:
-            print(f"[{idx}/{len(movies_data)}] 保存: {movie_data.get('title', 'N/A')}")
-
-            # 保存电影
-            movie = Movie(
-                title=clean_text(movie_data.get('title', '')),
-                year=extract_year(movie_data.get('description', '')),
-                description=clean_text(movie_data.get('description', '')),
-                poster_url=movie_data.get('poster_url', ''),
-            )
-            movie_id = db.insert_movie(movie)
-
-            # 保存影评
-            review = Review(
-                movie_id=movie_id,
-                source=crawler.get_source_name(),
-                score=movie_data.get('score'),
-                votes=movie_data.get('votes'),
-                url=movie_data.get('url', ''),
-                popularity=movie_data.get('popularity', 0),
-            )
-            db.insert_review(review)
-            saved_count += 1
-
-        except Exception as e:
-            print(f"保存失败: {e}")
-            continue
-
-    print(f"成功保存 {saved_count}/{len(movies_data)} 条数据")
-    return saved_count
+    Args:
+        query: 搜索关键词
+        limit: 每个数据源的爬取数量
+        options: 流水线参数，见 run_pipeline
+    """
+    print("开始并发爬取所有数据源...")
+    return run_pipeline(None, query, limit, **options)
 
 
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='爬取电影数据')
     parser.add_argument('--source', type=str, default='douban',
-                        help='数据源 (douban/rotten_tomatoes/imdb)')
+                        help='数据源 (douban/rotten_tomatoes/imdb/all)')
     parser.add_argument('--query', type=str, default='',
                         help='搜索关键词')
     parser.add_argument('--limit', type=int, default=50,
                         help='爬取数量')
+    parser.add_argument('--fetch-workers', type=int, default=4,
+                        help='抓取线程数')
+    parser.add_argument('--parse-workers', type=int, default=2,
+                        help='解析线程数')
+    parser.add_argument('--batch-size', type=int, default=200,
+                        help='每个事务写入的数量')
 
     args = parser.parse_args()
 
     # 验证数据源
-    valid_sources = ['douban', 'rotten_tomatoes', 'imdb']
+    valid_sources = ['douban', 'rotten_tomatoes', 'imdb', 'all']
     if args.source not in valid_sources:
         print(f"错误: 无效的数据源 '{args.source}'")
         print(f"有效数据源: {', '.join(valid_sources)}")
         return
 
     # 开始爬取
-    saved_count = crawl_source(args.source, args.query, args.limit)
+    options = {'fetch_workers': args.fetch_workers, 'parse_workers': args.parse_workers,
+               'batch_size': args.batch_size}
+    if args.source == 'all':
+        saved_count = crawl_all(args.query, args.limit, **options)
+    else:
+        saved_count = crawl_source(args.source, args.query, args.limit, **options)
 
     print(f"\n爬取完成！共保存 {saved_count} 条数据")
 
@@ -0,0 +1,58 @@
+# 重复电影合并脚本
+import sys
+import os
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+
+def dedupe_movies(dry_run: bool = False, rebuild_index: bool = False) -> int:
+    """
+    查找并合并已有数据中的重复电影
+
+    Args:
+        dry_run: 只列出重复分组，不合并
+        rebuild_index: 合并前按现有数据重建匹配索引
+
+    Returns:
+        合并掉的电影数量
+    """
+    db_path = os.getenv('DATABASE', 'movies.db')
+    db = Database(db_path)
+
+    if rebuild_index:
+        print("重建匹配索引...")
+        db.rebuild_match_index()
+
+    groups = db.find_duplicate_movies()
+    print(f"找到 {len(groups)} 组重复电影")
+
+    merged = 0
+    for group in groups:
+        keep_id, duplicate_ids = group[0], group[1:]
+        print(f"  保留 {keep_id}，合并 {duplicate_ids}")
+        if not dry_run:
+            db.merge_movies(keep_id, duplicate_ids)
+            merged += len(duplicate_ids)
+
+    if not dry_run:
+        print(f"合并完成，删除 {merged} 条重复电影")
+    db.close()
+    return merged
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='合并跨数据源的重复电影')
+    parser.add_argument('--dry-run', action='store_true', help='只列出重复分组，不合并')
+    parser.add_argument('--rebuild-index', action='store_true', help='合并前重建匹配索引')
+    args = parser.parse_args()
+
+    dedupe_movies(args.dry_run, args.rebuild_index)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# 数据导出脚本
+import sys
+import os
+import argparse
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from utils.ndjson import iter_ndjson
+
+
+def export_data(output: str, compress: bool = False, batch_size: int = 1000) -> int:
+    """
+    把全部电影及影评导出为 NDJSON
+
+    Args:
+        output: 输出文件路径，'-' 表示标准输出
+        compress: 是否 gzip 压缩
+        batch_size: 每批读取的电影数量
+
+    Returns:
+        导出的电影数量
+    """
+    db_path = os.getenv('DATABASE', 'movies.db')
+    db = Database(db_path)
+
+    count = 0
+
+    def counted(records):
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    start = time.time()
+    out = sys.stdout.buffer if output == '-' else open(output, 'wb')
+    try:
+        for chunk in iter_ndjson(counted(db.iter_export(batch_size)), compress=compress):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        db.close()
+
+    elapsed = time.time() - start
+    print(f"导出 {count} 部电影，用时 {elapsed:.1f}s", file=sys.stderr)
+    return count
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='导出电影和影评数据（NDJSON）')
+    parser.add_argument('--output', type=str, default='movies.ndjson', help="输出文件，'-' 表示标准输出")
+    parser.add_argument('--gzip', action='store_true', help='gzip 压缩（输出文件以 .gz 结尾时自动开启）')
+    parser.add_argument('--batch-size', type=int, default=1000, help='每批读取的电影数量')
+    args = parser.parse_args()
+
+    export_data(args.output, args.gzip or args.output.endswith('.gz'), args.batch_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+# 批量导入脚本：从 NDJSON / CSV 文件导入电影和影评
+import sys
+import os
+import argparse
+import csv
+import gzip
+import io
+import json
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from scripts.rescore import rescore
+from utils.helpers import clean_text, extract_year
+
+
+def open_text(path: str) -> io.TextIOBase:
+    """打开输入文件，.gz 结尾时按 gzip 解压，'-' 表示标准输入"""
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def detect_format(path: str) -> str:
+    """根据扩展名判断文件格式"""
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'csv' if name.endswith('.csv') else 'ndjson'
+
+
+def iter_ndjson_records(f) -> Iterator[Dict[str, Any]]:
+    """
+    逐行读取 NDJSON
+
+    支持两种格式：每行一条影评的扁平数据（与爬虫数据字段相同），
+    以及 export_data.py 导出的每行一部电影、reviews 字段为影评列表的数据。
+    """
+    for line_no, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            print(f"第 {line_no} 行解析失败: {e}")
+            continue
+
+        reviews = record.pop('reviews', None)
+        if reviews is None:
+            yield record
+        elif not reviews:
+            yield {**record, 'source': None}
+        else:
+            for review in reviews:
+                yield {**record, **{k: v for k, v in review.items() if k not in ('id', 'movie_id')}}
+
+
+def iter_csv_records(f) -> Iterator[Dict[str, Any]]:
+    """读取 CSV，第一行为列名，空单元格视为缺失"""
+    for row in csv.DictReader(f):
+        yield {key: value for key, value in row.items() if key and value != ''}
+
+
+def to_number(value: Any, number_type: type) -> Optional[Any]:
+    """把字符串等转换为数字，无法转换时返回 None"""
+    if value is None or value == '':
+        return None
+    try:
+        return number_type(value)
+    except (TypeError, ValueError):
+        try:
+            return number_type(float(value))
+        except (TypeError, ValueError):
+            return None
+
+
+def normalize_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    标准化导入数据
+
+    Args:
+        record: 原始数据
+
+    Returns:
+        可直接传给 Database.upsert_movies_with_reviews 的数据
+    """
+    description = clean_text(record.get('description'))
+    year = record.get('year')
+    return {
+        'title': clean_text(record.get('title')),
+        'year': (to_number(year, int) or extract_year(str(year))) if year else extract_year(description),
+        'description': description,
+        'poster_url': record.get('poster_url') or '',
+        'source': clean_text(record.get('source')) or None,
+        'score': to_number(record.get('score'), float),
+        'votes': to_number(record.get('votes'), int),
+        'url': record.get('url') or '',
+        'popularity': to_number(record.get('popularity'), int) or 0,
+        'external_ids': record.get('external_ids') if isinstance(record.get('external_ids'), dict) else {},
+    }
+
+
+def iter_chunks(records: Iterator[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """按固定数量分块"""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_data(path: str, file_format: Optional[str] = None, source: Optional[str] = None,
+                chunk_size: int = 50000, defer_indexes: bool = False) -> int:
+    """
+    流式导入数据文件
+
+    Args:
+        path: 输入文件路径
+        file_format: ndjson/csv，为空时按扩展名判断
+        source: 数据项没有 source 字段时使用的默认数据源
+        chunk_size: 每个事务写入的行数
+        defer_indexes: 导入结束后再重建索引和统计（仅用于离线导入）
+
+    Returns:
+        导入的行数
+    """
+    db_path = os.getenv('DATABASE', 'movies.db')
+    db = Database(db_path)
+
+    file_format = file_format or detect_format(path)
+    print(f"开始导入 {path}（{file_format}）...")
+
+    start = time.time()
+    total = 0
+    with open_text(path) as f, db.bulk_load(defer_indexes=defer_indexes):
+        records = iter_csv_records(f) if file_format == 'csv' else iter_ndjson_records(f)
+        normalized = (normalize_record(record) for record in records)
+
+        for chunk in iter_chunks((item for item in normalized if item['title']), chunk_size):
+            db.upsert_movies_with_reviews(chunk, source=source)
+            total += len(chunk)
+            elapsed = time.time() - start
+            print(f"已导入 {total} 行，{total / elapsed:.0f} 行/秒")
+
+    elapsed = time.time() - start
+    print(f"导入完成: {total} 行，用时 {elapsed:.1f}s，平均 {total / elapsed if elapsed else 0:.0f} 行/秒")
+    rescore(db)
+    db.close()
+    return total
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='从 NDJSON/CSV 文件批量导入电影和影评')
+    parser.add_argument('path', type=str, help="输入文件（支持 .gz），'-' 表示标准输入")
+    parser.add_argument('--format', type=str, choices=['ndjson', 'csv'], default=None,
+                        help='文件格式，默认按扩展名判断')
+    parser.add_argument('--source', type=str, default=None, help='数据项没有 source 字段时使用的数据源')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='每个事务写入的行数')
+    parser.add_argument('--defer-indexes', action='store_true',
+                        help='导入期间删除二级索引和触发器，结束后统一重建（仅用于离线导入）')
+    args = parser.parse_args()
+
+    import_data(args.path, args.format, args.source, args.chunk_size, args.defer_indexes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# 增量复查脚本：只重新抓取已到期的电影
+import sys
+import os
+import argparse
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from crawler import CrawlEngine
+from jobs import RecrawlScheduler
+from scripts.crawl_data import build_crawlers
+from scripts.rescore import rescore
+
+
+def show_schedule(db: Database, sources, budget: int):
+    """打印各数据源的调度情况和本轮将要复查的电影"""
+    now = time.time()
+    stats = db.get_crawl_schedule_stats(now)
+    for source in sources:
+        source_stats = stats.get(source, {'scheduled': 0, 'due': 0})
+        print(f"{source}: 已调度 {source_stats['scheduled']}，已到期 {source_stats['due']}")
+        for due in db.get_due_crawls(source, budget, now):
+            overdue = (now - due['next_due_at']) / 3600
+            print(f"  电影 {due['movie_id']} ({due['external_id']})，逾期 {overdue:.1f} 小时，"
+                  f"已检查 {due['checks']} 次，变化 {due['changes']} 次")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='按新鲜度增量复查电影数据')
+    parser.add_argument('--source', type=str, default='all',
+                        help='数据源 (douban/rotten_tomatoes/imdb/all)')
+    parser.add_argument('--budget', type=int, default=100, help='每个数据源本轮最多抓取的数量')
+    parser.add_argument('--dry-run', action='store_true', help='只显示到期情况，不抓取')
+    args = parser.parse_args()
+
+    crawlers = build_crawlers()
+    if args.source != 'all' and args.source not in crawlers:
+        print(f"错误: 无效的数据源 '{args.source}'")
+        print(f"有效数据源: {', '.join(list(crawlers) + ['all'])}")
+        return
+    sources = list(crawlers) if args.source == 'all' else [args.source]
+
+    db = Database(os.getenv('DATABASE', 'movies.db'))
+    if args.dry_run:
+        show_schedule(db, sources, args.budget)
+        db.close()
+        return
+
+    scheduler = RecrawlScheduler(db, CrawlEngine(crawlers), default_budget=args.budget)
+    start = time.time()
+    stats = scheduler.run_once(sources)
+    for source, source_stats in stats.items():
+        print(f"{source}: 抓取 {source_stats['crawled']}，变化 {source_stats['changed']}，"
+              f"失败 {source_stats['failed']}")
+    print(f"\n复查完成，用时 {time.time() - start:.1f}s")
+    rescore(db)
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
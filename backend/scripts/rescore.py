@@ -0,0 +1,63 @@
+# 排行重算脚本：增量更新综合评分和热度趋势，--full 重新计算综合评分的数据源参数并全量重算
+import sys
+import os
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from database.scoring import ScoreEngine, HAS_NUMPY
+from database.trending import TrendingEngine
+
+MODE_NAMES = {'full': '全量', 'incremental': '增量'}
+
+
+def rescore(db: Database, full: bool = False, prior: float = 1.0, half_life_days: float = 3.0):
+    """
+    重算综合评分、更新热度趋势并打印结果
+
+    Args:
+        db: 数据库实例
+        full: 是否强制全量重算综合评分
+        prior: 综合评分的先验权重
+        half_life_days: 趋势分数的半衰期（天）
+
+    Returns:
+        (ScoreEngine.update 的结果, TrendingEngine.update 的结果)
+    """
+    result = ScoreEngine(prior=prior).update(db, full=full)
+    if result['mode'] == 'none':
+        print("综合评分没有需要重算的电影")
+    else:
+        print(f"综合评分{MODE_NAMES[result['mode']]}重算：{result['movies']} 部电影，"
+              f"{result['changed']} 部变化，用时 {result['seconds']:.2f}s")
+
+    trend = TrendingEngine(half_life_days=half_life_days).update(db)
+    if trend['mode'] == 'baseline':
+        print("热度趋势：已记录全部电影的基准快照，之后的爬取开始计算趋势")
+    elif trend['mode'] == 'none':
+        print("热度趋势没有需要更新的电影")
+    else:
+        print(f"热度趋势增量更新：{trend['movies']} 部电影，{trend['rising']} 部热度增长，"
+              f"前 {trend['top']} 名，用时 {trend['seconds']:.2f}s")
+    return result, trend
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='重算电影综合评分和热度趋势')
+    parser.add_argument('--full', action='store_true', help='重新计算综合评分的数据源参数并全量重算')
+    parser.add_argument('--prior', type=float, default=1.0, help='先验权重（越大越向全站均值收缩）')
+    parser.add_argument('--half-life', type=float, default=3.0, help='趋势分数的半衰期（天）')
+    args = parser.parse_args()
+
+    db = Database(os.getenv('DATABASE', 'movies.db'))
+    if not HAS_NUMPY:
+        print("未安装 numpy，使用纯 Python 计算")
+    rescore(db, full=args.full, prior=args.prior, half_life_days=args.half_life)
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+# 进程内查询结果缓存
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+def make_cache_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> Tuple:
+    """
+    根据接口名和规范化后的参数生成缓存键
+
+    Args:
+        endpoint: 接口名
+        params: 查询参数，值为 None 的参数会被忽略
+
+    Returns:
+        可哈希的缓存键
+    """
+    items = tuple(sorted((k, v) for k, v in (params or {}).items() if v is not None))
+    return (endpoint, items)
+
+
+class ResultCache:
+    """
+    带 TTL 和 LRU 淘汰的读穿透缓存
+
+    每个条目记录写入时的数据代数（Database.get_generation），
+    代数变化后旧条目自动失效；TTL 作为兜底，覆盖代数无法感知的变化。
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 最大条目数，超过后淘汰最久未使用的条目
+            ttl: 条目有效期（秒）
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Hashable, Tuple[int, float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, generation: int) -> Tuple[bool, Any]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+            generation: 当前数据代数
+
+        Returns:
+            (是否命中, 缓存值)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_generation, expires_at, value = entry
+                if entry_generation == generation and expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: Hashable, generation: int, value: Any):
+        """写入缓存"""
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, generation: int, loader: Callable[[], Any]) -> Any:
+        """
+        读取缓存，未命中时调用 loader 加载并写入
+
+        Args:
+            key: 缓存键
+            generation: 当前数据代数
+            loader: 加载函数
+
+        Returns:
+            缓存值
+        """
+        hit, value = self.get(key, generation)
+        if hit:
+            return value
+        value = loader()
+        self.set(key, generation, value)
+        return value
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率等统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
@@ -80,7 +80,8 @@ def extract_year(text: Optional[str]) -> Optional[int]:
         return None
     
     import re
-    year_match = re.search(r'\b(19|20)\d{2}\b', text)
+    # 不用 \b：中文字符也算单词字符，“2019年” 中的年份匹配不到
+    year_match = re.search(r'(?<!\d)(19|20)\d{2}(?!\d)', text)
     if year_match:
         return int(year_match.group())
     return None
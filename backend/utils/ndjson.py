@@ -0,0 +1,42 @@
+# NDJSON 流式序列化
+import json
+import zlib
+from typing import Any, Dict, Iterable, Iterator
+
+
+def iter_ndjson(records: Iterable[Dict[str, Any]], compress: bool = False,
+                chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    把记录逐条序列化为 NDJSON，按块输出
+
+    Args:
+        records: 记录迭代器
+        compress: 是否输出 gzip 格式
+        chunk_size: 输出块大小（字节），攒够一块再输出，减少写入和网络发送次数
+
+    Yields:
+        NDJSON（或 gzip 压缩后的 NDJSON）数据块
+    """
+    # wbits=31 生成带 gzip 头和校验的数据流，可以直接保存为 .gz 文件
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = []
+    buffered = 0
+
+    for record in records:
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= chunk_size:
+            chunk = b''.join(buffer)
+            buffer = []
+            buffered = 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+    chunk = b''.join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
@@ -0,0 +1,27 @@
+# JSON 序列化：安装了 orjson 时使用 orjson，否则使用标准库 json
+import json
+from typing import Any
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    序列化为 UTF-8 编码的 JSON 字节串
+
+    两种实现输出相同：键排序（与 Flask jsonify 一致）、紧凑格式、非 ASCII 字符不转义。
+    只支持 JSON 原生类型，时间戳等需要预先格式化为字符串。
+
+    Args:
+        obj: 由 dict/list/str/int/float/bool/None 组成的对象
+
+    Returns:
+        JSON 字节串
+    """
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
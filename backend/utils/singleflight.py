@@ -0,0 +1,52 @@
+# 并发相同请求合并（single-flight）
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    合并并发的相同调用
+
+    同一个键在执行期间的后续调用不会重复执行，而是等待第一次调用的结果，
+    一批同时到达的相同请求只查询一次数据库。执行结束后立即移除，不缓存结果。
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行调用，相同键正在执行时等待其结果
+
+        调用在独立的任务中执行，某个等待方被取消（如客户端断开）不会影响其他等待方。
+
+        Args:
+            key: 调用的键
+            fn: 返回协程或 Future 的函数
+
+        Returns:
+            调用结果（异常同样会传给所有等待方）
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        """移除已完成的调用"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有等待方都已取消时，避免出现 "exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """实际执行次数、合并次数和正在执行的调用数"""
+        return {'calls': self.calls, 'shared': self.shared, 'inflight': len(self._inflight)}
@@ -0,0 +1,5 @@
+# WSGI 入口（gunicorn -c gunicorn.conf.py wsgi:app）
+from app import create_app
+
+# 后台爬取线程不能跨 fork 存活，由工作进程启动后的 post_fork 钩子启动
+app = create_app(start_workers=False)
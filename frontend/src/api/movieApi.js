@@ -19,6 +19,17 @@ export const searchMovies = async (params) => {
   }
 };
 
+// 搜索建议（输入时按标题前缀或拼音查找）
+export const getSuggestions = async (q, limit = 8) => {
+  try {
+    const response = await api.get('/api/suggest', { params: { q, limit } });
+    return response.data;
+  } catch (error) {
+    console.error('Failed to fetch suggestions:', error);
+    throw error;
+  }
+};
+
 // 获取电影详情
 export const getMovieDetail = async (movieId) => {
   try {
@@ -1,13 +1,50 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
+import { useNavigate } from 'react-router-dom';
+import { getSuggestions } from '../api/movieApi';
+
+// 输入停顿多久后请求搜索建议（毫秒）
+const SUGGEST_DELAY = 150;
 
 const SearchBar = ({ onSearch, onFilterChange, sources = [] }) => {
+  const navigate = useNavigate();
   const [query, setQuery] = useState('');
   const [selectedSource, setSelectedSource] = useState('');
   const [minScore, setMinScore] = useState(0);
   const [sortBy, setSortBy] = useState('popularity');
+  const [suggestions, setSuggestions] = useState([]);
+  const [showSuggestions, setShowSuggestions] = useState(false);
+
+  useEffect(() => {
+    const q = query.trim();
+    if (!q) {
+      setSuggestions([]);
+      return undefined;
+    }
+
+    // 只保留最后一次输入的结果，忽略先返回的旧请求
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const data = await getSuggestions(q);
+        if (!cancelled && data.success) {
+          setSuggestions(data.data);
+        }
+      } catch (err) {
+        if (!cancelled) {
+          setSuggestions([]);
+        }
+      }
+    }, SUGGEST_DELAY);
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [query]);
 
   const handleSearch = (e) => {
     e.preventDefault();
+    setShowSuggestions(false);
     onSearch({
       query,
       source: selectedSource,
@@ -32,8 +69,31 @@ const SearchBar = ({ onSearch, onFilterChange, sources = [] }) => {
               className="search-input"
               placeholder="搜索电影、动漫或电视剧..."
               value={query}
-              onChange={(e) => setQuery(e.target.value)}
+              onChange={(e) => {
+                setQuery(e.target.value);
+                setShowSuggestions(true);
+              }}
+              onFocus={() => setShowSuggestions(true)}
+              onBlur={() => setShowSuggestions(false)}
             />
+            {showSuggestions && suggestions.length > 0 && (
+              <ul className="suggest-list">
+                {suggestions.map((movie) => (
+                  <li
+                    key={movie.id}
+                    className="suggest-item"
+                    // 在输入框失去焦点之前处理点击
+                    onMouseDown={(e) => {
+                      e.preventDefault();
+                      navigate(`/movie/${movie.id}`);
+                    }}
+                  >
+                    <span className="suggest-title">{movie.title}</span>
+                    {movie.year && <span className="suggest-year">{movie.year}</span>}
+                  </li>
+                ))}
+              </ul>
+            )}
           </div>
 
           <div className="search-filters">
@@ -69,6 +129,7 @@ const SearchBar = ({ onSearch, onFilterChange, sources = [] }) => {
             >
               <option value="popularity">按热度排序</option>
               <option value="score">按评分排序</option>
+              <option value="composite">按综合评分排序</option>
               <option value="votes">按投票数排序</option>
             </select>
 
@@ -42,7 +42,7 @@ const TrendingMovies = ({ onMovieSelect }) => {
       <div className="section-header">
         <h2>
           <span className="icon">🔥</span>
-          热度排行 Top 10
+          热度趋势 Top 10
         </h2>
       </div>
       <div className="trending-list">
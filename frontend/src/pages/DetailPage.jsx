@@ -74,7 +74,7 @@ function DetailPage() {
               </div>
               <div className="meta-item">
                 <span className="label">综合评分</span>
-                <span className="value">{movie.avg_score?.toFixed(1) || 'N/A'}</span>
+                <span className="value">{(movie.composite_score ?? movie.avg_score)?.toFixed(1) || 'N/A'}</span>
               </div>
               <div className="meta-item">
                 <span className="label">热度</span>